@@ -1,26 +1,1394 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import signal
 import sys
+import tempfile
+import threading
+import time
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-                             QWidget, QTabWidget, QTableWidget, QTableWidgetItem,
+                             QWidget, QTabWidget, QTableView,
                              QPushButton, QLabel, QStatusBar, QMessageBox, QProgressBar,
                              QSpinBox, QCheckBox, QFrame, QSplitter, QScrollBar, QGridLayout,
-                             QGroupBox, QSlider, QButtonGroup, QRadioButton)
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer, Qt
-from PyQt5.QtGui import QFont, QColor, QPixmap, QIcon
+                             QGroupBox, QSlider, QButtonGroup, QRadioButton, QMenu,
+                             QAction, QFileDialog, QLineEdit, QComboBox)
+from PyQt5.QtCore import (QThread, pyqtSignal, QTimer, Qt, QAbstractTableModel, QModelIndex,
+                          QObject, QEventLoop, QPointF, QRectF, QCoreApplication)
+from PyQt5.QtGui import QFont, QColor, QPixmap, QIcon, QPainter, QPen, QImage
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.backend_bases import DrawEvent
 from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+from matplotlib.colors import to_rgba
 from matplotlib.widgets import RectangleSelector
 import matplotlib.patches as patches
 import numpy as np
 import SHDA
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
 from datetime import datetime
+from multiprocessing.connection import AuthenticationError, Client, Listener
 import traceback
+import tracemalloc
+
+# Títulos de los gráficos por tipo de instrumento
+PLOT_TITLES = {
+    'bluechips': 'Bluechips - Volumen vs Variación',
+    'galpones': 'Panel General - Volumen vs Variación',
+    'bonds': 'Bonos - Volumen vs Variación',
+    'cedears': 'CEDEARs - Volumen vs Variación',
+    'short_term_bonds': 'Letras - Volumen vs Variación',
+}
+
+def prepare_plot_data(df):
+    """Preparar datos para graficar (symbol, turnover, change)"""
+    try:
+        data = df.copy()
+
+        # Mapear columnas comunes
+        column_mapping = {
+            'ticker': 'symbol',
+            'simbolo': 'symbol',
+            'precio': 'price',
+            'turnover': 'turnover',
+            'variacion': 'change',
+            'var': 'change',
+            'cambio': 'change',
+            'pct_change': 'change'
+        }
+
+        for old_col, new_col in column_mapping.items():
+            if old_col in data.columns and new_col not in data.columns:
+                data[new_col] = data[old_col]
+
+        # Verificar que tenemos las columnas necesarias
+        if 'symbol' not in data.columns:
+            if data.index.name:
+                data['symbol'] = data.index
+            else:
+                data['symbol'] = [f'INST_{i}' for i in range(len(data))]
+
+        if 'turnover' not in data.columns:
+            # Intentar encontrar una columna de turnover
+            vol_cols = [col for col in data.columns if 'vol' in col.lower()]
+            if vol_cols:
+                data['turnover'] = pd.to_numeric(data[vol_cols[0]], errors='coerce')
+            else:
+                data['turnover'] = np.random.randint(1000, 100000, len(data))
+
+        if 'change' not in data.columns:
+            # Intentar encontrar una columna de variación
+            change_cols = [col for col in data.columns if any(word in col.lower() for word in ['var', 'change', 'pct', 'cambio'])]
+            if change_cols:
+                data['change'] = pd.to_numeric(data[change_cols[0]], errors='coerce')
+            else:
+                data['change'] = np.random.uniform(-5, 5, len(data))
+
+        # Limpiar datos
+        data = data.dropna(subset=['symbol'])
+        data['turnover'] = pd.to_numeric(data['turnover'], errors='coerce')
+        data['change'] = pd.to_numeric(data['change'], errors='coerce')
+        data = data.dropna(subset=['turnover', 'change'])
+
+        # El plazo se conserva para poder comparar varios en una sola pasada
+        columns = ['symbol', 'turnover', 'change'] + (['settlement'] if 'settlement' in data.columns else [])
+        return data[columns]
+
+    except Exception as e:
+        print(f"Error preparando datos: {e}")
+        return None
+
+# Colores RGBA de las burbujas según el signo de la variación
+POSITIVE_RGBA = to_rgba('#44ff44')  # Verde
+NEGATIVE_RGBA = to_rgba('#ff4444')  # Rojo
+NEUTRAL_RGBA = to_rgba('#ffffff')   # Blanco
+ALERT_COLOR = '#ffa500'             # Naranja: símbolos con alertas activas
+
+def is_change_column(column):
+    """Indica si una columna representa una variación (se colorea en la tabla)"""
+    column = str(column).lower()
+    return 'var' in column or 'change' in column
+
+def compute_bubble_style(df):
+    """
+    Calcula tamaños, colores, etiquetas y mediana para un DataFrame ya
+    preparado con prepare_plot_data.
+
+    Es puro cálculo vectorizado: se ejecuta en el hilo del worker y el hilo
+    de UI solo recibe los arrays resultantes.
+    """
+    turnover = df['turnover'].to_numpy(dtype=float)
+    change = df['change'].to_numpy(dtype=float)
+
+    # Normalizar tamaños de burbujas
+    min_size, max_size = 100, 2000
+    if len(df) > 1:
+        size_range = turnover.max() - turnover.min()
+        if size_range > 0:
+            sizes = min_size + (turnover - turnover.min()) * (max_size - min_size) / size_range
+        else:
+            sizes = np.full(len(df), float(min_size))
+    else:
+        sizes = np.full(len(df), 500.0)
+
+    # Colores basados en variación
+    face_colors = np.empty((len(df), 4))
+    face_colors[:] = NEUTRAL_RGBA
+    face_colors[change > 0] = POSITIVE_RGBA
+    face_colors[change < 0] = NEGATIVE_RGBA
+
+    # Etiquetas solo para puntos importantes
+    if len(df) <= 15:
+        label_mask = np.ones(len(df), dtype=bool)
+    else:
+        label_mask = turnover > np.quantile(turnover, 0.75)
+
+    median = float(np.median(turnover)) if len(df) > 0 else None
+    return sizes, face_colors, label_mask, median
+
+def _freeze(array):
+    """Marca un array como solo lectura para compartirlo entre hilos"""
+    array.setflags(write=False)
+    return array
+
+@dataclass(frozen=True)
+class PanelPayload:
+    """
+    Datos de un panel listos para mostrar.
+
+    Se construye completo en el hilo del worker (filtrado, normalización,
+    estilos del gráfico y textos de la tabla); el hilo de UI solo lo
+    intercambia en el modelo de la tabla y en los artistas del gráfico.
+    Ningún consumidor debe modificar sus DataFrames ni sus arrays.
+    """
+    data_type: str
+    data: object                # DataFrame filtrado (data_storage, exportación)
+    plot_data: object           # DataFrame symbol/turnover/change, índice 0..n-1
+    sizes: np.ndarray
+    face_colors: np.ndarray
+    label_mask: np.ndarray
+    median_turnover: object
+    headers: tuple
+    cells: np.ndarray           # Textos de la tabla (filas x columnas)
+    cell_signs: np.ndarray      # -1/0/1 para colorear columnas de variación
+    sort_keys: np.ndarray       # Clave de orden por celda: valor numérico o rango del texto
+    sort_groups: np.ndarray     # 0 si la celda es numérica, 1 si es texto
+    symbol_ranks: np.ndarray    # Rango alfabético del símbolo de cada fila (desempate)
+    unique_symbols: tuple       # Símbolos únicos ordenados (symbol_ranks indexa aquí)
+    empty_message: str = 'No hay datos disponibles'
+    timestamp: object = None    # Momento en que se obtuvieron los datos
+    stale: bool = False         # True si viene de la caché en disco y no del broker
+    settlement_table: object = None  # Tabla comparativa entre plazos (PanelPayload) o None
+
+def filter_operations(data):
+    """Mantener solo los instrumentos con al menos una operación"""
+    filtered_data = data.copy()
+    if 'operations' in filtered_data.columns:
+        # Convertir a numérico, los no-números serán NaN
+        filtered_data['operations'] = pd.to_numeric(filtered_data['operations'], errors='coerce')
+        # Mantener filas donde operations es un número y >= 1
+        filtered_data.dropna(subset=['operations'], inplace=True)
+        filtered_data = filtered_data[filtered_data['operations'] >= 1].copy()
+    return filtered_data
+
+def compute_sort_keys(cells):
+    """
+    Precalcula claves de orden tipadas para cada columna de la tabla.
+
+    Las celdas numéricas usan su valor y las de texto su rango alfabético
+    dentro de la columna; `sort_groups` ubica los números antes que los
+    textos. Así ordenar una columna es un único np.lexsort.
+    """
+    sort_keys = np.zeros(cells.shape)
+    sort_groups = np.zeros(cells.shape, dtype=np.int8)
+    for col_idx in range(cells.shape[1]):
+        texts = cells[:, col_idx].astype(str)
+        numeric = pd.to_numeric(pd.Series(texts), errors='coerce').to_numpy(dtype=float)
+        is_text = np.isnan(numeric)
+        sort_keys[:, col_idx] = numeric
+        if is_text.any():
+            _, ranks = np.unique(texts[is_text], return_inverse=True)
+            sort_keys[is_text, col_idx] = ranks
+            sort_groups[is_text, col_idx] = 1
+    return sort_keys, sort_groups
+
+def build_table_fields(data_to_display):
+    """Textos, colores de variación y claves de orden de una tabla"""
+    cells = data_to_display.astype(str).to_numpy(dtype=object)
+    sort_keys, sort_groups = compute_sort_keys(cells)
+    cell_signs = np.zeros(cells.shape, dtype=np.int8)
+    for col_idx, column in enumerate(data_to_display.columns):
+        if is_change_column(column):
+            numeric = np.where(sort_groups[:, col_idx] == 0, sort_keys[:, col_idx], 0.0)
+            cell_signs[:, col_idx] = np.sign(numeric)
+
+    symbol_ranks = np.zeros(len(cells), dtype=np.int64)
+    unique_symbols = ()
+    lower_headers = [str(column).lower() for column in data_to_display.columns]
+    for name in ['symbol', 'ticker', 'simbolo']:
+        if name in lower_headers:
+            unique_symbols, symbol_ranks = np.unique(cells[:, lower_headers.index(name)].astype(str), return_inverse=True)
+            unique_symbols = tuple(unique_symbols.tolist())
+            break
+
+    return dict(
+        headers=tuple(str(column) for column in data_to_display.columns),
+        cells=_freeze(cells),
+        cell_signs=_freeze(cell_signs),
+        sort_keys=_freeze(sort_keys),
+        sort_groups=_freeze(sort_groups),
+        symbol_ranks=_freeze(symbol_ranks.astype(np.int64)),
+        unique_symbols=unique_symbols,
+    )
+
+def build_settlement_view(normalized, settlements):
+    """Una fila por símbolo con el volumen y la variación de cada plazo"""
+    view = normalized.pivot_table(index='symbol', columns='settlement',
+                                  values=['turnover', 'change'], aggfunc='last')
+    columns = [(value, settlement) for value in ['turnover', 'change']
+               for settlement in settlements if (value, settlement) in view.columns]
+    view = view[columns]
+    view.columns = [f"{value}_{settlement}" for value, settlement in columns]
+    return view.reset_index()
+
+def build_table_payload(data_type, data, timestamp=None):
+    """PanelPayload solo con la tabla (sin gráfico), para vistas derivadas"""
+    plot_data = pd.DataFrame(columns=['symbol', 'turnover', 'change'])
+    return PanelPayload(
+        data_type=data_type,
+        data=data,
+        plot_data=plot_data,
+        sizes=_freeze(np.empty(0)),
+        face_colors=_freeze(np.empty((0, 4))),
+        label_mask=_freeze(np.empty(0, dtype=bool)),
+        median_turnover=None,
+        timestamp=timestamp or datetime.now(),
+        **build_table_fields(data),
+    )
+
+def build_panel_payload(data_type, data, timestamp=None, stale=False, primary_settlement=None):
+    """
+    Filtrar, normalizar y preparar todo lo necesario para mostrar un panel.
+
+    Si `data` trae varios plazos (etiquetas distintas en 'settlement'), se
+    filtra y normaliza todo junto una sola vez: el panel muestra el plazo
+    `primary_settlement` y `settlement_table` compara los plazos por símbolo.
+    """
+    if data is None or data.empty:
+        data = pd.DataFrame()
+        empty_message = 'No hay datos disponibles'
+    else:
+        data = filter_operations(data)
+        empty_message = 'No hay datos o no superan el filtro'
+
+    normalized = prepare_plot_data(data) if not data.empty else None
+    if normalized is None:
+        normalized = pd.DataFrame(columns=['symbol', 'turnover', 'change'])
+
+    timestamp = timestamp or datetime.now()
+    settlement_table = None
+    if (primary_settlement is not None and 'settlement' in normalized.columns
+            and normalized['settlement'].nunique() > 1):
+        settlements = [primary_settlement] + sorted(set(normalized['settlement']) - {primary_settlement})
+        settlement_table = build_table_payload(
+            data_type, build_settlement_view(normalized, settlements), timestamp)
+        data = data[data['settlement'] == primary_settlement]
+        normalized = normalized[normalized['settlement'] == primary_settlement]
+
+    plot_data = normalized[['symbol', 'turnover', 'change']].reset_index(drop=True)
+    sizes, face_colors, label_mask, median = compute_bubble_style(plot_data)
+
+    # Textos y valores de la tabla
+    data_to_display = data.drop(columns=['settlement', 'group'], errors='ignore')
+
+    return PanelPayload(
+        data_type=data_type,
+        data=data,
+        plot_data=plot_data,
+        sizes=_freeze(sizes),
+        face_colors=_freeze(face_colors),
+        label_mask=_freeze(label_mask),
+        median_turnover=median,
+        empty_message=empty_message,
+        timestamp=timestamp,
+        stale=stale,
+        settlement_table=settlement_table,
+        **build_table_fields(data_to_display),
+    )
+
+@dataclass(frozen=True)
+class PanelDiff:
+    """
+    Diferencias entre dos payloads consecutivos de un panel.
+
+    Las posiciones anteriores están alineadas a las filas de plot_data del
+    payload nuevo (NaN si el símbolo entró), y `changed_cells` a las celdas
+    de su tabla (None si cambiaron las columnas).
+    """
+    entered: tuple
+    left: tuple
+    changed: tuple
+    deltas: object              # DataFrame por símbolo: estado, valores anterior/nuevo y deltas
+    previous_points: np.ndarray # (filas, 3): change, turnover y tamaño anteriores
+    left_points: np.ndarray     # (salieron, 3): change, turnover y tamaño
+    left_colors: np.ndarray     # (salieron, 4): color RGBA de las burbujas que salieron
+    changed_cells: object       # Máscara booleana filas x columnas, o None
+
+def diff_panels(previous, current):
+    """
+    Alinear por símbolo el payload anterior y el nuevo de un panel y clasificar las filas.
+
+    La alineación es un único join por hash (Index.get_indexer) sobre los
+    símbolos; todo lo demás son operaciones vectorizadas sobre los arrays.
+    """
+    symbols = current.plot_data['symbol'].to_numpy()
+    previous_symbols = previous.plot_data['symbol'].to_numpy()
+    matches = match_rows(previous_symbols, symbols)
+    found = matches >= 0
+    rows = matches[found]
+
+    change = current.plot_data['change'].to_numpy(dtype=float)
+    turnover = current.plot_data['turnover'].to_numpy(dtype=float)
+    before = np.column_stack([previous.plot_data['change'].to_numpy(dtype=float),
+                              previous.plot_data['turnover'].to_numpy(dtype=float),
+                              np.asarray(previous.sizes, dtype=float)]).reshape(-1, 3)
+    previous_points = np.full((len(symbols), 3), np.nan)
+    previous_points[found] = before[rows]
+
+    moved = found & ((change != previous_points[:, 0]) | (turnover != previous_points[:, 1]))
+    status = np.where(~found, 'entered', np.where(moved, 'changed', 'unchanged'))
+    gone = np.ones(len(previous_symbols), dtype=bool)
+    gone[rows] = False
+    gone &= ~pd.Index(previous_symbols).isin(symbols)  # Repetidos del panel anterior
+
+    deltas = pd.DataFrame({
+        'symbol': np.concatenate([symbols, previous_symbols[gone]]),
+        'status': np.concatenate([status, np.full(gone.sum(), 'left')]),
+        'change_prev': np.concatenate([previous_points[:, 0], before[gone, 0]]),
+        'change': np.concatenate([change, np.full(gone.sum(), np.nan)]),
+        'turnover_prev': np.concatenate([previous_points[:, 1], before[gone, 1]]),
+        'turnover': np.concatenate([turnover, np.full(gone.sum(), np.nan)]),
+    })
+    deltas['d_change'] = deltas['change'] - deltas['change_prev']
+    deltas['d_turnover'] = deltas['turnover'] - deltas['turnover_prev']
+
+    return PanelDiff(
+        entered=tuple(symbols[~found]),
+        left=tuple(previous_symbols[gone]),
+        changed=tuple(symbols[moved]),
+        deltas=deltas,
+        previous_points=_freeze(previous_points),
+        left_points=_freeze(before[gone]),
+        left_colors=_freeze(np.asarray(previous.face_colors)[gone].reshape(-1, 4)),
+        changed_cells=diff_cells(previous, current),
+    )
+
+def match_rows(previous_keys, keys):
+    """Fila del array anterior con la misma clave que cada elemento de `keys` (-1 si no está)"""
+    index = pd.Index(previous_keys)
+    if index.is_unique:
+        return index.get_indexer(keys)
+    # Con claves repetidas se toma la primera aparición
+    first_rows = np.flatnonzero(~index.duplicated())
+    positions = pd.Index(np.asarray(previous_keys)[first_rows]).get_indexer(keys)
+    return np.where(positions >= 0, first_rows[positions], -1)
+
+def diff_cells(previous, current):
+    """Celdas de la tabla nueva cuyo texto cambió (las filas nuevas cuentan enteras)"""
+    if previous.headers != current.headers:
+        return None
+    headers = [header.lower() for header in current.headers]
+    column = next((headers.index(name) for name in ['symbol', 'ticker', 'simbolo'] if name in headers), None)
+    if column is None:
+        return None
+
+    matches = match_rows(previous.cells[:, column], current.cells[:, column])
+    found = matches >= 0
+
+    changed = np.ones(current.cells.shape, dtype=bool)
+    changed[found] = current.cells[found] != previous.cells[matches[found]]
+    return _freeze(changed)
+
+@dataclass(frozen=True)
+class BreadthStats:
+    """
+    Amplitud de mercado de un panel (o de todos juntos).
+
+    Se guardan sumas y no promedios para que los agregados de varios
+    paneles se combinen sumando campo a campo.
+    """
+    advancers: int
+    decliners: int
+    unchanged: int
+    turnover: float             # Volumen total
+    turnover_change: float      # Suma de volumen x variación
+    top_turnover: np.ndarray    # Los mayores volúmenes, de mayor a menor
+
+    @property
+    def weighted_change(self):
+        """Variación promedio ponderada por volumen, en % como `change` (NaN sin volumen)"""
+        return self.turnover_change / self.turnover if self.turnover else np.nan
+
+    @property
+    def top_share(self):
+        """Participación de los mayores volúmenes en el total (NaN sin volumen)"""
+        return self.top_turnover.sum() / self.turnover if self.turnover else np.nan
+
+def breadth_stats(plot_data, top=10):
+    """Agregados de amplitud de un panel a partir de su plot_data"""
+    change = plot_data['change'].to_numpy(dtype=float)
+    turnover = np.nan_to_num(plot_data['turnover'].to_numpy(dtype=float))
+    valid = ~np.isnan(change)
+    flat = valid & (np.abs(change) < 1e-9)
+    top_turnover = -np.sort(-turnover)[:top] if len(turnover) > top else -np.sort(-turnover)
+    return BreadthStats(
+        advancers=int((valid & ~flat & (change > 0)).sum()),
+        decliners=int((valid & ~flat & (change < 0)).sum()),
+        unchanged=int(flat.sum()),
+        turnover=float(turnover.sum()),
+        turnover_change=float(turnover[valid] @ change[valid]),
+        top_turnover=_freeze(top_turnover),
+    )
+
+class MarketBreadth:
+    """
+    Amplitud de mercado por panel y total, actualizada de a un panel.
+
+    Cada panel guarda sus agregados (conteos, sumas y sus mayores
+    volúmenes) y se recalcula solo cuando llega ese panel. El total combina
+    esos agregados, sin volver a recorrer las filas de los demás: los 10
+    mayores volúmenes del total siempre están entre los 10 mayores de cada
+    panel.
+    """
+
+    TOP = 10
+
+    def __init__(self):
+        self.panels = {}
+        self.total = None
+
+    def update(self, key, plot_data):
+        """Recalcular el panel `key` y el total; devuelve (agregados del panel, total)"""
+        self.panels[key] = breadth_stats(plot_data, self.TOP)
+        panels = list(self.panels.values())
+        top_turnover = np.concatenate([stats.top_turnover for stats in panels])
+        self.total = BreadthStats(
+            advancers=sum(stats.advancers for stats in panels),
+            decliners=sum(stats.decliners for stats in panels),
+            unchanged=sum(stats.unchanged for stats in panels),
+            turnover=sum(stats.turnover for stats in panels),
+            turnover_change=sum(stats.turnover_change for stats in panels),
+            top_turnover=_freeze(-np.sort(-top_turnover)[:self.TOP]),
+        )
+        return self.panels[key], self.total
+
+class Watchlist:
+    """
+    Lista de seguimiento con símbolos de cualquier panel.
+
+    Se arma cruzando los símbolos seguidos con el último DataFrame de cada
+    panel a través de un índice símbolo -> paneles, que se actualiza de a un
+    panel a medida que llegan. No pide nada al broker: solo reusa los
+    paneles ya descargados.
+    """
+
+    def __init__(self, symbols=(), panel_order=()):
+        self.symbols = list(dict.fromkeys(symbols))
+        # Prioridad de los paneles si un símbolo aparece en más de uno
+        self.panel_order = list(panel_order)
+        self.frames = {}
+        self.panel_symbols = {}
+        self.symbol_panels = {}
+
+    def update(self, key, data):
+        """Registrar la nueva versión de un panel; devuelve True si afecta a la watchlist"""
+        symbols = pd.Index([])
+        if data is not None and not data.empty and 'symbol' in data.columns:
+            symbols = pd.Index(data['symbol'].astype(str).unique())
+        previous = self.panel_symbols.get(key, pd.Index([]))
+        for symbol in previous.difference(symbols):
+            panels = self.symbol_panels[symbol]
+            panels.discard(key)
+            if not panels:
+                del self.symbol_panels[symbol]
+        for symbol in symbols.difference(previous):
+            self.symbol_panels.setdefault(symbol, set()).add(key)
+        self.panel_symbols[key] = symbols
+        self.frames[key] = data
+
+        watched = pd.Index(self.symbols)
+        return bool(len(watched.intersection(symbols)) or len(watched.intersection(previous)))
+
+    def source(self, symbol):
+        """Panel del que se toma el símbolo (None si no está en ninguno)"""
+        panels = self.symbol_panels.get(symbol)
+        if not panels:
+            return None
+        return min(panels, key=lambda key: self.panel_order.index(key) if key in self.panel_order else len(self.panel_order))
+
+    def missing(self):
+        """Símbolos seguidos que no aparecen en ningún panel descargado"""
+        return [symbol for symbol in self.symbols if symbol not in self.symbol_panels]
+
+    def add(self, symbol):
+        symbol = symbol.strip().upper()
+        if not symbol or symbol in self.symbols:
+            return False
+        self.symbols.append(symbol)
+        return True
+
+    def remove(self, symbol):
+        if symbol not in self.symbols:
+            return False
+        self.symbols.remove(symbol)
+        return True
+
+    def frame(self, titles=None):
+        """Filas de los símbolos seguidos, en el orden de la watchlist, con una columna 'panel'"""
+        by_panel = {}
+        for symbol in self.symbols:
+            panel = self.source(symbol)
+            if panel is not None:
+                by_panel.setdefault(panel, []).append(symbol)
+        parts = []
+        for panel, symbols in by_panel.items():
+            data = self.frames[panel]
+            rows = data[data['symbol'].astype(str).isin(symbols)]
+            parts.append(rows.assign(panel=(titles or {}).get(panel, panel)))
+        if not parts:
+            return pd.DataFrame()
+
+        frame = pd.concat(parts, ignore_index=True)
+        order = pd.Index(self.symbols).get_indexer(frame['symbol'].astype(str))
+        frame = frame.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+        return frame[['symbol', 'panel'] + [column for column in frame.columns if column not in ('symbol', 'panel')]]
+
+def load_watchlist(path):
+    """Símbolos guardados de la watchlist (lista vacía si no hay archivo o es inválido)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return [str(symbol).strip().upper() for symbol in json.load(f)]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Watchlist inválida en {path}: {e}")
+    return []
+
+def save_watchlist(path, symbols):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(list(symbols), f, indent=2)
+
+class SymbolIndex:
+    """
+    Índice de subcadenas de los símbolos de un panel.
+
+    Cada subcadena (en mayúsculas) apunta a los ids de los símbolos que la
+    contienen, donde el id es la posición en `symbols` (ordenados, igual que
+    PanelPayload.unique_symbols). Filtrar mientras se escribe es entonces una
+    consulta al diccionario, sin volver a recorrer los textos. Solo se
+    reconstruye cuando cambia el conjunto de símbolos del panel.
+    """
+
+    # Las búsquedas más largas se resuelven filtrando los candidatos de este largo
+    MAX_INDEXED_LENGTH = 8
+
+    def __init__(self, symbols):
+        self.symbols = tuple(symbols)
+        self.upper_symbols = [symbol.upper() for symbol in self.symbols]
+        substrings = {}
+        for symbol_id, symbol in enumerate(self.upper_symbols):
+            seen = set()
+            for start in range(len(symbol)):
+                for end in range(start + 1, min(len(symbol), start + self.MAX_INDEXED_LENGTH) + 1):
+                    seen.add(symbol[start:end])
+            for substring in seen:
+                substrings.setdefault(substring, []).append(symbol_id)
+        self.substrings = {substring: np.array(ids, dtype=np.int64) for substring, ids in substrings.items()}
+
+    def match(self, query, prefix_only=False):
+        """Ids de los símbolos que contienen (o empiezan con) la búsqueda"""
+        query = query.strip().upper()
+        if not query:
+            return np.arange(len(self.symbols))
+        ids = self.substrings.get(query[:self.MAX_INDEXED_LENGTH], np.empty(0, dtype=np.int64))
+        if prefix_only:
+            ids = ids[[self.upper_symbols[i].startswith(query) for i in ids]] if len(ids) else ids
+        elif len(query) > self.MAX_INDEXED_LENGTH and len(ids):
+            ids = ids[[query in self.upper_symbols[i] for i in ids]]
+        return ids
+
+    def mask(self, query, symbol_ranks, prefix_only=False):
+        """Máscara booleana por fila a partir de los rangos de símbolo de un payload"""
+        hits = np.zeros(len(self.symbols), dtype=bool)
+        hits[self.match(query, prefix_only)] = True
+        return hits[symbol_ranks]
+
+def format_turnover(x, pos=None):
+    """Formato del eje de volumen (K / M)"""
+    return f'{x/1e6:.1f}M' if x >= 1e6 else f'{x/1e3:.0f}K' if x >= 1000 else f'{x:.0f}'
+
+def render_bubble_chart(ax, df, title, empty_message='No hay datos disponibles', style=None):
+    """
+    Dibuja el gráfico de burbujas sobre un eje existente.
+
+    No depende de Qt, por lo que se usa tanto en el PlotWidget como al
+    exportar sobre un canvas Agg fuera de pantalla. `style` es el resultado
+    de compute_bubble_style; si no se pasa, se calcula aquí. Devuelve el
+    scatter creado, o None si no había datos para graficar.
+    """
+    ax.set_facecolor('#2d2d2d')
+
+    if df is None or df.empty:
+        ax.text(0.5, 0.5, empty_message,
+               ha='center', va='center', transform=ax.transAxes,
+               fontsize=16, color='white')
+        return None
+
+    df = df.reset_index(drop=True)
+    sizes, face_colors, label_mask, median = style if style is not None else compute_bubble_style(df)
+
+    # --- CORRECCIÓN ---
+    # Se crean listas explícitas para los bordes y anchos.
+    # Esto asegura que cada punto tenga su propia propiedad editable.
+    num_points = len(df)
+    edge_colors_list = ['white'] * num_points
+    linewidths_list = [1.5] * num_points
+
+    # Crear scatter plot
+    scatter = ax.scatter(
+        df['change'],
+        df['turnover'],
+        s=np.array(sizes),
+        c=np.array(face_colors),     # Colores de relleno precalculados
+        alpha=0.7,
+        edgecolors=edge_colors_list, # Se usa la lista de colores de borde
+        linewidth=linewidths_list    # Se usa la lista de anchos de borde
+    )
+
+    # Agregar etiquetas para puntos importantes
+    symbols = df['symbol'].to_numpy()
+    changes = df['change'].to_numpy()
+    turnovers = df['turnover'].to_numpy()
+    for idx in np.flatnonzero(label_mask):
+        ax.annotate(
+            symbols[idx],
+            (changes[idx], turnovers[idx]),
+            xytext=(5, 5),
+            textcoords='offset points',
+            fontsize=8,
+            color='white',
+            weight='regular'
+        )
+
+    # Configurar ejes
+    ax.set_xlabel('Variación Diaria (%)', fontsize=12, color='white')
+    ax.set_ylabel('Volumen Operado', fontsize=12, color='white')
+    ax.set_title(f'{title}\n(Click en tabla para resaltar símbolo)',
+                fontsize=14, color='white', pad=20)
+
+    # Formatear eje Y
+    ax.yaxis.set_major_formatter(FuncFormatter(format_turnover))
+
+    # Líneas de referencia
+    ax.axvline(x=0, color='white', linestyle='--', alpha=0.3)
+    if median is not None:
+        ax.axhline(y=median, color='yellow', linestyle='--', alpha=0.3)
+
+    # Grilla
+    ax.grid(True, alpha=0.3, color='white')
+
+    return scatter
+
+# Directorio de datos locales de la aplicación (caché, configuración)
+APP_DATA_DIR = os.path.join(os.path.expanduser('~'), '.volumen_merval')
+
+class SnapshotCache:
+    """
+    Última instantánea válida de cada panel, guardada en disco.
+
+    Cada panel se escribe en un archivo temporal que luego reemplaza al
+    anterior con os.replace, así un cierre a mitad de escritura nunca deja
+    un archivo corrupto. Al iniciar, la aplicación la usa para mostrar datos
+    de inmediato mientras llegan los del broker.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(APP_DATA_DIR, 'cache')
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def save(self, key, data, timestamp):
+        """Guardar de forma atómica el DataFrame filtrado de un panel"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{key}.", suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'timestamp': timestamp, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, key):
+        """Devuelve (DataFrame, timestamp) del panel, o None si no hay caché válida"""
+        try:
+            with open(self.path(key), 'rb') as f:
+                snapshot = pickle.load(f)
+            return snapshot['data'], snapshot['timestamp']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Caché de {key} inválida: {e}")
+            return None
+
+class SnapshotHistory:
+    """
+    Historial de la sesión para el scrubber: todas las actualizaciones de cada panel.
+
+    Cada panel guarda sus filas en segmentos columnares en disco (un archivo
+    por columna) mapeados en memoria con np.memmap, y una tabla de offsets
+    con (fila inicial, cantidad de filas, columnas, timestamp) por
+    actualización. Leer una actualización pasada son slices de esos arrays.
+    Los números se guardan como float64 (o int64 mientras sean enteros), las
+    fechas como int64 y los textos como códigos int32 sobre un vocabulario por
+    columna. Si una actualización trae valores que el tipo de la columna no
+    puede representar (decimales en una columna entera, números en una que
+    hasta ahora solo tuvo faltantes, textos en una numérica), la columna se
+    ensancha y se reescribe antes de agregarla, para no truncar nada.
+    """
+
+    INITIAL_ROWS = 4096
+    MISSING_INT = np.iinfo(np.int64).min
+    FILL = {'num': np.nan, 'int': MISSING_INT, 'time': MISSING_INT, 'cat': -1}
+    DTYPES = {'num': np.float64, 'int': np.int64, 'time': np.int64, 'cat': np.int32}
+
+    def __init__(self, directory=None):
+        self.temp_dir = None
+        if directory is None:
+            self.temp_dir = tempfile.TemporaryDirectory(prefix='volumen_merval_history_')
+            directory = self.temp_dir.name
+        self.directory = directory
+        self.panels = {}
+
+    def count(self, key):
+        panel = self.panels.get(key)
+        return len(panel['offsets']) if panel else 0
+
+    def timestamp(self, key, index):
+        return self.panels[key]['offsets'][index][3]
+
+    def append(self, key, data, timestamp):
+        """Agregar una actualización del panel al final de sus segmentos"""
+        if data is None or data.empty:
+            return
+        panel = self.panels.get(key)
+        if panel is None:
+            panel = self.panels[key] = {'rows': 0, 'capacity': 0, 'columns': {}, 'offsets': [], 'files': 0}
+        start, count = panel['rows'], len(data)
+        if start + count > panel['capacity']:
+            self.grow(key, panel, max(self.INITIAL_ROWS, 2 * (start + count)))
+
+        for name in data.columns:
+            series = data[name]
+            kind = self.series_kind(series)
+            column = panel['columns'].get(name)
+            if column is None:
+                column = self.add_column(key, panel, name, kind or 'cat')
+            elif self.wider_kind(column, kind) != column['kind']:
+                column = self.widen(key, panel, name, self.wider_kind(column, kind))
+            column['array'][start:start + count] = self.encode(column, series)
+        for name, column in panel['columns'].items():
+            if name not in data.columns:
+                column['array'][start:start + count] = self.FILL[column['kind']]
+
+        panel['rows'] += count
+        panel['offsets'].append((start, count, tuple(data.columns), timestamp))
+
+    def frame(self, key, index):
+        """Reconstruir el DataFrame de la actualización `index` del panel"""
+        panel = self.panels[key]
+        start, count, names, _ = panel['offsets'][index]
+        columns = {}
+        for name in names:
+            column = panel['columns'][name]
+            columns[name] = self.decode(column, column['array'][start:start + count])
+        return pd.DataFrame(columns, columns=list(names))
+
+    def decode(self, column, values):
+        if column['kind'] == 'num':
+            return np.array(values)
+        if column['kind'] == 'int':
+            missing = values == self.MISSING_INT
+            return np.where(missing, np.nan, values) if missing.any() else np.array(values)
+        if column['kind'] == 'time':
+            return np.array(values).view('datetime64[ns]')
+        # El código -1 cae en el None agregado al final del vocabulario
+        return column['lookup'][values]
+
+    def series_kind(self, series):
+        """Tipo de almacenamiento que necesita la serie (None si solo trae faltantes)"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'time'
+        if pd.api.types.is_bool_dtype(series):
+            return 'cat'
+        if pd.api.types.is_integer_dtype(series):
+            return 'int'
+        if pd.api.types.is_numeric_dtype(series):
+            return 'num'
+        present = series.dropna()
+        if present.empty:
+            return None
+        # Columnas object con números (p. ej. mezcla de int y float de la API)
+        if pd.to_numeric(present, errors='coerce').notna().all():
+            return 'num'
+        return 'cat'
+
+    def wider_kind(self, column, kind):
+        """Tipo de la columna que alcanza para sus valores actuales y los de `kind`"""
+        current = column['kind']
+        if kind is None or kind == current:
+            return current
+        if {current, kind} == {'int', 'num'}:
+            return 'num'
+        if current == 'cat' and not len(column['vocabulary']):
+            return kind  # Hasta ahora solo hubo faltantes
+        return 'cat'
+
+    def add_column(self, key, panel, name, kind):
+        column = {
+            'kind': kind,
+            'path': os.path.join(self.directory, f"{key}.{panel['files']}.bin"),
+            'vocabulary': pd.Index([], dtype=object),
+            'lookup': np.array([None], dtype=object),
+        }
+        panel['files'] += 1
+        column['array'] = np.memmap(column['path'], dtype=self.DTYPES[kind], mode='w+', shape=(panel['capacity'],))
+        column['array'][:panel['rows']] = self.FILL[kind]
+        panel['columns'][name] = column
+        return column
+
+    def widen(self, key, panel, name, kind):
+        """Reescribir la columna con un tipo más amplio conservando las filas ya grabadas"""
+        previous = panel['columns'][name]
+        values = pd.Series(self.decode(previous, previous['array'][:panel['rows']]))
+        column = self.add_column(key, panel, name, kind)
+        if panel['rows']:
+            column['array'][:panel['rows']] = self.encode(column, values)
+        previous['array'] = None
+        os.remove(previous['path'])
+        return column
+
+    def grow(self, key, panel, capacity):
+        """Agrandar los archivos de todas las columnas y volver a mapearlos"""
+        for column in panel['columns'].values():
+            column['array'].flush()
+            dtype = column['array'].dtype
+            del column['array']
+            with open(column['path'], 'r+b') as f:
+                f.truncate(capacity * dtype.itemsize)
+            column['array'] = np.memmap(column['path'], dtype=dtype, mode='r+', shape=(capacity,))
+        panel['capacity'] = capacity
+
+    def encode(self, column, series):
+        if column['kind'] == 'num':
+            return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+        if column['kind'] == 'int':
+            values = pd.to_numeric(series, errors='coerce')
+            return np.where(values.isna(), self.MISSING_INT, values.fillna(0)).astype(np.int64)
+        if column['kind'] == 'time':
+            return pd.to_datetime(series, errors='coerce').to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        missing = series.isna().to_numpy()
+        texts = series.astype(str).to_numpy(dtype=object)
+        codes = column['vocabulary'].get_indexer(texts)
+        new = (codes < 0) & ~missing
+        if new.any():
+            column['vocabulary'] = column['vocabulary'].append(pd.Index(pd.unique(texts[new]), dtype=object))
+            column['lookup'] = np.append(column['vocabulary'].to_numpy(dtype=object), None)
+            codes = column['vocabulary'].get_indexer(texts)
+        codes[missing] = -1
+        return codes
+
+    def close(self):
+        """Liberar los mapeos y borrar los archivos temporales"""
+        for panel in self.panels.values():
+            for column in panel['columns'].values():
+                column['array'] = None
+        self.panels = {}
+        if self.temp_dir is not None:
+            self.temp_dir.cleanup()
+            self.temp_dir = None
+
+# Tipos de regla de alerta: tipo -> (parámetro del umbral, ¿usa ventana?)
+ALERT_RULE_TYPES = {
+    'turnover_spike': ('factor', True),      # Volumen > factor x promedio de las últimas `window` actualizaciones
+    'change_cross': ('threshold', False),    # La variación cruza +threshold hacia arriba o -threshold hacia abajo
+    'operations_jump': ('min_jump', False),  # Las operaciones suben al menos min_jump desde la actualización anterior
+}
+
+# Reglas por defecto si no existe ~/.volumen_merval/alerts.json
+DEFAULT_ALERT_RULES = [
+    {'name': 'Volumen 3x su promedio', 'type': 'turnover_spike', 'factor': 3, 'window': 5},
+    {'name': 'Variación cruza ±4%', 'type': 'change_cross', 'threshold': 4},
+    {'name': 'Salto de operaciones', 'type': 'operations_jump', 'min_jump': 50},
+]
+
+@dataclass(frozen=True)
+class AlertRule:
+    """Regla de alerta ya validada (ver ALERT_RULE_TYPES)"""
+    name: str
+    kind: str
+    value: float
+    window: int = 1
+    panels: frozenset = None    # None: todos los paneles
+
+def compile_alert_rules(specs):
+    """
+    Validar las reglas leídas de JSON y convertirlas en AlertRule.
+
+    Los umbrales de variación están en las mismas unidades que la columna
+    `change` de SHDA, que ya viene en porcentaje (4 = 4%).
+    """
+    rules = []
+    for position, spec in enumerate(specs, 1):
+        kind = spec.get('type')
+        if kind not in ALERT_RULE_TYPES:
+            raise ValueError(f"Regla {position}: tipo desconocido {kind!r}")
+        parameter, uses_window = ALERT_RULE_TYPES[kind]
+        if parameter not in spec:
+            raise ValueError(f"Regla {position}: falta '{parameter}'")
+        window = int(spec.get('window', 5)) if uses_window else 1
+        if window < 1:
+            raise ValueError(f"Regla {position}: 'window' debe ser al menos 1")
+        panels = spec.get('panels')
+        rules.append(AlertRule(
+            name=str(spec.get('name', f"{kind} {spec[parameter]}")),
+            kind=kind,
+            value=float(spec[parameter]),
+            window=window,
+            panels=frozenset(panels) if panels else None,
+        ))
+    return rules
+
+def load_alert_rules(path):
+    """Reglas del archivo JSON del usuario; las por defecto si no existe o es inválido"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return compile_alert_rules(json.load(f))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Reglas de alerta inválidas en {path}: {e}")
+    return compile_alert_rules(DEFAULT_ALERT_RULES)
+
+@dataclass(frozen=True)
+class AlertHit:
+    """Símbolos que dispararon una regla en una actualización"""
+    rule: AlertRule
+    data_type: str
+    symbols: tuple
+
+class AlertEngine:
+    """
+    Evalúa las reglas de alerta sobre paneles completos con NumPy.
+
+    Las reglas se agrupan por tipo en arrays de umbrales al construir el
+    motor, así cada actualización es un puñado de operaciones (reglas x
+    símbolos) sin bucles por símbolo. Por panel solo se guarda, alineado
+    por símbolo, la variación y las operaciones anteriores, las últimas
+    `window` lecturas de volumen y qué reglas estaban activas (para avisar
+    solo cuando una regla se dispara, no mientras siga cumpliéndose).
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.kinds = np.array([rule.kind for rule in self.rules], dtype=object)
+        self.values = np.array([rule.value for rule in self.rules], dtype=float)
+        self.windows = np.array([rule.window for rule in self.rules], dtype=int)
+        self.history_length = int(self.windows[self.kinds == 'turnover_spike'].max(initial=0))
+        self.panel_rules = {}   # panel -> máscara de reglas que aplican
+        self.state = {}         # panel -> estado por símbolo
+        self.last_duration_ms = 0.0
+
+    def rules_for(self, data_type):
+        mask = self.panel_rules.get(data_type)
+        if mask is None:
+            mask = np.array([rule.panels is None or data_type in rule.panels for rule in self.rules], dtype=bool)
+            self.panel_rules[data_type] = mask
+        return mask
+
+    def evaluate(self, data_type, data):
+        """
+        Evaluar todas las reglas sobre un panel recién actualizado.
+
+        Devuelve (hits, row_mask): las reglas que se dispararon en esta
+        actualización y una máscara sobre las filas de `data` con los
+        símbolos que cumplen alguna regla.
+        """
+        started = time.perf_counter()
+        row_mask = np.zeros(len(data), dtype=bool)
+        if not self.rules or data is None or data.empty or 'symbol' not in data.columns:
+            return [], row_mask
+
+        symbols = data['symbol'].astype(str).to_numpy()
+        change = self.column(data, 'change')
+        turnover = self.column(data, 'turnover')
+        operations = self.column(data, 'operations')
+
+        # Estado anterior alineado a los símbolos actuales (-1: símbolo nuevo)
+        state = self.state.get(data_type)
+        if state is None:
+            positions = np.full(len(symbols), -1)
+        else:
+            # Con símbolos repetidos no hay alineación posible: se empieza de nuevo
+            positions = (state['symbols'].get_indexer(symbols) if state['symbols'].is_unique
+                         else np.full(len(symbols), -1))
+        known = positions >= 0
+
+        def previous(name, fill):
+            if state is None:
+                return np.full(len(symbols), fill)
+            return np.where(known, state[name][positions], fill)
+
+        prev_change = previous('change', np.nan)
+        prev_operations = previous('operations', np.nan)
+        prev_active = (np.where(known[None, :], state['active'][:, positions], False)
+                       if state is not None else np.zeros((len(self.rules), len(symbols)), dtype=bool))
+        history = (np.where(known[None, :], state['history'][:, positions], np.nan)
+                   if state is not None else np.full((self.history_length, len(symbols)), np.nan))
+
+        active = np.zeros((len(self.rules), len(symbols)), dtype=bool)
+        applies = self.rules_for(data_type)
+
+        # Volumen sobre su promedio de las últimas `window` lecturas (la fila 0 es la más reciente)
+        spike = applies & (self.kinds == 'turnover_spike')
+        if spike.any():
+            valid = ~np.isnan(history)
+            sums = np.cumsum(np.where(valid, history, 0.0), axis=0)
+            counts = np.cumsum(valid, axis=0)
+            rows = self.windows[spike] - 1
+            averages = sums[rows] / np.maximum(counts[rows], 1)
+            full = counts[rows] == self.windows[spike][:, None]
+            active[spike] = full & (turnover[None, :] > self.values[spike][:, None] * averages)
+
+        # Cruce de ±umbral (solo hacia afuera)
+        cross = applies & (self.kinds == 'change_cross')
+        if cross.any():
+            thresholds = self.values[cross][:, None]
+            with np.errstate(invalid='ignore'):
+                active[cross] = (((prev_change < thresholds) & (change >= thresholds)) |
+                                 ((prev_change > -thresholds) & (change <= -thresholds)))
+
+        # Salto de operaciones desde la actualización anterior
+        jump = applies & (self.kinds == 'operations_jump')
+        if jump.any():
+            with np.errstate(invalid='ignore'):
+                active[jump] = (operations - prev_operations)[None, :] >= self.values[jump][:, None]
+
+        # Guardar solo lo necesario para la próxima actualización
+        if self.history_length:
+            history = np.vstack([turnover[None, :], history[:-1]])
+        self.state[data_type] = {
+            'symbols': pd.Index(symbols),
+            'change': change,
+            'operations': operations,
+            'history': history,
+            'active': active,
+        }
+
+        fired = active & ~prev_active
+        hits = [AlertHit(self.rules[rule_idx], data_type, tuple(symbols[fired[rule_idx]]))
+                for rule_idx in np.flatnonzero(fired.any(axis=1))]
+        row_mask = active.any(axis=0)
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        return hits, row_mask
+
+    @staticmethod
+    def column(data, name):
+        if name not in data.columns:
+            return np.full(len(data), np.nan)
+        return pd.to_numeric(data[name], errors='coerce').to_numpy(dtype=float)
+
+# Paneles a obtener: (clave, método de SHDA, descripción para el estado)
+PANEL_FETCHERS = [
+    ('bluechips', 'get_bluechips', 'bluechips'),
+    ('bonds', 'get_bonds', 'bonos'),
+    ('cedears', 'get_cedear', 'CEDEARs'),
+    ('short_term_bonds', 'get_short_term_bonds', 'letras'),
+    ('galpones', 'get_galpones', 'Panel General'),
+]
+
+# Plazos de liquidación: etiqueta en la interfaz -> plazo de SHDA
+SETTLEMENTS = {
+    '24hs': '24hs',
+    'CI': 'spot',    # Contado inmediato
+}
+
+class WorkerCancelled(Exception):
+    """Se lanza dentro del worker cuando se pidió detenerlo"""
+
+def backoff_delay(attempt, base=1.0, cap=15.0):
+    """Espera exponencial con jitter completo para el reintento número `attempt`"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def run_in_daemon_thread(fn, *args):
+    """
+    Ejecuta fn en un hilo daemon y devuelve un Future con el resultado.
+
+    A diferencia de un ThreadPoolExecutor, un llamado colgado puede
+    abandonarse sin bloquear el cierre de la aplicación.
+    """
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:  # SHDA llama a exit() ante errores HTTP
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+class CircuitBreaker:
+    """
+    Circuit breaker por panel.
+
+    Tras `failure_threshold` actualizaciones fallidas seguidas el circuito se
+    abre y el panel no se vuelve a pedir hasta que pasen `reset_timeout`
+    segundos; entonces se permite un único intento de prueba (semiabierto) y
+    el resto se rechaza hasta saber cómo terminó.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=180.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        """Indica si se puede pedir el panel ahora (semiabierto: solo la prueba)"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probe_in_flight or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+    def release_probe(self):
+        """La prueba se canceló sin resultado: otro pedido puede intentarla"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def remaining_open_time(self):
+        """Segundos que faltan para volver a intentar (0 si está cerrado)"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+# Costo en tokens de cada endpoint de SHDA (el resto cuesta DEFAULT_ENDPOINT_COST)
+ENDPOINT_COSTS = {
+    'login': 3.0,
+    'get_cedear': 2.0,   # El panel más grande
+}
+DEFAULT_ENDPOINT_COST = 1.0
+
+class RequestScheduler:
+    """
+    Planificador compartido de los llamados a SHDA (token bucket).
+
+    Todos los llamados al broker pasan por aquí, vengan de una actualización
+    manual, del timer o de cualquier otro worker. El balde se recarga a
+    `rate` tokens por segundo hasta `burst`, y cada endpoint consume su
+    costo de ENDPOINT_COSTS. Entre los pedidos en cola se despacha primero
+    el del panel en pantalla (`focus`), y un pedido con la misma clave que
+    uno en curso o en cola no se repite: se comparte su Future.
+    """
+
+    WAIT_SAMPLES = 200
+
+    def __init__(self, rate=3.0, burst=12.0, costs=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.costs = dict(ENDPOINT_COSTS if costs is None else costs)
+        self.clock = clock
+        self.tokens = burst
+        self.refilled_at = clock()
+        self.focus = None
+        self.condition = threading.Condition()
+        self.queue = []
+        self.requests = {}      # clave -> pedido en cola o en curso
+        self.sequence = 0
+        self.dispatcher = None
+
+        # Métricas
+        self.wait_times = deque(maxlen=self.WAIT_SAMPLES)
+        self.max_queue_depth = 0
+        self.dispatched = 0
+        self.merged = 0
+
+    def cost(self, endpoint):
+        # Un costo mayor al balde nunca se podría pagar
+        return min(self.costs.get(endpoint, DEFAULT_ENDPOINT_COST), self.burst)
+
+    def submit(self, key, endpoint, fn, *args, panel=None):
+        """
+        Encolar un llamado y devolver su Future.
+
+        El Future pasa a "running" recién cuando el llamado sale de la cola,
+        así quien espera puede medir su timeout desde ese momento.
+        """
+        with self.condition:
+            request = self.requests.get(key)
+            if request is not None:
+                request['waiters'] += 1
+                self.merged += 1
+                return request['future']
+
+            self.sequence += 1
+            request = {
+                'key': key, 'future': Future(), 'fn': fn, 'args': args,
+                'cost': self.cost(endpoint), 'panel': panel,
+                'sequence': self.sequence, 'enqueued_at': self.clock(), 'waiters': 1,
+            }
+            self.requests[key] = request
+            self.queue.append(request)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self.dispatch_loop, daemon=True)
+                self.dispatcher.start()
+            self.condition.notify()
+            return request['future']
+
+    def abandon(self, key, forget=False):
+        """
+        Quien esperaba el pedido ya no lo necesita.
+
+        Si nadie más lo espera y sigue en cola, se descarta. Con forget=True
+        (p. ej. tras un timeout) un pedido en curso deja de compartirse, para
+        que el reintento haga un llamado nuevo en vez de esperar al colgado.
+        """
+        with self.condition:
+            request = self.requests.get(key)
+            if request is None:
+                return
+            request['waiters'] -= 1
+            if request in self.queue:
+                if request['waiters'] <= 0:
+                    self.queue.remove(request)
+                    del self.requests[key]
+                    request['future'].cancel()
+            elif forget:
+                del self.requests[key]
+
+    def set_focus(self, panel):
+        """Dar prioridad a los pedidos del panel en pantalla"""
+        with self.condition:
+            self.focus = panel
+            # El despachador puede estar esperando tokens para otro pedido
+            self.condition.notify()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def dispatch_loop(self):
+        """Hilo despachador: saca pedidos de la cola a medida que alcanzan los tokens"""
+        while True:
+            with self.condition:
+                while True:
+                    if not self.queue:
+                        self.condition.wait()
+                        continue
+                    request = min(self.queue, key=lambda r: (r['panel'] != self.focus, r['sequence']))
+                    self.refill()
+                    if self.tokens >= request['cost']:
+                        break
+                    self.condition.wait((request['cost'] - self.tokens) / self.rate)
+
+                self.tokens -= request['cost']
+                self.queue.remove(request)
+                if not request['future'].set_running_or_notify_cancel():
+                    del self.requests[request['key']]
+                    continue
+                self.wait_times.append(self.clock() - request['enqueued_at'])
+                self.dispatched += 1
+
+            threading.Thread(target=self.execute, args=(request,), daemon=True).start()
+
+    def execute(self, request):
+        try:
+            result = request['fn'](*request['args'])
+        except BaseException as e:  # SHDA llama a exit() ante errores HTTP
+            self.finish(request)
+            request['future'].set_exception(e)
+        else:
+            self.finish(request)
+            request['future'].set_result(result)
+
+    def finish(self, request):
+        with self.condition:
+            # Puede haber sido olvidado y reemplazado por un pedido nuevo con la misma clave
+            if self.requests.get(request['key']) is request:
+                del self.requests[request['key']]
+
+    def metrics(self):
+        """Profundidad de la cola, pedidos en curso y tiempos de espera en cola (segundos)"""
+        with self.condition:
+            self.refill()
+            waits = sorted(self.wait_times)
+            queued = len(self.queue)
+            return {
+                'queue_depth': queued,
+                'in_flight': len(self.requests) - queued,
+                'max_queue_depth': self.max_queue_depth,
+                'dispatched': self.dispatched,
+                'merged': self.merged,
+                'tokens': self.tokens,
+                'wait_mean': sum(waits) / len(waits) if waits else 0.0,
+                'wait_p95': waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                'wait_max': waits[-1] if waits else 0.0,
+            }
 
 class SHDADataWorker(QThread):
     """Worker thread para obtener datos de SHDA"""
 
-    # Señales para cada tipo de instrumento
+    # Señales para cada tipo de instrumento (emiten un PanelPayload ya procesado)
     bluechips_updated = pyqtSignal(object)
     bonds_updated = pyqtSignal(object)
     cedears_updated = pyqtSignal(object)
@@ -31,127 +1399,1908 @@ class SHDADataWorker(QThread):
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int)
 
-    def __init__(self, host, dni, user, password, comitente):
+    # Intervalo con el que se revisa la cancelación mientras se espera a SHDA
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, host, dni, user, password, comitente, breakers=None,
+                 panel_timeout=20.0, login_timeout=30.0, max_retries=2, cache=None,
+                 settlements=('24hs',), client_factory=None, scheduler=None, session=None):
         super().__init__()
         self.host = 123
         self.dni = "12345678"
         self.user = "nnnnnnnnn"
         self.password = "xxxxxxxxx"
         self.comitente = 12345
-        self.hb = None
+        # Sesión ya logueada para reutilizar (collector); None para loguearse.
+        # Al terminar queda la sesión usada, o None si dejó de servir
+        self.hb = session
+        # Resultado (True/False) de cada pedido de panel de la actualización
+        self.panel_results = []
         self.is_running = True
+        self.stop_event = threading.Event()
+
+        # Los breakers los mantiene la aplicación para que sobrevivan entre actualizaciones
+        self.breakers = breakers if breakers is not None else {}
+        # Igual el planificador: es el que coordina todos los llamados al broker
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.panel_timeout = panel_timeout
+        self.login_timeout = login_timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        # Fábrica de la sesión con el broker (reemplazable, p. ej. por FakeSHDAClient)
+        self.client_factory = client_factory or SHDA.SHDA
+        # El primer plazo es el que se muestra en cada panel
+        self.settlements = [settlement for settlement in settlements if settlement in SETTLEMENTS] or ['24hs']
 
     def run(self):
         """Ejecutar obtención de datos"""
         try:
             self.connect_and_fetch_data()
+        except WorkerCancelled:
+            self.status_updated.emit("Actualización cancelada")
         except Exception as e:
             self.error_occurred.emit(f"Error en worker: {str(e)}")
             print(f"Error detallado: {traceback.format_exc()}")
 
+    def call_with_timeout(self, request, fn, *args, timeout):
+        """
+        Ejecutar un llamado bloqueante a través del planificador, con timeout y atento a la cancelación.
+
+        `request` es (clave, endpoint, panel); el timeout corre desde que el
+        llamado sale de la cola del planificador.
+        """
+        key, endpoint, panel = request
+        future = self.scheduler.submit(key, endpoint, fn, *args, panel=panel)
+        deadline = None
+        while True:
+            if self.stop_event.is_set():
+                self.scheduler.abandon(key)
+                raise WorkerCancelled()
+            if deadline is None and (future.running() or future.done()):
+                deadline = time.monotonic() + timeout
+            remaining = deadline - time.monotonic() if deadline is not None else self.POLL_INTERVAL
+            if remaining <= 0:
+                self.scheduler.abandon(key, forget=True)
+                raise TimeoutError(f"sin respuesta tras {timeout:g}s")
+            done, _ = wait([future], timeout=min(self.POLL_INTERVAL, remaining))
+            if done:
+                return future.result()
+
+    def call_with_retries(self, description, request, fn, *args, timeout):
+        """Llamar con timeout, reintentando con espera exponencial con jitter"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.call_with_timeout(request, fn, *args, timeout=timeout)
+            except WorkerCancelled:
+                raise
+            except (Exception, SystemExit) as e:
+                print(f"Error obteniendo {description} (intento {attempt + 1}): {str(e) or type(e).__name__}")
+                if attempt == self.max_retries:
+                    raise RuntimeError(str(e) or type(e).__name__) from e
+                self.status_updated.emit(f"Reintentando {description}...")
+                if self.stop_event.wait(backoff_delay(attempt)):
+                    raise WorkerCancelled()
+
     def connect_and_fetch_data(self):
         """Conectar a SHDA y obtener todos los datos"""
         try:
-            self.status_updated.emit("Conectando a SHDA...")
-            self.progress_updated.emit(10)
+            reused = self.hb is not None
+            if not reused:
+                self.status_updated.emit("Conectando a SHDA...")
+                self.progress_updated.emit(10)
+                self.login()
+
+            self.status_updated.emit("Conectado. Obteniendo datos...")
+            self.progress_updated.emit(20)
+
+            self.fetch_all_panels()
+            if reused and self.panel_results and not any(self.panel_results):
+                # Con la sesión reutilizada fallaron todos los paneles: probablemente venció
+                self.status_updated.emit("La sesión no responde, volviendo a loguear...")
+                self.hb = None
+                self.login()
+                self.fetch_all_panels()
+
+            self.progress_updated.emit(100)
+            self.status_updated.emit(f"Datos actualizados - {datetime.now().strftime('%H:%M:%S')}")
+
+        except WorkerCancelled:
+            raise
+        except Exception as e:
+            self.error_occurred.emit(f"Error conectando: {str(e)}")
+            print(f"Error detallado en conexión: {traceback.format_exc()}")
+
+    def login(self):
+        """Crear la sesión con SHDA, con reintentos y su propio circuit breaker"""
+        breaker = self.breakers.setdefault(('login',), CircuitBreaker())
+        if not breaker.allow_request():
+            raise RuntimeError(f"login omitido: circuito abierto "
+                               f"({breaker.remaining_open_time():.0f}s para reintentar)")
+        try:
+            self.hb = self.call_with_retries(
+                "conexión", (('login',), 'login', None), self.client_factory, self.host, self.dni, self.user, self.password,
+                timeout=self.login_timeout)
+        except WorkerCancelled:
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+
+    def fetch_all_panels(self):
+        """
+        Pedir todos los paneles en todos los plazos a la vez sobre la misma sesión.
+
+        Cada panel se procesa y se emite apenas llegan todos sus plazos, así
+        sumar un plazo no duplica la latencia de la actualización.
+        """
+        pending = {}
+        self.panel_results = []
+        for key, method, description in PANEL_FETCHERS:
+            for settlement in self.settlements:
+                pending[(key, settlement)] = run_in_daemon_thread(
+                    self.fetch_panel, key, method, description, settlement)
+
+        frames = {key: {} for key, _, _ in PANEL_FETCHERS}
+        remaining_terms = {key: len(self.settlements) for key in frames}
+        completed_panels = 0
+        while pending:
+            if self.stop_event.is_set():
+                raise WorkerCancelled()
+            wait(list(pending.values()), timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for (key, settlement), future in list(pending.items()):
+                if not future.done():
+                    continue
+                del pending[(key, settlement)]
+                data = future.result()  # WorkerCancelled se propaga
+                if data is not None and not data.empty:
+                    frames[key][settlement] = data
+                remaining_terms[key] -= 1
+                if remaining_terms[key] == 0:
+                    self.publish_panel(key, frames.pop(key))
+                    completed_panels += 1
+                    self.progress_updated.emit(20 + 70 * completed_panels // len(PANEL_FETCHERS))
+
+    def fetch_panel(self, key, method, description, settlement):
+        """Obtener un panel en un plazo respetando su circuit breaker"""
+        description = f"{description} ({settlement})" if len(self.settlements) > 1 else description
+        breaker = self.breakers.setdefault((key, settlement), CircuitBreaker())
+        if not breaker.allow_request():
+            print(f"Panel {description} omitido: circuito abierto "
+                  f"({breaker.remaining_open_time():.0f}s para reintentar)")
+            return None
+
+        try:
+            self.status_updated.emit(f"Obteniendo {description}...")
+            data = self.call_with_retries(description, (('panel', key, settlement), method, key),
+                                          getattr(self.hb, method), SETTLEMENTS[settlement],
+                                          timeout=self.panel_timeout)
+        except WorkerCancelled:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            self.panel_results.append(False)
+            print(f"Error obteniendo {description}: {e}")
+            return None
+
+        breaker.record_success()
+        self.panel_results.append(True)
+        if data is not None and not data.empty:
+            print(f"{description} obtenidos: {len(data)} registros")
+        return data
+
+    def publish_panel(self, key, frames):
+        """Procesar una sola vez todos los plazos de un panel y emitir el payload"""
+        if not frames:
+            return
+        primary = next((settlement for settlement in self.settlements if settlement in frames), None)
+        data = pd.concat([df.assign(settlement=settlement) for settlement, df in frames.items()],
+                         ignore_index=True)
+        payload = build_panel_payload(key, data, primary_settlement=primary)
+        getattr(self, f"{key}_updated").emit(payload)
+        self.save_snapshot(key, payload)
+
+    def save_snapshot(self, key, payload):
+        """Guardar el panel en la caché en disco (desde el hilo del worker)"""
+        if self.cache is None or payload.data.empty:
+            return
+        try:
+            self.cache.save(key, payload.data, payload.timestamp)
+        except Exception as e:
+            print(f"Error guardando caché de {key}: {e}")
+
+    def stop(self):
+        """Detener worker, interrumpiendo las esperas en curso"""
+        self.is_running = False
+        self.stop_event.set()
+        self.quit()
+
+# Dirección local por defecto del collector (ver PanelCollector)
+COLLECTOR_ADDRESS = ('127.0.0.1', 47820)
+# Variable de entorno con la ruta del archivo de clave del collector
+COLLECTOR_KEY_ENV = 'VOLUMEN_MERVAL_COLLECTOR_KEY'
+
+def parse_collector_address(text):
+    """'host:puerto', ':puerto' o 'puerto' -> (host, puerto), con localhost por defecto"""
+    host, _, port = str(text).rpartition(':')
+    return (host or COLLECTOR_ADDRESS[0], int(port))
+
+def collector_authkey(directory=None, path=None):
+    """
+    Clave compartida entre el collector y sus clientes.
+
+    Se genera al azar la primera vez y queda en el directorio de datos de la
+    aplicación, legible solo por el usuario: cualquier proceso del mismo
+    usuario puede conectarse, los demás no. Para compartirla entre cuentas,
+    `path` (o la variable COLLECTOR_KEY_ENV) indica otro archivo.
+    """
+    path = path or os.environ.get(COLLECTOR_KEY_ENV) or os.path.join(directory or APP_DATA_DIR, 'collector.key')
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    key = os.urandom(32)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Otro proceso la creó al mismo tiempo
+        with open(path, 'rb') as f:
+            return f.read()
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+def panel_delta(previous, current):
+    """
+    Delta entre dos instantáneas de un panel, alineadas por símbolo.
+
+    Devuelve (origen, filas): para cada fila de `current`, la fila de
+    `previous` con el mismo símbolo (-1 si es nuevo), y las posiciones de
+    las filas nuevas o con algún valor distinto. Devuelve None si no
+    conviene un delta (cambiaron columnas o tipos, o no queda nada por
+    reusar): en ese caso se manda la instantánea completa.
+    """
+    if (previous is None or previous.empty or 'symbol' not in current.columns
+            or list(previous.columns) != list(current.columns)
+            or list(previous.dtypes) != list(current.dtypes)):
+        return None
+    source = match_rows(previous['symbol'].to_numpy(), current['symbol'].to_numpy())
+    found = source >= 0
+    if not found.any():
+        return None
+
+    aligned = np.maximum(source, 0)
+    same = found.copy()
+    for column in current.columns:
+        before = previous[column].to_numpy()[aligned]
+        after = current[column].to_numpy()
+        same &= (before == after) | (pd.isna(before) & pd.isna(after))
+    return source, np.flatnonzero(~same)
+
+def apply_panel_delta(previous, source, rows, changed):
+    """Reconstruir la instantánea nueva a partir de la anterior y un delta de panel_delta"""
+    data = previous.iloc[np.maximum(source, 0)].reset_index(drop=True)
+    for column in data.columns:
+        values = data[column].to_numpy(copy=True)
+        values[rows] = changed[column].to_numpy()
+        data[column] = values
+    return data
+
+@dataclass(frozen=True)
+class PanelUpdate:
+    """Estado de un panel recibido del collector, con la instantánea ya reconstruida"""
+    key: str
+    data: object                # DataFrame filtrado del plazo principal
+    settlement_view: object     # Comparación entre plazos (DataFrame) o None
+    timestamp: datetime
+    stale: bool
+    changed_rows: object        # Filas nuevas o cambiadas si llegó como delta; None si fue una instantánea
+
+    def payload(self):
+        """PanelPayload listo para mostrar"""
+        payload = build_panel_payload(self.key, self.data, timestamp=self.timestamp, stale=self.stale)
+        if self.settlement_view is not None:
+            payload = replace(payload, settlement_table=build_table_payload(
+                self.key, self.settlement_view, self.timestamp))
+        return payload
+
+class CollectorChannel:
+    """
+    Conexión del collector con un cliente.
+
+    Cada cliente tiene su propia cola y su propio hilo de envío, así un
+    cliente lento no frena a los demás. Si la cola se llena, se lo
+    desconecta: al reconectarse recibe otra vez el estado completo.
+    """
+
+    def __init__(self, conn, max_pending, on_close):
+        self.conn = conn
+        self.max_pending = max_pending
+        self.on_close = on_close
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def start(self):
+        threading.Thread(target=self.send_loop, daemon=True).start()
+
+    def put(self, blob):
+        """Encolar un mensaje ya serializado"""
+        with self.condition:
+            if self.closed:
+                return
+            if len(self.pending) >= self.max_pending:
+                print(f"Cliente del collector desconectado: {len(self.pending)} mensajes sin leer")
+                self.closed = True
+            else:
+                self.pending.append(blob)
+            self.condition.notify()
+
+    def send_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    break
+                blob = self.pending.popleft()
+            try:
+                self.conn.send_bytes(blob)
+            except (OSError, EOFError, ValueError):
+                break
+        self.close()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.on_close(self)
+
+class PanelCollector:
+    """
+    Recolector: una sola sesión con SHDA que atiende a muchos visores locales.
+
+    Es dueño del login, del planificador de llamados y del ciclo de
+    actualización (usa el mismo SHDADataWorker que la aplicación). La sesión
+    con SHDA se conserva entre actualizaciones: el worker solo vuelve a
+    loguearse si la sesión deja de responder (con los reintentos y el
+    circuit breaker de login de siempre). Publica
+    cada panel procesado por un socket local de multiprocessing.connection
+    autenticado con collector_authkey. Cada cliente recibe al conectarse la
+    última instantánea de todos los paneles y después, por panel, solo las
+    filas nuevas o que cambiaron (ver panel_delta), o la instantánea
+    completa si cambiaron las columnas. Cada mensaje se serializa una sola
+    vez para todos los clientes.
+    """
+
+    # Mensajes sin leer por cliente antes de desconectarlo por lento
+    MAX_PENDING = 64
+
+    def __init__(self, address=COLLECTOR_ADDRESS, authkey=None, interval=180.0, settlements=('24hs',),
+                 client_factory=None, data_dir=None):
+        self.address = address
+        self.authkey = authkey if authkey is not None else collector_authkey(data_dir)
+        self.interval = interval
+        self.settlements = list(settlements)
+        self.client_factory = client_factory
+        self.scheduler = RequestScheduler()
+        self.breakers = {}
+        self.cache = SnapshotCache(os.path.join(data_dir, 'cache') if data_dir else None)
+        self.worker = None
+        # Sesión con SHDA que se reutiliza entre actualizaciones (None: loguearse)
+        self.session = None
+        self.listener = None
+
+        # Último estado de cada panel: (datos, comparación de plazos, timestamp, stale)
+        self.state = {}
+        # Instantáneas ya serializadas para los clientes nuevos (se invalidan al actualizar)
+        self.snapshot_blobs = {}
+        self.channels = []
+        self.lock = threading.Lock()
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.fetch)
+
+    def start(self):
+        """Abrir el socket, publicar la caché en disco y empezar el ciclo de actualización"""
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        print(f"Collector escuchando en {self.address[0]}:{self.address[1]}")
+
+        for key, _, _ in PANEL_FETCHERS:
+            snapshot = self.cache.load(key)
+            if snapshot is not None:
+                data, timestamp = snapshot
+                self.publish(key, build_panel_payload(key, data, timestamp=timestamp, stale=True))
+
+        self.fetch()
+        self.timer.start(int(self.interval * 1000))
+
+    def fetch(self):
+        """Lanzar una actualización de todos los paneles (si no hay una en curso)"""
+        if self.worker and self.worker.isRunning():
+            return
+        if self.worker is not None:
+            self.session = self.worker.hb
+        self.worker = SHDADataWorker(None, None, None, None, None, breakers=self.breakers,
+                                     cache=self.cache, settlements=self.settlements,
+                                     client_factory=self.client_factory, scheduler=self.scheduler,
+                                     session=self.session)
+        for key, _, _ in PANEL_FETCHERS:
+            getattr(self.worker, f"{key}_updated").connect(lambda payload, key=key: self.publish(key, payload))
+        self.worker.status_updated.connect(self.publish_status)
+        self.worker.error_occurred.connect(self.publish_status)
+        self.worker.start()
+
+    def publish(self, key, payload):
+        """Mandar a todos los clientes el delta (o la instantánea) del panel"""
+        data = payload.data.reset_index(drop=True)
+        view = payload.settlement_table.data if payload.settlement_table is not None else None
+        with self.lock:
+            previous = self.state.get(key)
+        delta = panel_delta(previous[0], data) if previous is not None else None
+        if delta is None:
+            message = ('snapshot', key, payload.timestamp, payload.stale, data, view)
+        else:
+            source, rows = delta
+            message = ('delta', key, payload.timestamp, payload.stale, (source, rows, data.iloc[rows]), view)
+        blob = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self.lock:
+            self.state[key] = (data, view, payload.timestamp, payload.stale)
+            self.snapshot_blobs.pop(key, None)
+            for channel in self.channels:
+                channel.put(blob)
+
+    def publish_status(self, message):
+        print(message)
+        blob = pickle.dumps(('status', message), protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            for channel in self.channels:
+                channel.put(blob)
+
+    def accept_loop(self):
+        """Aceptar clientes y mandarles el estado actual antes que cualquier delta"""
+        listener = self.listener  # close() lo pone en None
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                print("Cliente del collector rechazado: clave incorrecta")
+                continue
+            except (OSError, EOFError):
+                if self.listener is None:
+                    return
+                continue
+
+            channel = CollectorChannel(conn, self.MAX_PENDING, self.remove_channel)
+            with self.lock:
+                for key in self.state:
+                    if key not in self.snapshot_blobs:
+                        data, view, timestamp, stale = self.state[key]
+                        self.snapshot_blobs[key] = pickle.dumps(
+                            ('snapshot', key, timestamp, stale, data, view), protocol=pickle.HIGHEST_PROTOCOL)
+                    channel.put(self.snapshot_blobs[key])
+                self.channels.append(channel)
+                print(f"Cliente del collector conectado ({len(self.channels)} en total)")
+            channel.start()
+
+    def remove_channel(self, channel):
+        with self.lock:
+            if channel in self.channels:
+                self.channels.remove(channel)
+                print(f"Cliente del collector desconectado ({len(self.channels)} en total)")
+
+    def close(self):
+        """Detener el ciclo de actualización y desconectar a los clientes"""
+        self.timer.stop()
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.close()
+        with self.lock:
+            channels = list(self.channels)
+        for channel in channels:
+            channel.close()
+
+class CollectorSubscription:
+    """Lado cliente del collector: reconstruye cada panel aplicando instantáneas y deltas"""
+
+    def __init__(self, address=COLLECTOR_ADDRESS, authkey=None):
+        self.conn = Client(address, authkey=authkey if authkey is not None else collector_authkey())
+        self.frames = {}
+
+    def receive(self, timeout):
+        """
+        Esperar el próximo mensaje hasta `timeout` segundos.
+
+        Devuelve un PanelUpdate, un texto de estado del collector o None si no
+        llegó nada. Lanza EOFError/OSError si se cortó la conexión.
+        """
+        if not self.conn.poll(timeout):
+            return None
+        message = pickle.loads(self.conn.recv_bytes())
+        if message[0] == 'status':
+            return message[1]
+
+        kind, key, timestamp, stale, body, view = message
+        rows = None
+        if kind == 'snapshot':
+            data = body
+        else:
+            source, rows, changed = body
+            data = apply_panel_delta(self.frames[key], source, rows, changed)
+        self.frames[key] = data
+        return PanelUpdate(key, data, view, timestamp, stale, rows)
+
+    def close(self):
+        self.conn.close()
+
+class CollectorClientWorker(QThread):
+    """
+    Worker que recibe los paneles de un collector en lugar de pedirlos a SHDA.
+
+    Emite las mismas señales que SHDADataWorker; la conexión queda abierta y
+    se reintenta con espera exponencial si se corta.
+    """
+
+    bluechips_updated = pyqtSignal(object)
+    bonds_updated = pyqtSignal(object)
+    cedears_updated = pyqtSignal(object)
+    short_term_bonds_updated = pyqtSignal(object)
+    galpones_updated = pyqtSignal(object)
+
+    status_updated = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+    progress_updated = pyqtSignal(int)
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, address, authkey):
+        super().__init__()
+        self.address = address
+        self.authkey = authkey
+        self.stop_event = threading.Event()
+
+    def run(self):
+        host, port = self.address
+        attempt = 0
+        while not self.stop_event.is_set():
+            try:
+                subscription = CollectorSubscription(self.address, self.authkey)
+            except AuthenticationError:
+                self.error_occurred.emit(f"El collector en {host}:{port} rechazó la clave de conexión")
+                return
+            except (EOFError, OSError):
+                self.status_updated.emit(f"Sin conexión con el collector en {host}:{port}; reintentando...")
+                self.stop_event.wait(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            attempt = 0
+            self.status_updated.emit(f"Conectado al collector en {host}:{port}")
+            try:
+                while not self.stop_event.is_set():
+                    update = subscription.receive(self.POLL_INTERVAL)
+                    if isinstance(update, PanelUpdate):
+                        getattr(self, f"{update.key}_updated").emit(update.payload())
+                    elif update is not None:
+                        self.status_updated.emit(update)
+            except (EOFError, OSError):
+                self.status_updated.emit("Se cortó la conexión con el collector; reconectando...")
+            except Exception as e:
+                print(f"Error recibiendo datos del collector: {traceback.format_exc()}")
+                self.error_occurred.emit(f"Error recibiendo datos del collector: {e}")
+            finally:
+                subscription.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.quit()
+
+# Figura reutilizada por cada proceso del pool de renderizado
+_render_figure = None
+
+def _init_render_process(figsize, dpi):
+    """Inicializa un proceso del pool: backend Agg, tema oscuro y una figura propia"""
+    global _render_figure
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    matplotlib.style.use('dark_background')
+    _render_figure = Figure(figsize=figsize, dpi=dpi, facecolor='#1e1e1e')
+    FigureCanvasAgg(_render_figure)
+
+def _draw_chart_job(figure, job):
+    """
+    Dibuja un trabajo (título, DataFrame, ruta, formato) en `figure`.
+
+    Si el trabajo trae ruta guarda el archivo y la devuelve; si no, devuelve
+    la figura lista para agregarla como página de un PDF.
+    """
+    title, data, path, fmt = job
+    figure.clear()
+    ax = figure.add_subplot(111)
+    render_bubble_chart(ax, prepare_plot_data(data) if data is not None and not data.empty else None, title)
+    figure.tight_layout()
+    if path is not None:
+        figure.savefig(path, format=fmt, facecolor=figure.get_facecolor())
+        return path
+    return figure
+
+def _render_chart_job(job):
+    """
+    Trabajo de un proceso del pool, sobre la figura del proceso.
+
+    Las páginas de PDF vuelven como figura serializada, para que el proceso
+    principal las escriba en vectorial con PdfPages.savefig.
+    """
+    result = _draw_chart_job(_render_figure, job)
+    return result if isinstance(result, str) else pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+
+class BatchChartRenderer:
+    """
+    Renderiza muchos gráficos de burbujas en paralelo con un pool de procesos.
+
+    Cada proceso usa el backend Agg y reutiliza una figura preconfigurada con
+    el mismo estilo que el PlotWidget (render_bubble_chart). Los trabajos son
+    tuplas (nombre, título, DataFrame); el rendimiento escala con la cantidad
+    de núcleos. Con pocos trabajos se renderiza en el mismo proceso: arrancar
+    el pool ('spawn' vuelve a importar PyQt5 y matplotlib en cada proceso)
+    cuesta más que unos pocos gráficos. El pool se conserva hasta shutdown(),
+    así varias tandas del mismo renderer (p. ej. PNG y PDF del historial)
+    lo arrancan una sola vez.
+    """
+
+    # Cantidad mínima de trabajos para usar el pool de procesos
+    PARALLEL_MIN_JOBS = 16
+
+    def __init__(self, max_workers=None, figsize=(12, 8), dpi=100):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.figsize = figsize
+        self.dpi = dpi
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def get_executor(self):
+        if self.executor is None:
+            # 'spawn' evita heredar el estado de Qt del proceso principal
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_render_process,
+                initargs=(self.figsize, self.dpi))
+        return self.executor
+
+    def shutdown(self, cancel=False):
+        if self.executor is not None:
+            self.executor.shutdown(wait=not cancel, cancel_futures=cancel)
+            self.executor = None
+
+    def _map(self, jobs, progress, should_stop):
+        """Ejecutar los trabajos en orden, informando progreso y atento a la cancelación"""
+        if len(jobs) < self.PARALLEL_MIN_JOBS or self.max_workers == 1:
+            results = self._render_in_process(jobs)
+        else:
+            chunksize = max(1, len(jobs) // (self.max_workers * 4))
+            results = self.get_executor().map(_render_chart_job, jobs, chunksize=chunksize)
+        for done, result in enumerate(results, start=1):
+            if should_stop is not None and should_stop():
+                self.shutdown(cancel=True)
+                raise WorkerCancelled()
+            if progress is not None:
+                progress(done, len(jobs))
+            yield result
+
+    def _render_in_process(self, jobs):
+        """Renderizar en este proceso sobre una figura Agg propia (sin tocar el estilo global)"""
+        figure = Figure(figsize=self.figsize, dpi=self.dpi, facecolor='#1e1e1e')
+        FigureCanvasAgg(figure)
+        for job in jobs:
+            yield _draw_chart_job(figure, job)
+
+    def render_to_files(self, jobs, directory, fmt='png', progress=None, should_stop=None):
+        """Guardar un archivo de imagen por trabajo y devolver las rutas, en el orden de los trabajos"""
+        render_jobs = [(title, data, os.path.join(directory, f"{name}.{fmt}"), fmt)
+                       for name, title, data in jobs]
+        return list(self._map(render_jobs, progress, should_stop))
+
+    def render_to_pdf(self, jobs, path, progress=None, should_stop=None):
+        """Guardar todos los trabajos como páginas vectoriales de un único PDF"""
+        render_jobs = [(title, data, None, None) for name, title, data in jobs]
+        with PdfPages(path) as pdf:
+            for page in self._map(render_jobs, progress, should_stop):
+                if isinstance(page, bytes):
+                    page = pickle.loads(page)
+                pdf.savefig(page, facecolor=page.get_facecolor())
+        return path
+
+class ExportWorker(QThread):
+    """Worker thread para exportar paneles y gráficos sin bloquear la interfaz"""
+
+    # Formatos soportados: (extensión, es gráfico)
+    FORMATS = {
+        'csv': ('csv', False),
+        'parquet': ('parquet', False),
+        'excel': ('xlsx', False),
+        'png': ('png', True),
+        'svg': ('svg', True),
+        'pdf': ('pdf', True),
+    }
+
+    status_updated = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+    progress_updated = pyqtSignal(int)
+    export_finished = pyqtSignal(str)
+
+    def __init__(self, panels, formats, directory, history=None):
+        super().__init__()
+        # Copias propias de los DataFrames: el hilo de UI puede reemplazar
+        # data_storage mientras se escribe la exportación
+        self.panels = {key: df.copy() for key, df in panels.items() if df is not None}
+        self.formats = [fmt for fmt in formats if fmt in self.FORMATS]
+        self.directory = directory
+        # Historial de un panel para exportar su evolución: (clave, [(timestamp, DataFrame), ...])
+        self.history = history
+        self.is_running = True
+
+    def run(self):
+        """Ejecutar exportación"""
+        try:
+            self.export_all()
+        except WorkerCancelled:
+            self.status_updated.emit("Exportación cancelada")
+        except Exception as e:
+            self.error_occurred.emit(f"Error exportando: {str(e)}")
+            print(f"Error detallado en exportación: {traceback.format_exc()}")
+
+    def export_all(self):
+        """Escribir todos los paneles en todos los formatos pedidos"""
+        if self.history is not None:
+            self.export_history()
+            return
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        steps = [(fmt, key) for fmt in self.formats if fmt != 'pdf' for key in self.panels]
+        if 'pdf' in self.formats and self.panels:
+            # El reporte PDF agrupa todos los paneles en un solo archivo
+            steps.append(('pdf', None))
+        if not steps:
+            self.status_updated.emit("No hay datos para exportar")
+            return
+
+        written = []
+        failed = []
+        excel_writer = None
+        excel_path = None
+        try:
+            for step, (fmt, key) in enumerate(steps):
+                if not self.is_running:
+                    raise WorkerCancelled()
+
+                self.status_updated.emit(f"Exportando {key or 'reporte'} ({fmt.upper()})...")
+                extension, is_chart = self.FORMATS[fmt]
+                df = self.panels.get(key)
+
+                # Cada archivo se escribe con nombre temporal y se renombra al terminar:
+                # una exportación cancelada o fallida no deja archivos truncados
+                path = None
+                try:
+                    if fmt == 'pdf':
+                        path = os.path.join(self.directory, f"reporte_{timestamp}.pdf")
+                        self.export_report(self.partial_path(path))
+                    elif fmt == 'excel':
+                        # Un único libro con una hoja por panel (se renombra al cerrarlo)
+                        if excel_writer is None:
+                            excel_path = os.path.join(self.directory, f"mercado_{timestamp}.xlsx")
+                            excel_writer = pd.ExcelWriter(self.partial_path(excel_path))
+                        df.to_excel(excel_writer, sheet_name=key[:31], index=False)
+                    else:
+                        path = os.path.join(self.directory, f"{key}_{timestamp}.{extension}")
+                        partial = self.partial_path(path)
+                        if is_chart:
+                            self.export_chart(df, key, partial, fmt)
+                        elif fmt == 'csv':
+                            df.to_csv(partial, index=False)
+                        elif fmt == 'parquet':
+                            df.to_parquet(partial, index=False)
+                    if path is not None:
+                        os.replace(self.partial_path(path), path)
+                        written.append(path)
+                except WorkerCancelled:
+                    self.discard(path)
+                    raise
+                except ImportError as e:
+                    self.discard(path)
+                    failed.append(f"{key} ({fmt.upper()}): falta dependencia - {str(e).splitlines()[0]}")
+                except Exception as e:
+                    self.discard(path)
+                    failed.append(f"{key} ({fmt.upper()}): {e}")
+
+                self.progress_updated.emit(int((step + 1) * 100 / len(steps)))
+
+            if excel_writer is not None:
+                writer, excel_writer = excel_writer, None
+                try:
+                    writer.close()
+                    os.replace(self.partial_path(excel_path), excel_path)
+                    written.append(excel_path)
+                except Exception as e:
+                    self.discard(excel_path)
+                    failed.append(f"Excel: {e}")
+        finally:
+            if excel_writer is not None:
+                # Cancelada a mitad del libro
+                try:
+                    excel_writer.close()
+                except Exception:
+                    pass
+                self.discard(excel_path)
+
+        if failed:
+            self.error_occurred.emit("Algunas exportaciones fallaron:\n" + "\n".join(failed))
+        self.export_finished.emit(
+            f"Exportados {len(written)} archivos en {self.directory}")
+
+    @staticmethod
+    def partial_path(path):
+        """Nombre temporal con el que se escribe `path` hasta terminarlo"""
+        root, extension = os.path.splitext(path)
+        return f"{root}.part{extension}"
+
+    def discard(self, path):
+        """Borrar el archivo temporal a medio escribir de `path`, si quedó"""
+        if path is None:
+            return
+        try:
+            os.remove(self.partial_path(path))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"No se pudo borrar {self.partial_path(path)}: {e}")
+
+    @staticmethod
+    def export_chart(df, data_type, path, fmt):
+        """Renderizar el gráfico en un canvas Agg fuera de pantalla y guardarlo"""
+        figure = Figure(figsize=(12, 8), facecolor='#1e1e1e')
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot(111)
+        render_bubble_chart(ax, prepare_plot_data(df), PLOT_TITLES.get(data_type, data_type))
+        figure.tight_layout()
+        figure.savefig(path, format=fmt, facecolor=figure.get_facecolor())
+
+    def export_report(self, path):
+        """Generar un PDF de varias páginas con el gráfico de cada panel"""
+        jobs = [(key, PLOT_TITLES.get(key, key), df) for key, df in self.panels.items()]
+        with BatchChartRenderer(max_workers=min(len(jobs), os.cpu_count() or 1)) as renderer:
+            renderer.render_to_pdf(jobs, path, should_stop=lambda: not self.is_running)
+
+    def export_history(self):
+        """
+        Un gráfico por actualización del historial de un panel.
+
+        PNG y SVG van a una carpeta con un archivo por actualización y PDF a
+        un único archivo de varias páginas. Son muchos gráficos, así que es
+        el caso en que BatchChartRenderer usa el pool de procesos.
+        """
+        key, frames = self.history
+        formats = [fmt for fmt in self.formats if self.FORMATS[fmt][1]]
+        if not frames or not formats:
+            self.status_updated.emit("No hay historial o formatos de gráfico para exportar")
+            return
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        title = PLOT_TITLES.get(key, key)
+        jobs = [(f"{key}_{index:04d}", f"{title} - {timestamp:%H:%M:%S}", data)
+                for index, (timestamp, data) in enumerate(frames, 1)]
+        total = len(formats) * len(jobs)
+        written = []
+        with BatchChartRenderer() as renderer:
+            for position, fmt in enumerate(formats):
+                self.status_updated.emit(f"Exportando historial de {title} ({fmt.upper()}, {len(jobs)} gráficos)...")
+                progress = (lambda done, _, offset=position * len(jobs):
+                            self.progress_updated.emit(int((offset + done) * 100 / total)))
+                should_stop = lambda: not self.is_running
+                if fmt == 'pdf':
+                    path = os.path.join(self.directory, f"historial_{key}_{stamp}.pdf")
+                    try:
+                        renderer.render_to_pdf(jobs, self.partial_path(path), progress, should_stop)
+                    except BaseException:
+                        self.discard(path)
+                        raise
+                else:
+                    # La carpeta también se escribe con nombre temporal
+                    path = os.path.join(self.directory, f"historial_{key}_{stamp}_{fmt}")
+                    partial = f"{path}.part"
+                    os.makedirs(partial)
+                    try:
+                        renderer.render_to_files(jobs, partial, fmt, progress, should_stop)
+                    except BaseException:
+                        shutil.rmtree(partial, ignore_errors=True)
+                        raise
+                os.replace(self.partial_path(path) if fmt == 'pdf' else partial, path)
+                written.append(path)
+
+        self.export_finished.emit(
+            f"Historial de {title}: {len(jobs)} actualizaciones exportadas en {', '.join(written)}")
+
+    def stop(self):
+        """Detener exportación"""
+        self.is_running = False
+
+def highlight_edge_color(face_color):
+    """Color de borde para resaltar una burbuja según su color de relleno"""
+    if np.allclose(face_color[:3], POSITIVE_RGBA[:3], atol=0.1):
+        return "#043B04"  # Verde Oscuro
+    if np.allclose(face_color[:3], NEGATIVE_RGBA[:3], atol=0.1):
+        return "#3F0505"  # Rojo Oscuro
+    return 'yellow'  # Color por defecto
+
+def nice_ticks(low, high, count=6):
+    """Marcas "redondas" (1, 2, 5 x 10^n) entre low y high"""
+    span = high - low
+    if not np.isfinite(span) or span <= 0:
+        return np.array([low])
+    raw_step = span / max(count - 1, 1)
+    magnitude = 10 ** np.floor(np.log10(raw_step))
+    step = next(multiple * magnitude for multiple in (1, 2, 2.5, 5, 10) if multiple * magnitude >= raw_step)
+    ticks = np.arange(np.ceil(low / step), np.floor(high / step) + 1) * step
+    return ticks + 0.0  # Evitar "-0" en las etiquetas
+
+def autoscale_limits(x, y):
+    """Límites con márgenes automáticos como los de matplotlib (5%)"""
+    limits = []
+    for values in (x, y):
+        low, high = float(np.min(values)), float(np.max(values))
+        margin = (high - low) * 0.05 or max(abs(low) * 0.05, 1e-9)
+        limits.append((low - margin, high + margin))
+    return tuple(limits)
+
+def mask_key(mask):
+    """Representación compacta y hasheable de una máscara booleana (para claves de caché)"""
+    if mask is None:
+        return None
+    mask = np.asarray(mask, dtype=bool)
+    return len(mask), np.packbits(mask).tobytes()
+
+class RenderCache:
+    """
+    Caché LRU de imágenes ya rasterizadas de los gráficos, compartida por todos los paneles.
+
+    La clave la arma cada backend con la versión de los datos, la vista,
+    el resaltado y el tamaño del lienzo: si nada de eso cambió (cambio de
+    pestaña, repintado por una ventana encima, volver a un instante del
+    historial) se copia la imagen en lugar de redibujar la escena. El
+    total se limita en bytes y se descartan primero las menos usadas.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clave -> (imagen, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, image, nbytes):
+        if nbytes > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        self.entries[key] = (image, nbytes)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+# Arrastre mínimo (píxeles) para que cuente como selección por rectángulo
+SELECT_MIN_SPAN = 3
+
+class ChartBackend:
+    """
+    Interfaz de los backends de dibujo del gráfico de burbujas.
+
+    El PlotWidget mantiene el estado común (datos, límites originales,
+    scrollbars, resaltado y énfasis) y le delega al backend solo el dibujo,
+    los límites de la vista y la traducción de eventos del mouse a
+    coordenadas de datos (on_scroll / on_press / on_release / on_motion).
+    """
+
+    name = ''
+    label = ''
+
+    def __init__(self, plot_widget):
+        self.plot_widget = plot_widget
+
+    def widget(self):
+        """QWidget que se inserta en el PlotWidget"""
+        raise NotImplementedError
+
+    def draw_payload(self, payload, title):
+        """Dibujar el gráfico completo; devuelve los límites iniciales (xlim, ylim) o None"""
+        raise NotImplementedError
+
+    def update_payload(self, payload, title):
+        """
+        Mostrar otro payload reutilizando los elementos ya dibujados (scrubber).
+
+        Devuelve los límites nuevos como draw_payload; por defecto redibuja.
+        """
+        return self.draw_payload(payload, title)
+
+    def get_view(self):
+        raise NotImplementedError
+
+    def set_view(self, xlim, ylim):
+        raise NotImplementedError
+
+    def set_highlight(self, index):
+        """Resaltar la burbuja `index` (None para quitar el resaltado)"""
+        raise NotImplementedError
+
+    def set_emphasis(self, mask):
+        """Destacar las burbujas de la máscara y atenuar el resto (None: aspecto normal)"""
+        raise NotImplementedError
+
+    def set_alert_mask(self, mask):
+        """Marcar con un anillo las burbujas con alertas activas (None: sin marcas)"""
+        raise NotImplementedError
+
+    def set_select_mode(self, enabled):
+        """
+        Activar la selección por rectángulo con el botón izquierdo (en lugar del pan).
+
+        Al soltar, el backend llama a PlotWidget.select_range con las
+        esquinas en coordenadas de datos.
+        """
+        raise NotImplementedError
+
+    def set_points(self, x, y, sizes, ghosts=None):
+        """
+        Mover las burbujas ya dibujadas (cuadros de una transición).
+
+        `ghosts` es (puntos, colores) de las burbujas que salieron del panel,
+        o None para quitarlas.
+        """
+        raise NotImplementedError
+
+    def render_key(self):
+        """Clave de la imagen actual en la RenderCache (None: no cachear, dibujar siempre)"""
+        return None
+
+    def redraw(self):
+        """Pedir un redibujado (diferido)"""
+        raise NotImplementedError
+
+    def draw_now(self):
+        """Redibujar de forma sincrónica (benchmarks)"""
+        raise NotImplementedError
+
+    def set_cursor(self, cursor):
+        if cursor is None:
+            self.widget().unsetCursor()
+        else:
+            self.widget().setCursor(cursor)
+
+    def artist_count(self):
+        """Cantidad de elementos gráficos vivos (prueba de resistencia)"""
+        return 0
+
+class CachedFigureCanvas(FigureCanvas):
+    """
+    FigureCanvasQTAgg que consulta la RenderCache antes de rasterizar la figura.
+
+    En un acierto se copia la imagen guardada en el buffer del renderer
+    Agg y se emite el draw_event igual que en un dibujo real (el
+    RectangleSelector toma de ahí el fondo para su blit).
+    """
+
+    def __init__(self, figure, backend):
+        super().__init__(figure)
+        self.backend = backend
+
+    def draw(self):
+        cache = self.backend.plot_widget.render_cache
+        key = self.backend.render_key() if cache is not None else None
+        if key is not None:
+            image = cache.get(key)
+            if image is not None and self.blit_cached(image):
+                return
+        super().draw()
+        if key is not None:
+            image = np.array(self.buffer_rgba())
+            cache.put(key, image, image.nbytes)
+
+    def blit_cached(self, image):
+        renderer = self.get_renderer()
+        buffer = np.asarray(renderer.buffer_rgba())
+        if buffer.shape != image.shape:
+            return False
+        buffer[...] = image
+        self.figure.stale = False
+        self.callbacks.process('draw_event', DrawEvent('draw_event', self, renderer))
+        self.update()
+        return True
+
+class MatplotlibChartBackend(ChartBackend):
+    """Backend con matplotlib (FigureCanvasQTAgg): rasteriza toda la escena en software"""
+
+    name = 'matplotlib'
+    label = 'Matplotlib'
+
+    def __init__(self, plot_widget):
+        super().__init__(plot_widget)
+        self.scatter = None
+        self.alert_scatter = None
+        self.alert_mask = None
+        self.ghost_scatter = None
+        self.labels = []
+        self.median_line = None
+        self.highlighted_info = None
+        self.emphasis_labels = []
+        self.select_mode = False
+        self.selector = None
+        self.select_press = None
+
+        # Crear figura matplotlib
+        self.figure = Figure(figsize=(12, 8), facecolor='#1e1e1e')
+        self.canvas = CachedFigureCanvas(self.figure, self)
+
+        # Configurar estilo
+        plt.style.use('dark_background')
+
+        # Conectar eventos del mouse
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas.mpl_connect('button_press_event', self.on_click)
+        self.canvas.mpl_connect('button_release_event', self.on_release)
+        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+
+    def widget(self):
+        return self.canvas
+
+    def on_scroll(self, event):
+        """Manejar evento de scroll del mouse para zoom"""
+        if event.xdata is None or event.ydata is None or event.button not in ('up', 'down'):
+            return
+        self.plot_widget.on_scroll(event.xdata, event.ydata, event.button == 'up')
+
+    def on_click(self, event):
+        """Traducir el click del mouse (pan, reset o click sobre una burbuja)"""
+        if self.select_mode and event.button == 1:
+            self.select_press = (event.x, event.y) if event.inaxes else None
+        on_point = bool(event.inaxes and self.scatter is not None and self.scatter.contains(event)[0])
+        self.plot_widget.on_press(event.xdata, event.ydata, event.button,
+                                  in_axes=bool(event.inaxes), on_point=on_point)
+
+    def on_release(self, event):
+        """Manejar liberación del click del mouse"""
+        if self.select_press is not None and event.button == 1:
+            (x, y), self.select_press = self.select_press, None
+            # Un click sin arrastrar borra la selección. Lo resolvemos acá y no en el
+            # RectangleSelector: el de cada figura nueva no sabe que había una selección
+            if self.is_click(x, y, event.x, event.y):
+                self.plot_widget.set_selection(None)
+            return
+        self.plot_widget.on_release(event.button)
+
+    def on_motion(self, event):
+        """Manejar movimiento del mouse para pan"""
+        if event.xdata is not None and event.ydata is not None:
+            self.plot_widget.on_motion(event.xdata, event.ydata)
+
+    def draw_payload(self, payload, title):
+        self.remove_selector()
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        self.scatter = None # Resetear scatter plot
+        self.alert_scatter = None
+        self.alert_mask = None
+        self.ghost_scatter = None
+        self.labels = []
+        self.median_line = None
+        self.highlighted_info = None
+        self.emphasis_labels = []
+
+        try:
+            self.scatter = render_bubble_chart(
+                ax, payload.plot_data, title, empty_message=payload.empty_message,
+                style=(payload.sizes, payload.face_colors, payload.label_mask, payload.median_turnover))
+
+            if self.scatter is None:
+                self.canvas.draw_idle()
+                return None
+            # Etiquetas y línea de la mediana de render_bubble_chart, para reutilizarlas
+            self.labels = list(zip(np.flatnonzero(payload.label_mask), ax.texts))
+            self.median_line = ax.lines[1] if len(ax.lines) > 1 else None
+
+            # Ajustar layout
+            self.figure.tight_layout()
+            self.create_selector()
+            self.canvas.draw_idle()
+            return ax.get_xlim(), ax.get_ylim()
+
+        except Exception as e:
+            print(f"Error creando gráfico: {e}")
+            ax.text(0.5, 0.5, f'Error: {str(e)}',
+                   ha='center', va='center', transform=ax.transAxes,
+                   fontsize=12, color='red')
+            self.canvas.draw_idle()
+            return None
+
+    def update_payload(self, payload, title):
+        df = payload.plot_data
+        if self.scatter is None or df is None or df.empty:
+            return self.draw_payload(payload, title)
+
+        ax = self.scatter.axes
+        x = df['change'].to_numpy(dtype=float)
+        y = df['turnover'].to_numpy(dtype=float)
+        symbols = df['symbol'].to_numpy()
+        self.set_alert_mask(None)
+        self.scatter.set_offsets(np.column_stack([x, y]))
+        self.scatter.set_sizes(np.asarray(payload.sizes, dtype=float))
+        for label in self.emphasis_labels:
+            label.remove()
+        self.emphasis_labels = []
+        self.highlighted_info = None
+
+        # Mismo scatter con otros datos: colores y bordes por punto
+        self.scatter.set_alpha(0.7)
+        self.scatter.set_facecolors(payload.face_colors)
+        self.scatter.set_edgecolors(np.tile(to_rgba('white'), (len(df), 1)))
+        self.scatter.set_linewidths(np.full(len(df), 1.5))
+
+        # Reusar las etiquetas existentes; crear o quitar solo la diferencia
+        label_indices = np.flatnonzero(payload.label_mask)
+        labels = [label for _, label in self.labels]
+        for label in labels[len(label_indices):]:
+            label.remove()
+        labels = labels[:len(label_indices)]
+        while len(labels) < len(label_indices):
+            labels.append(ax.annotate('', (0, 0), xytext=(5, 5), textcoords='offset points',
+                                      fontsize=8, color='white', weight='regular'))
+        for idx, label in zip(label_indices, labels):
+            label.set_text(symbols[idx])
+            label.xy = (x[idx], y[idx])
+        self.labels = list(zip(label_indices, labels))
+
+        median = payload.median_turnover
+        if self.median_line is None and median is not None:
+            self.median_line = ax.axhline(y=median, color='yellow', linestyle='--', alpha=0.3)
+        elif self.median_line is not None:
+            self.median_line.set_visible(median is not None)
+            if median is not None:
+                self.median_line.set_ydata([median, median])
+
+        ax.title.set_text(f'{title}\n(Click en tabla para resaltar símbolo)')
+        xlim, ylim = autoscale_limits(x, y)
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        self.canvas.draw_idle()
+        return xlim, ylim
+
+    def get_view(self):
+        ax = self.figure.gca()
+        return ax.get_xlim(), ax.get_ylim()
+
+    def set_view(self, xlim, ylim):
+        ax = self.figure.gca()
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+
+    def set_highlight(self, index):
+        if self.scatter is None:
+            return
+
+        # 1. Resetear el punto previamente resaltado
+        if self.highlighted_info is not None:
+            idx = self.highlighted_info['index']
+            edgecolors = self.scatter.get_edgecolors()
+            linewidths = self.scatter.get_linewidths()
+
+            if idx < len(edgecolors):
+                edgecolors[idx] = self.highlighted_info['edgecolor']
+                linewidths[idx] = self.highlighted_info['linewidth']
+                self.scatter.set_edgecolors(edgecolors)
+                self.scatter.set_linewidths(linewidths)
+
+            self.highlighted_info = None
+
+        # 2. Resaltar el nuevo punto
+        if index is not None:
+            edgecolors = self.scatter.get_edgecolors()
+            linewidths = self.scatter.get_linewidths()
+
+            # Guardar propiedades originales antes de cambiarlas
+            self.highlighted_info = {
+                'index': index,
+                'edgecolor': edgecolors[index].copy(),
+                'linewidth': linewidths[index]
+            }
+
+            # Determinar el color de resaltado según el color de la burbuja
+            new_edge_color = highlight_edge_color(self.plot_widget.payload.face_colors[index])
+            edgecolors[index] = to_rgba(new_edge_color)
+            linewidths[index] = 3.0
+
+            self.scatter.set_edgecolors(edgecolors)
+            self.scatter.set_linewidths(linewidths)
+
+    def set_emphasis(self, mask):
+        if self.scatter is None:
+            return
+        payload = self.plot_widget.payload
+
+        for label in self.emphasis_labels:
+            label.remove()
+        self.emphasis_labels = []
+
+        if mask is None:
+            self.scatter.set_alpha(0.7)
+            self.scatter.set_facecolors(payload.face_colors)
+            return
+
+        # Alfa por punto: hay que quitar el alfa global de la colección
+        face_colors = np.array(payload.face_colors)
+        face_colors[:, 3] = np.where(mask, 0.9, 0.12)
+        edge_colors = np.array(self.scatter.get_edgecolors())
+        if len(edge_colors) == len(face_colors):
+            edge_colors[:, 3] = np.where(mask, 1.0, 0.12)
+        self.scatter.set_alpha(None)
+        self.scatter.set_facecolors(face_colors)
+        self.scatter.set_edgecolors(edge_colors)
+
+        # Etiquetar las coincidencias que no tenían etiqueta (hasta un límite)
+        df = payload.plot_data
+        ax = self.scatter.axes
+        symbols = df['symbol'].to_numpy()
+        changes = df['change'].to_numpy()
+        turnovers = df['turnover'].to_numpy()
+        for idx in np.flatnonzero(mask & ~payload.label_mask)[:30]:
+            self.emphasis_labels.append(ax.annotate(
+                symbols[idx], (changes[idx], turnovers[idx]),
+                xytext=(5, 5), textcoords='offset points',
+                fontsize=8, color='yellow', weight='bold'))
+
+    def set_alert_mask(self, mask):
+        if self.alert_scatter is not None:
+            self.alert_scatter.remove()
+            self.alert_scatter = None
+        self.alert_mask = mask
+        if self.scatter is None or mask is None or not mask.any():
+            return
+        df = self.plot_widget.payload.plot_data
+        self.alert_scatter = self.scatter.axes.scatter(
+            df['change'].to_numpy()[mask], df['turnover'].to_numpy()[mask],
+            s=np.asarray(self.plot_widget.payload.sizes)[mask] * 1.8,
+            facecolors='none', edgecolors=ALERT_COLOR, linewidths=2.5)
+
+    def set_select_mode(self, enabled):
+        self.select_mode = enabled
+        self.select_press = None
+        self.remove_selector()
+        self.create_selector()
+
+    def create_selector(self):
+        """RectangleSelector sobre los ejes actuales (con blit, solo se redibuja el rectángulo)"""
+        if not self.select_mode or self.scatter is None:
+            return
+        self.selector = RectangleSelector(
+            self.scatter.axes, self.on_select, useblit=True, button=[1],
+            minspanx=SELECT_MIN_SPAN, minspany=SELECT_MIN_SPAN, spancoords='pixels',
+            props=dict(facecolor='#4CAF50', edgecolor='white', alpha=0.25, fill=True))
+
+    def remove_selector(self):
+        if self.selector is not None:
+            self.selector.set_active(False)
+            self.selector.disconnect_events()
+            self.selector = None
+
+    def on_select(self, press, release):
+        if self.is_click(press.x, press.y, release.x, release.y):
+            return  # Lo borra on_release
+        self.plot_widget.select_range(press.xdata, release.xdata, press.ydata, release.ydata)
+
+    @staticmethod
+    def is_click(x0, y0, x1, y1):
+        """A lo sumo SELECT_MIN_SPAN píxeles en alguna dirección (como el RectangleSelector)"""
+        return abs(x1 - x0) <= SELECT_MIN_SPAN or abs(y1 - y0) <= SELECT_MIN_SPAN
+
+    def set_points(self, x, y, sizes, ghosts=None):
+        if self.scatter is None:
+            return
+        self.scatter.set_offsets(np.column_stack([x, y]))
+        self.scatter.set_sizes(sizes)
+        for idx, label in self.labels:
+            label.xy = (x[idx], y[idx])
+        if self.alert_scatter is not None:
+            mask = self.alert_mask
+            self.alert_scatter.set_offsets(np.column_stack([x[mask], y[mask]]))
+            self.alert_scatter.set_sizes(sizes[mask] * 1.8)
+
+        if ghosts is None:
+            if self.ghost_scatter is not None:
+                self.ghost_scatter.remove()
+                self.ghost_scatter = None
+            return
+        points, colors = ghosts
+        if self.ghost_scatter is None:
+            self.ghost_scatter = self.scatter.axes.scatter(
+                points[:, 0], points[:, 1], s=points[:, 2], c=colors,
+                alpha=0.4, edgecolors='white', linewidths=1.0)
+        else:
+            self.ghost_scatter.set_offsets(points[:, :2])
+            self.ghost_scatter.set_sizes(points[:, 2])
+
+    def render_key(self):
+        state = self.plot_widget.render_state()
+        if state is None or self.scatter is None:
+            return None
+        ax = self.scatter.axes
+        return ('matplotlib', state, ax.get_xlim(), ax.get_ylim(), tuple(self.figure.bbox.size))
+
+    def redraw(self):
+        self.canvas.draw_idle()
+
+    def draw_now(self):
+        self.canvas.draw()
+
+    def artist_count(self):
+        # Las marcas de los ejes dependen de los límites de cada actualización
+        # (suben y bajan con los datos); no cuentan como artistas acumulados
+        ticks = sum(len(tick.findobj()) for ax in self.figure.axes for axis in (ax.xaxis, ax.yaxis)
+                    for tick in axis.majorTicks + axis.minorTicks)
+        return len(self.figure.findobj()) - ticks
+
+class QtBubbleCanvas(QWidget):
+    """
+    Lienzo del backend nativo: dibuja ejes, grilla y burbujas con QPainter.
+
+    Solo se dibujan las burbujas dentro de la vista (recorte vectorizado con
+    NumPy), y el zoom o el pan solo cambian los límites y repintan.
+    """
+
+    MARGINS = (80, 70, 20, 50)  # izquierda, arriba, derecha, abajo
+    BACKGROUND = QColor('#1e1e1e')
+    AXES_BACKGROUND = QColor('#2d2d2d')
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+        self.setMouseTracking(True)
+        self.setMinimumSize(200, 150)
+        # Selección por rectángulo: punto inicial y rectángulo actual en píxeles
+        self.select_mode = False
+        self.rubber_band_origin = None
+        self.rubber_band = None
+        self.clear()
+
+    def clear(self, message=None):
+        self.message = message
+        self.title = ''
+        self.xlim = (0.0, 1.0)
+        self.ylim = (0.0, 1.0)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.diameters = np.empty(0)
+        self.face_colors = np.empty((0, 4))
+        self.edge_colors = np.empty((0, 4))
+        self.line_widths = np.empty(0)
+        self.symbols = np.empty(0, dtype=object)
+        self.label_mask = np.empty(0, dtype=bool)
+        self.emphasis_mask = None
+        self.alert_mask = None
+        self.ghost_points = None
+        self.ghost_colors = None
+        self.median = None
+
+    def plot_rect(self):
+        left, top, right, bottom = self.MARGINS
+        return QRectF(left, top, max(1, self.width() - left - right), max(1, self.height() - top - bottom))
+
+    def to_pixels(self, x, y):
+        """Coordenadas de datos -> píxeles (vectorizado)"""
+        rect = self.plot_rect()
+        px = rect.left() + (np.asarray(x) - self.xlim[0]) / (self.xlim[1] - self.xlim[0]) * rect.width()
+        py = rect.bottom() - (np.asarray(y) - self.ylim[0]) / (self.ylim[1] - self.ylim[0]) * rect.height()
+        return px, py
+
+    def to_data(self, px, py, clamp=False):
+        """Píxeles -> coordenadas de datos (None fuera del área del gráfico, salvo con `clamp`)"""
+        rect = self.plot_rect()
+        if clamp:
+            px = min(max(px, rect.left()), rect.right())
+            py = min(max(py, rect.top()), rect.bottom())
+        elif not rect.contains(px, py):
+            return None, None
+        x = self.xlim[0] + (px - rect.left()) / rect.width() * (self.xlim[1] - self.xlim[0])
+        y = self.ylim[0] + (rect.bottom() - py) / rect.height() * (self.ylim[1] - self.ylim[0])
+        return x, y
+
+    def size_to_diameter(self, sizes):
+        """Igual que matplotlib: `s` es el área en puntos^2"""
+        return np.sqrt(np.maximum(np.asarray(sizes, dtype=float), 0.0)) * self.logicalDpiX() / 72.0
+
+    def hit_test(self, px, py):
+        """Índice de la burbuja bajo el cursor, o None"""
+        if len(self.x) == 0:
+            return None
+        bx, by = self.to_pixels(self.x, self.y)
+        distance = np.hypot(bx - px, by - py)
+        inside = np.flatnonzero(distance <= self.diameters / 2)
+        return int(inside[np.argmin(distance[inside])]) if len(inside) else None
+
+    def paintEvent(self, event):
+        cache = self.backend.plot_widget.render_cache
+        key = self.backend.render_key() if cache is not None else None
+        painter = QPainter(self)
+        if key is None:
+            self.paint_scene(painter)
+        else:
+            image = cache.get(key)
+            if image is None:
+                # Rasterizar la escena una vez a la resolución real de la pantalla
+                ratio = self.devicePixelRatioF()
+                image = QImage(int(self.width() * ratio), int(self.height() * ratio),
+                               QImage.Format_ARGB32_Premultiplied)
+                image.setDevicePixelRatio(ratio)
+                image_painter = QPainter(image)
+                self.paint_scene(image_painter)
+                image_painter.end()
+                cache.put(key, image, image.sizeInBytes())
+            painter.drawImage(0, 0, image)
+
+        if self.rubber_band is not None:
+            painter.setPen(QPen(Qt.white, 1))
+            painter.setBrush(QColor(76, 175, 80, 64))
+            painter.drawRect(self.rubber_band)
+        painter.end()
+
+    def paint_scene(self, painter):
+        """Fondo, ejes, burbujas y etiquetas (todo menos el rectángulo de selección)"""
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), self.BACKGROUND)
+        rect = self.plot_rect()
+        painter.fillRect(rect, self.AXES_BACKGROUND)
+
+        if self.message is not None:
+            painter.setPen(Qt.white)
+            painter.setFont(QFont("Arial", 16))
+            painter.drawText(rect, Qt.AlignCenter, self.message)
+            return
+
+        self.paint_axes(painter, rect)
+
+        # Burbujas visibles, recortadas al área del gráfico
+        painter.save()
+        painter.setClipRect(rect)
+        px, py = self.to_pixels(self.x, self.y)
+        radius = self.diameters / 2
+        visible = np.flatnonzero((px + radius >= rect.left()) & (px - radius <= rect.right()) &
+                                 (py + radius >= rect.top()) & (py - radius <= rect.bottom()))
+        # Burbujas que salieron del panel (durante una transición)
+        if self.ghost_points is not None:
+            gx, gy = self.to_pixels(self.ghost_points[:, 0], self.ghost_points[:, 1])
+            ghost_radius = self.size_to_diameter(self.ghost_points[:, 2]) / 2
+            painter.setPen(QPen(QColor(255, 255, 255, 100), 1.0))
+            for idx in range(len(gx)):
+                r, g, b, _ = self.ghost_colors[idx]
+                painter.setBrush(QColor.fromRgbF(r, g, b, 0.4))
+                painter.drawEllipse(QPointF(gx[idx], gy[idx]), ghost_radius[idx], ghost_radius[idx])
+
+        face_colors = self.face_colors
+        edge_alpha = np.full(len(self.x), 0.7)
+        if self.emphasis_mask is not None:
+            face_colors = face_colors.copy()
+            face_colors[:, 3] = np.where(self.emphasis_mask, 0.9, 0.12)
+            edge_alpha = np.where(self.emphasis_mask, 1.0, 0.12)
+        pen = QPen()
+        for idx in visible:
+            painter.setBrush(QColor.fromRgbF(*face_colors[idx]))
+            r, g, b, _ = self.edge_colors[idx]
+            pen.setColor(QColor.fromRgbF(r, g, b, edge_alpha[idx]))
+            pen.setWidthF(self.line_widths[idx])
+            painter.setPen(pen)
+            painter.drawEllipse(QPointF(px[idx], py[idx]), radius[idx], radius[idx])
+
+        # Anillos de las burbujas con alertas activas
+        if self.alert_mask is not None:
+            painter.setBrush(Qt.NoBrush)
+            painter.setPen(QPen(QColor(ALERT_COLOR), 2.5))
+            for idx in visible[self.alert_mask[visible]]:
+                ring = radius[idx] * 1.35
+                painter.drawEllipse(QPointF(px[idx], py[idx]), ring, ring)
+
+        # Etiquetas de los puntos importantes (y de los destacados)
+        painter.setFont(QFont("Arial", 8))
+        label_mask = self.label_mask
+        if self.emphasis_mask is not None:
+            label_mask = label_mask | self.emphasis_mask
+        for idx in visible[label_mask[visible]]:
+            emphasized = self.emphasis_mask is not None and self.emphasis_mask[idx] and not self.label_mask[idx]
+            painter.setPen(QColor('yellow') if emphasized else Qt.white)
+            painter.drawText(QPointF(px[idx] + 5, py[idx] - 5), str(self.symbols[idx]))
+        painter.restore()
+
+    def paint_axes(self, painter, rect):
+        """Grilla, líneas de referencia, marcas y títulos"""
+        grid_pen = QPen(QColor(255, 255, 255, 77))
+        grid_pen.setWidthF(0.8)
+        label_pen = QPen(Qt.white)
+        painter.setFont(QFont("Arial", 9))
+        metrics = painter.fontMetrics()
+
+        for tick in nice_ticks(*self.xlim):
+            px, _ = self.to_pixels(tick, self.ylim[0])
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(px, rect.top()), QPointF(px, rect.bottom()))
+            painter.setPen(label_pen)
+            text = f"{tick:g}"
+            painter.drawText(QPointF(px - metrics.width(text) / 2, rect.bottom() + metrics.height()), text)
+        for tick in nice_ticks(*self.ylim):
+            _, py = self.to_pixels(self.xlim[0], tick)
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(rect.left(), py), QPointF(rect.right(), py))
+            painter.setPen(label_pen)
+            text = format_turnover(tick)
+            painter.drawText(QPointF(rect.left() - metrics.width(text) - 6, py + metrics.ascent() / 2), text)
+
+        # Líneas de referencia
+        dashed = QPen(QColor(255, 255, 255, 77), 1, Qt.DashLine)
+        painter.setPen(dashed)
+        zero_x, _ = self.to_pixels(0.0, self.ylim[0])
+        if rect.left() <= zero_x <= rect.right():
+            painter.drawLine(QPointF(zero_x, rect.top()), QPointF(zero_x, rect.bottom()))
+        if self.median is not None:
+            _, median_y = self.to_pixels(self.xlim[0], self.median)
+            if rect.top() <= median_y <= rect.bottom():
+                painter.setPen(QPen(QColor(255, 255, 0, 77), 1, Qt.DashLine))
+                painter.drawLine(QPointF(rect.left(), median_y), QPointF(rect.right(), median_y))
+
+        # Títulos
+        painter.setPen(label_pen)
+        painter.setFont(QFont("Arial", 12))
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 22, rect.width(), 24),
+                         Qt.AlignCenter, 'Variación Diaria (%)')
+        painter.save()
+        painter.translate(16, rect.center().y())
+        painter.rotate(-90)
+        painter.drawText(QRectF(-rect.height() / 2, -12, rect.height(), 24), Qt.AlignCenter, 'Volumen Operado')
+        painter.restore()
+        painter.setFont(QFont("Arial", 14))
+        painter.drawText(QRectF(0, 4, self.width(), self.MARGINS[1] - 8), Qt.AlignCenter,
+                         f'{self.title}\n(Click en tabla para resaltar símbolo)')
+
+    def wheelEvent(self, event):
+        xdata, ydata = self.to_data(event.pos().x(), event.pos().y())
+        if xdata is None or event.angleDelta().y() == 0:
+            return
+        self.backend.plot_widget.on_scroll(xdata, ydata, event.angleDelta().y() > 0)
+
+    def mousePressEvent(self, event):
+        if self.select_mode and event.button() == Qt.LeftButton:
+            if self.plot_rect().contains(event.pos().x(), event.pos().y()):
+                self.rubber_band_origin = QPointF(event.pos())
+            return
+        buttons = {Qt.LeftButton: 1, Qt.MiddleButton: 2, Qt.RightButton: 3}
+        xdata, ydata = self.to_data(event.pos().x(), event.pos().y())
+        on_point = xdata is not None and self.hit_test(event.pos().x(), event.pos().y()) is not None
+        self.backend.plot_widget.on_press(xdata, ydata, buttons.get(event.button()),
+                                          in_axes=xdata is not None, on_point=on_point)
+
+    def mouseReleaseEvent(self, event):
+        if self.rubber_band_origin is not None and event.button() == Qt.LeftButton:
+            band = QRectF(self.rubber_band_origin, QPointF(event.pos())).normalized()
+            self.rubber_band_origin = None
+            self.rubber_band = None
+            self.update()
+            if band.width() <= SELECT_MIN_SPAN or band.height() <= SELECT_MIN_SPAN:
+                # Un click sin arrastrar borra la selección
+                self.backend.plot_widget.set_selection(None)
+                return
+            x0, y0 = self.to_data(band.left(), band.bottom(), clamp=True)
+            x1, y1 = self.to_data(band.right(), band.top(), clamp=True)
+            self.backend.plot_widget.select_range(x0, x1, y0, y1)
+            return
+        buttons = {Qt.LeftButton: 1, Qt.MiddleButton: 2, Qt.RightButton: 3}
+        self.backend.plot_widget.on_release(buttons.get(event.button()))
 
-            # Crear conexión SHDA
-            self.hb = SHDA.SHDA(self.host, self.dni, self.user, self.password)
+    def mouseMoveEvent(self, event):
+        if self.rubber_band_origin is not None:
+            self.rubber_band = QRectF(self.rubber_band_origin, QPointF(event.pos())).normalized()
+            self.update()
+            return
+        xdata, ydata = self.to_data(event.pos().x(), event.pos().y())
+        if xdata is not None:
+            self.backend.plot_widget.on_motion(xdata, ydata)
 
-            self.status_updated.emit("Conectado. Obteniendo datos...")
-            self.progress_updated.emit(20)
+class QtChartBackend(ChartBackend):
+    """Backend nativo de Qt (QPainter), sin rasterizar toda la escena en software con Agg"""
 
-            # Obtener bluechips
-            try:
-                self.status_updated.emit("Obteniendo bluechips...")
-                lideres = self.hb.get_bluechips("24hs")
-                if lideres is not None and not lideres.empty:
-                    self.bluechips_updated.emit(lideres)
-                    print(f"Bluechips obtenidos: {len(lideres)} registros")
-                self.progress_updated.emit(35)
-            except Exception as e:
-                print(f"Error obteniendo bluechips: {e}")
+    name = 'qt'
+    label = 'Qt nativo'
 
-            # Obtener bonos
-            try:
-                self.status_updated.emit("Obteniendo bonos...")
-                bonos = self.hb.get_bonds("24hs")
-                if bonos is not None and not bonos.empty:
-                    self.bonds_updated.emit(bonos)
-                    print(f"Bonos obtenidos: {len(bonos)} registros")
-                self.progress_updated.emit(50)
-            except Exception as e:
-                print(f"Error obteniendo bonos: {e}")
+    def __init__(self, plot_widget):
+        super().__init__(plot_widget)
+        self.canvas = QtBubbleCanvas(self)
 
-            # Obtener CEDEARs
-            try:
-                self.status_updated.emit("Obteniendo CEDEARs...")
-                cedears = self.hb.get_cedear("24hs")
-                if cedears is not None and not cedears.empty:
-                    self.cedears_updated.emit(cedears)
-                    print(f"CEDEARs obtenidos: {len(cedears)} registros")
-                self.progress_updated.emit(65)
-            except Exception as e:
-                print(f"Error obteniendo CEDEARs: {e}")
+    def widget(self):
+        return self.canvas
 
-            # Obtener letras
-            try:
-                self.status_updated.emit("Obteniendo letras...")
-                letras = self.hb.get_short_term_bonds("24hs")
-                if letras is not None and not letras.empty:
-                    self.short_term_bonds_updated.emit(letras)
-                    print(f"Letras obtenidas: {len(letras)} registros")
-                self.progress_updated.emit(80)
-            except Exception as e:
-                print(f"Error obteniendo letras: {e}")
+    def draw_payload(self, payload, title):
+        canvas = self.canvas
+        df = payload.plot_data
+        if df is None or df.empty:
+            canvas.clear(payload.empty_message)
+            canvas.update()
+            return None
 
-            # Obtener Galpones
-            try:
-                self.status_updated.emit("Obteniendo Panel General...")
-                galpones = self.hb.get_galpones("24hs")
-                if galpones is not None and not galpones.empty:
-                    self.galpones_updated.emit(galpones)
-                    print(f"Activos Panel general obtenidos: {len(galpones)} registros")
-                self.progress_updated.emit(90)
-            except Exception as e:
-                print(f"Error obteniendo Panel General: {e}")
+        canvas.clear()
+        canvas.title = title
+        canvas.x = df['change'].to_numpy(dtype=float)
+        canvas.y = df['turnover'].to_numpy(dtype=float)
+        canvas.diameters = canvas.size_to_diameter(payload.sizes)
+        canvas.face_colors = np.array(payload.face_colors, dtype=float)
+        canvas.face_colors[:, 3] = 0.7
+        canvas.edge_colors = np.tile(to_rgba('white'), (len(df), 1))
+        canvas.line_widths = np.full(len(df), 1.5)
+        canvas.symbols = df['symbol'].to_numpy()
+        canvas.label_mask = np.asarray(payload.label_mask)
+        canvas.median = payload.median_turnover
+
+        canvas.xlim, canvas.ylim = autoscale_limits(canvas.x, canvas.y)
+        canvas.update()
+        return canvas.xlim, canvas.ylim
+
+    def get_view(self):
+        return self.canvas.xlim, self.canvas.ylim
+
+    def set_view(self, xlim, ylim):
+        self.canvas.xlim = tuple(xlim)
+        self.canvas.ylim = tuple(ylim)
+
+    def set_highlight(self, index):
+        canvas = self.canvas
+        if len(canvas.x) == 0:
+            return
+        canvas.edge_colors[:] = to_rgba('white')
+        canvas.line_widths[:] = 1.5
+        if index is not None:
+            canvas.edge_colors[index] = to_rgba(highlight_edge_color(canvas.face_colors[index]))
+            canvas.line_widths[index] = 3.0
+
+    def set_emphasis(self, mask):
+        self.canvas.emphasis_mask = None if mask is None else np.asarray(mask, dtype=bool)
+
+    def set_alert_mask(self, mask):
+        self.canvas.alert_mask = mask if mask is not None and mask.any() else None
+
+    def set_select_mode(self, enabled):
+        self.canvas.select_mode = enabled
+        self.canvas.rubber_band_origin = None
+        self.canvas.rubber_band = None
+
+    def set_points(self, x, y, sizes, ghosts=None):
+        canvas = self.canvas
+        if len(canvas.x) != len(x):
+            return
+        canvas.x, canvas.y = x, y
+        canvas.diameters = canvas.size_to_diameter(sizes)
+        canvas.ghost_points, canvas.ghost_colors = ghosts if ghosts is not None else (None, None)
+
+    def render_key(self):
+        state = self.plot_widget.render_state()
+        canvas = self.canvas
+        if state is None or canvas.message is not None:
+            return None
+        return ('qt', state, canvas.xlim, canvas.ylim, canvas.width(), canvas.height(), canvas.devicePixelRatioF())
 
-            self.progress_updated.emit(100)
-            self.status_updated.emit(f"Datos actualizados - {datetime.now().strftime('%H:%M:%S')}")
+    def redraw(self):
+        self.canvas.update()
 
-        except Exception as e:
-            self.error_occurred.emit(f"Error conectando: {str(e)}")
-            print(f"Error detallado en conexión: {traceback.format_exc()}")
+    def draw_now(self):
+        self.canvas.repaint()
 
-    def stop(self):
-        """Detener worker"""
-        self.is_running = False
-        self.quit()
+    def artist_count(self):
+        return len(self.canvas.x)
+
+# Backends disponibles para el gráfico de burbujas
+CHART_BACKENDS = {backend.name: backend for backend in (MatplotlibChartBackend, QtChartBackend)}
 
 class PlotWidget(QWidget):
-    """Widget personalizado para mostrar gráficos matplotlib con funcionalidad de zoom y scroll"""
+    """Widget personalizado para mostrar el gráfico de burbujas con funcionalidad de zoom y scroll"""
 
-    def __init__(self):
+    # Símbolos elegidos con la selección por rectángulo (tupla, o None al borrarla)
+    selection_changed = pyqtSignal(object)
+
+    # Transición animada entre actualizaciones: duración total y presupuesto por cuadro
+    TRANSITION_MS = 450
+    FRAME_BUDGET_MS = 33
+    # Tras el último cambio de vista (zoom, pan, scroll) la vista se considera estable
+    VIEW_SETTLE_MS = 300
+
+    def __init__(self, backend='matplotlib', render_cache=None):
         super().__init__()
+        # Caché de imágenes compartida entre paneles (RenderCache); None para dibujar siempre
+        self.render_cache = render_cache
         self.original_xlim = None
         self.original_ylim = None
         self.zoom_factor = 1.5
         # --- NUEVAS PROPIEDADES PARA INTERACTIVIDAD ---
         self.df = None
-        self.scatter = None
-        self.highlighted_info = None
+        self.payload = None
+        self.title = ''
+        self.highlighted_index = None
+        # Máscara de énfasis aplicada: la de la búsqueda combinada con la de la selección
+        self.emphasis_mask = None
+        self.search_mask = None
+        self.alert_mask = None
+        # Selección por rectángulo: se guarda por símbolo para sobrevivir a las actualizaciones
+        self.select_mode = False
+        self.selected_symbols = None
+        self.selection_mask = None
+        # Índice para consultas por rango: filas ordenadas por variación
+        self.range_order = np.empty(0, dtype=np.int64)
+        self.range_x = np.empty(0)
+        self.range_y = np.empty(0)
+        self.is_panning = False
+        self.pan_start_point = None
+        # Transición en curso (posiciones inicial/final) y estadísticas de la última
+        self.transition = None
+        self.transition_stats = None
+        self.transition_timer = QTimer(self)
+        self.transition_timer.timeout.connect(self.advance_transition)
+        # Activo mientras el usuario mueve la vista: esos cuadros no se guardan en la RenderCache
+        self.view_settle_timer = QTimer(self)
+        self.view_settle_timer.setSingleShot(True)
+        self.backend = CHART_BACKENDS[backend](self)
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
 
-        # Crear figura matplotlib
-        self.figure = Figure(figsize=(12, 8), facecolor='#1e1e1e')
-        self.canvas = FigureCanvas(self.figure)
-
         # Layout para canvas y scrollbars
-        plot_layout = QHBoxLayout()
-        plot_layout.addWidget(self.canvas)
+        self.plot_layout = QHBoxLayout()
+        self.plot_layout.addWidget(self.backend.widget())
 
         self.v_scrollbar = QScrollBar(Qt.Vertical)
         self.v_scrollbar.setMinimum(0)
@@ -160,11 +3309,11 @@ class PlotWidget(QWidget):
         self.v_scrollbar.setSingleStep(10)
         self.v_scrollbar.setPageStep(100)
         self.v_scrollbar.valueChanged.connect(self.v_scroll_plot)
-        plot_layout.addWidget(self.v_scrollbar)
+        self.plot_layout.addWidget(self.v_scrollbar)
 
         main_plot_area = QWidget()
         main_plot_area_layout = QVBoxLayout(main_plot_area)
-        main_plot_area_layout.addLayout(plot_layout)
+        main_plot_area_layout.addLayout(self.plot_layout)
 
         self.h_scrollbar = QScrollBar(Qt.Horizontal)
         self.h_scrollbar.setMinimum(0)
@@ -177,18 +3326,6 @@ class PlotWidget(QWidget):
 
         layout.addWidget(main_plot_area)
 
-        # Configurar estilo
-        plt.style.use('dark_background')
-
-        # Conectar eventos del mouse
-        self.canvas.mpl_connect('scroll_event', self.on_scroll)
-        self.canvas.mpl_connect('button_press_event', self.on_click)
-        self.canvas.mpl_connect('button_release_event', self.on_release)
-        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
-
-        self.is_panning = False
-        self.pan_start_point = None
-
         # Agregar botón de reset zoom
         self.reset_button = QPushButton("🔍 Reset Zoom")
         self.reset_button.clicked.connect(self.reset_zoom)
@@ -207,36 +3344,72 @@ class PlotWidget(QWidget):
             }
         """)
 
+        # Modo selección: arrastrar con el botón izquierdo marca un rectángulo en lugar de mover
+        self.select_button = QPushButton("⬚ Seleccionar")
+        self.select_button.setCheckable(True)
+        self.select_button.setMaximumWidth(120)
+        self.select_button.setToolTip("Arrastrar un rectángulo para filtrar la tabla por las burbujas que contiene")
+        self.select_button.setStyleSheet(self.reset_button.styleSheet() +
+                                         "QPushButton:checked { background-color: #4CAF50; }")
+        self.select_button.toggled.connect(self.set_select_mode)
+
         button_layout = QHBoxLayout()
         button_layout.addStretch()
+        button_layout.addWidget(self.select_button)
         button_layout.addWidget(self.reset_button)
         layout.addLayout(button_layout)
 
-    def on_scroll(self, event):
+    def set_backend(self, name):
+        """Cambiar el backend de dibujo en caliente conservando datos, vista y resaltado"""
+        if name == self.backend.name or name not in CHART_BACKENDS:
+            return
+        self.stop_transition()
+        view = self.get_view() if self.payload is not None and self.original_xlim is not None else None
+
+        old_widget = self.backend.widget()
+        self.backend = CHART_BACKENDS[name](self)
+        self.plot_layout.replaceWidget(old_widget, self.backend.widget())
+        old_widget.setParent(None)
+        old_widget.deleteLater()
+        self.backend.set_select_mode(self.select_mode)
+
+        if self.payload is not None:
+            highlighted, search, alerts = self.highlighted_index, self.search_mask, self.alert_mask
+            self.plot_bubble_chart(self.payload, self.title)
+            if view is not None:
+                self.set_view(*view)
+            if highlighted is not None:
+                self.highlighted_index = highlighted
+                self.backend.set_highlight(highlighted)
+            if search is not None:
+                self.search_mask = search
+                self.update_emphasis(redraw=False)
+            if alerts is not None:
+                self.alert_mask = alerts
+                self.backend.set_alert_mask(alerts)
+            self.backend.redraw()
+
+    def get_view(self):
+        return self.backend.get_view()
+
+    def set_view(self, xlim, ylim):
+        """Aplicar límites a la vista y actualizar scrollbars"""
+        self.view_settle_timer.start(self.VIEW_SETTLE_MS)
+        self.backend.set_view(xlim, ylim)
+        self.update_scrollbars()
+        self.backend.redraw()
+
+    def on_scroll(self, xdata, ydata, zoom_in):
         """Manejar evento de scroll del mouse para zoom"""
         try:
-            ax = self.figure.gca()
-            if ax is None:
-                return
-
-            # Obtener posición del mouse en coordenadas de datos
-            xdata, ydata = event.xdata, event.ydata
-            if xdata is None or ydata is None:
+            if self.original_xlim is None:
                 return
 
             # Obtener límites actuales
-            xlim = ax.get_xlim()
-            ylim = ax.get_ylim()
+            xlim, ylim = self.get_view()
 
             # Calcular factor de zoom
-            if event.button == 'up':
-                # Zoom in
-                scale_factor = 1.0 / self.zoom_factor
-            elif event.button == 'down':
-                # Zoom out
-                scale_factor = self.zoom_factor
-            else:
-                return
+            scale_factor = 1.0 / self.zoom_factor if zoom_in else self.zoom_factor
 
             # Calcular nuevos límites centrados en la posición del mouse
             new_width = (xlim[1] - xlim[0]) * scale_factor
@@ -273,309 +3446,296 @@ class PlotWidget(QWidget):
                         new_ylim = [center_y - min_height/2, center_y + min_height/2]
 
             # Aplicar nuevos límites
-            ax.set_xlim(new_xlim)
-            ax.set_ylim(new_ylim)
-
-            self.update_scrollbars()
-            self.canvas.draw_idle()
+            self.set_view(new_xlim, new_ylim)
 
         except Exception as e:
             print(f"Error en zoom: {e}")
 
-    def on_click(self, event):
+    def on_press(self, xdata, ydata, button, in_axes, on_point):
         """Manejar click del mouse para pan (arrastrar) o reset"""
-        if event.button == 1:  # Left click for pan
+        if button == 1 and self.select_mode:
+            return  # El rectángulo de selección lo maneja el backend
+        if button == 1:  # Left click for pan
             # --- MODIFICACIÓN: Resetear resaltado al hacer clic en el fondo ---
-            if event.inaxes and not self.scatter.contains(event)[0]:
-                 self.highlight_symbol(None)
-
-            self.is_panning = True
-            self.pan_start_point = (event.xdata, event.ydata)
-            self.canvas.setCursor(Qt.ClosedHandCursor)
-        elif event.button == 2:  # Middle click for reset
+            if in_axes and not on_point:
+                self.highlight_symbol(None)
+
+            self.is_panning = in_axes
+            self.pan_start_point = (xdata, ydata) if in_axes else None
+            if in_axes:
+                self.backend.set_cursor(Qt.ClosedHandCursor)
+        elif button == 2:  # Middle click for reset
             self.reset_zoom()
 
-    def on_release(self, event):
+    def on_release(self, button):
         """Manejar liberación del click del mouse"""
-        if event.button == 1:
+        if button == 1:
             self.is_panning = False
-            self.canvas.unsetCursor()
+            self.backend.set_cursor(None)
 
-    def on_motion(self, event):
+    def on_motion(self, xdata, ydata):
         """Manejar movimiento del mouse para pan"""
-        if self.is_panning and self.pan_start_point and event.xdata is not None and event.ydata is not None:
-            ax = self.figure.gca()
-            if ax is None:
-                return
+        if self.is_panning and self.pan_start_point:
+            dx = xdata - self.pan_start_point[0]
+            dy = ydata - self.pan_start_point[1]
 
-            dx = event.xdata - self.pan_start_point[0]
-            dy = event.ydata - self.pan_start_point[1]
-
-            xlim = ax.get_xlim()
-            ylim = ax.get_ylim()
+            xlim, ylim = self.get_view()
 
             new_xlim = [xlim[0] - dx, xlim[1] - dx]
             new_ylim = [ylim[0] - dy, ylim[1] - dy]
 
-            ax.set_xlim(new_xlim)
-            ax.set_ylim(new_ylim)
-            self.update_scrollbars()
-            self.canvas.draw_idle()
+            self.set_view(new_xlim, new_ylim)
 
     def reset_zoom(self):
         """Resetear zoom a vista original"""
         try:
             if self.original_xlim and self.original_ylim:
-                ax = self.figure.gca()
-                ax.set_xlim(self.original_xlim)
-                ax.set_ylim(self.original_ylim)
-                self.update_scrollbars()
-                self.canvas.draw_idle()
+                self.set_view(self.original_xlim, self.original_ylim)
         except Exception as e:
             print(f"Error reseteando zoom: {e}")
 
-    def plot_bubble_chart(self, data, title, instrument_type):
-        """Crear gráfico de burbujas con funcionalidad de zoom y scroll"""
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            ax.set_facecolor('#2d2d2d')
-            self.scatter = None # Resetear scatter plot
-            self.highlighted_info = None
-
-            if data is None or data.empty:
-                ax.text(0.5, 0.5, 'No hay datos disponibles',
-                       ha='center', va='center', transform=ax.transAxes,
-                       fontsize=16, color='white')
-                self.canvas.draw_idle()
-                return
-
-            # Preparar datos
-            df = self.prepare_data(data)
-            if df is None or df.empty:
-                ax.text(0.5, 0.5, 'No hay datos o no superan el filtro',
-                       ha='center', va='center', transform=ax.transAxes,
-                       fontsize=16, color='white')
-                self.canvas.draw_idle()
-                return
-            
-            df = df.reset_index(drop=True)
-            self.df = df # Guardar para referencia
-
-            # Normalizar tamaños de burbujas
-            if len(df) > 1:
-                turnover_sizes = df['turnover'].values
-                min_size, max_size = 100, 2000
-                size_range = turnover_sizes.max() - turnover_sizes.min()
-                if size_range > 0:
-                    normalized_sizes = min_size + (turnover_sizes - turnover_sizes.min()) * (max_size - min_size) / size_range
-                else:
-                    normalized_sizes = [min_size] * len(df)
-            else:
-                normalized_sizes = [500]
-
-            # Colores basados en variación
-            face_colors_list = []
-            for change in df['change']:
-                if change > 0:
-                    face_colors_list.append('#44ff44')  # Verde
-                elif change < 0:
-                    face_colors_list.append('#ff4444')  # Rojo
-                else:
-                    face_colors_list.append('#ffffff')  # Blanco
-
-            # --- CORRECCIÓN ---
-            # Se crean listas explícitas para los bordes y anchos.
-            # Esto asegura que cada punto tenga su propia propiedad editable.
-            num_points = len(df)
-            edge_colors_list = ['white'] * num_points
-            linewidths_list = [1.5] * num_points
-
-            # Crear scatter plot
-            self.scatter = ax.scatter(
-                df['change'],
-                df['turnover'],
-                s=normalized_sizes,
-                c=face_colors_list,     # Se usa la lista de colores de relleno
-                alpha=0.7,
-                edgecolors=edge_colors_list, # Se usa la lista de colores de borde
-                linewidth=linewidths_list    # Se usa la lista de anchos de borde
-            )
-
-            # Agregar etiquetas para puntos importantes
-            for idx, row in df.iterrows():
-                if len(df) <= 15 or row['turnover'] > df['turnover'].quantile(0.75):
-                    ax.annotate(
-                        row['symbol'],
-                        (row['change'], row['turnover']),
-                        xytext=(5, 5),
-                        textcoords='offset points',
-                        fontsize=8,
-                        color='white',
-                        weight='regular'
-                    )
-
-            # Configurar ejes
-            ax.set_xlabel('Variación Diaria (%)', fontsize=12, color='white')
-            ax.set_ylabel('Volumen Operado', fontsize=12, color='white')
-            ax.set_title(f'{title}\n(Click en tabla para resaltar símbolo)',
-                        fontsize=14, color='white', pad=20)
-
-            # Formatear eje Y
-            ax.yaxis.set_major_formatter(plt.FuncFormatter(
-                lambda x, p: f'{x/1e6:.1f}M' if x >= 1e6 else f'{x/1e3:.0f}K' if x >= 1000 else f'{x:.0f}'
-            ))
-
-            # Líneas de referencia
-            ax.axvline(x=0, color='white', linestyle='--', alpha=0.3)
-            if len(df) > 0:
-                ax.axhline(y=df['turnover'].median(), color='yellow', linestyle='--', alpha=0.3)
-
-            # Grilla
-            ax.grid(True, alpha=0.3, color='white')
-
-            # Guardar límites originales para zoom
-            self.original_xlim = ax.get_xlim()
-            self.original_ylim = ax.get_ylim()
-
-            # Ajustar layout
-            self.figure.tight_layout()
-            self.update_scrollbars()
-            self.canvas.draw_idle()
-
-        except Exception as e:
-            print(f"Error creando gráfico: {e}")
-            ax.text(0.5, 0.5, f'Error: {str(e)}',
-                   ha='center', va='center', transform=ax.transAxes,
-                   fontsize=12, color='red')
-            self.canvas.draw_idle()
+    def plot_bubble_chart(self, payload, title, diff=None, reuse=False):
+        """
+        Crear gráfico de burbujas con funcionalidad de zoom y scroll.
+
+        Con `diff` (ver diff_panels) las burbujas se animan desde sus
+        posiciones y tamaños anteriores. Con `reuse` se actualizan los
+        elementos ya dibujados en lugar de reconstruir la figura (scrubber).
+        """
+        self.stop_transition(finish=False)
+        self.df = payload.plot_data # Guardar para referencia
+        self.payload = payload
+        self.title = title
+        self.highlighted_index = None
+        self.emphasis_mask = None
+        self.search_mask = None
+        self.alert_mask = None
+        self.build_range_index()
+
+        limits = self.backend.update_payload(payload, title) if reuse else self.backend.draw_payload(payload, title)
+        if limits is None:
+            return
+        # La selección se conserva por símbolo entre actualizaciones
+        self.selection_mask = self.symbols_mask(self.selected_symbols)
+        self.update_emphasis(redraw=False)
+
+        # Guardar límites originales para zoom
+        self.original_xlim, self.original_ylim = limits
+        self.update_scrollbars()
+
+        # En pestañas ocultas no tiene sentido animar
+        if diff is not None and self.isVisible():
+            self.start_transition(diff)
+
+    def start_transition(self, diff):
+        """Animar desde el estado anterior: las burbujas nuevas crecen y las que salieron se achican"""
+        end = (self.df['change'].to_numpy(dtype=float), self.df['turnover'].to_numpy(dtype=float),
+               np.asarray(self.payload.sizes, dtype=float))
+        previous = diff.previous_points
+        if len(previous) != len(end[0]):
+            return
+        known = ~np.isnan(previous[:, 0])
+        start = (np.where(known, previous[:, 0], end[0]),
+                 np.where(known, previous[:, 1], end[1]),
+                 np.where(known, previous[:, 2], 0.0))
+        if not len(diff.left_points) and all(np.array_equal(a, b) for a, b in zip(start, end)):
+            return
 
+        self.transition = {
+            'start': start, 'end': end,
+            'ghosts': diff.left_points, 'ghost_colors': diff.left_colors,
+            'started': time.perf_counter(), 'frames': 0, 'slowest_ms': 0.0,
+        }
+        self.render_transition_frame(0.0)
+        self.transition_timer.start(self.FRAME_BUDGET_MS)
+
+    def advance_transition(self):
+        """
+        Dibujar el cuadro que corresponde al tiempo transcurrido.
+
+        La interpolación es por tiempo, así que si un cuadro se pasa del
+        presupuesto los intermedios simplemente se saltean; si un solo
+        cuadro ya consume buena parte de la transición, se salta al final.
+        """
+        if self.transition is None:
+            return
+        progress = (time.perf_counter() - self.transition['started']) * 1000 / self.TRANSITION_MS
+        if progress >= 1.0 or self.transition['slowest_ms'] > self.TRANSITION_MS / 3:
+            self.stop_transition()
+            return
+        self.render_transition_frame(progress)
+
+    def render_transition_frame(self, progress):
+        transition = self.transition
+        eased = progress * progress * (3 - 2 * progress)  # smoothstep
+        x, y, sizes = (start + (end - start) * eased for start, end in zip(transition['start'], transition['end']))
+        ghosts = None
+        if len(transition['ghosts']):
+            ghosts = transition['ghosts'].copy()
+            ghosts[:, 2] *= 1.0 - eased
+            ghosts = (ghosts, transition['ghost_colors'])
+
+        frame_started = time.perf_counter()
+        self.backend.set_points(x, y, sizes, ghosts)
+        self.backend.draw_now()
+        transition['frames'] += 1
+        transition['slowest_ms'] = max(transition['slowest_ms'], (time.perf_counter() - frame_started) * 1000)
+
+    def stop_transition(self, finish=True):
+        """Terminar la transición en curso (dejando las burbujas en su estado final)"""
+        if self.transition is None:
+            return
+        self.transition_timer.stop()
+        transition, self.transition = self.transition, None
+        elapsed_ms = (time.perf_counter() - transition['started']) * 1000
+        self.transition_stats = {
+            'frames': transition['frames'],
+            'skipped': max(0, int(elapsed_ms / self.FRAME_BUDGET_MS) + 1 - transition['frames']),
+            'elapsed_ms': elapsed_ms,
+            'slowest_ms': transition['slowest_ms'],
+        }
+        if finish:
+            self.backend.set_points(*transition['end'])
+            self.backend.redraw()
 
-            
     # --- NUEVO MÉTODO: Para resaltar un símbolo en el gráfico ---
     def highlight_symbol(self, symbol_to_highlight):
         """Resalta un punto en el gráfico correspondiente al símbolo."""
-        if self.scatter is None or self.df is None:
+        if self.df is None or self.df.empty:
             return
 
-        # 1. Resetear el punto previamente resaltado
-        if self.highlighted_info is not None:
-            idx = self.highlighted_info['index']
-            edgecolors = self.scatter.get_edgecolors()
-            linewidths = self.scatter.get_linewidths()
-            
-            if idx < len(edgecolors):
-                edgecolors[idx] = self.highlighted_info['edgecolor']
-                linewidths[idx] = self.highlighted_info['linewidth']
-                self.scatter.set_edgecolors(edgecolors)
-                self.scatter.set_linewidths(linewidths)
-            
-            self.highlighted_info = None
-
-        # 2. Encontrar y resaltar el nuevo punto
+        index = None
         if symbol_to_highlight:
-            matches = self.df.index[self.df['symbol'] == symbol_to_highlight].tolist()
-            if not matches:
-                self.canvas.draw_idle()
-                return
-            
-            idx_to_highlight = matches[0]
-
-            edgecolors = self.scatter.get_edgecolors()
-            linewidths = self.scatter.get_linewidths()
-            facecolors = self.scatter.get_facecolors()
-
-            # Guardar propiedades originales antes de cambiarlas
-            self.highlighted_info = {
-                'index': idx_to_highlight,
-                'edgecolor': edgecolors[idx_to_highlight].copy(),
-                'linewidth': linewidths[idx_to_highlight]
-            }
-            
-            # Determinar el color de resaltado según el color de la burbuja
-            current_face_color = facecolors[idx_to_highlight]
-            green_rgba = QColor('#44ff44').getRgbF()
-            red_rgba = QColor('#ff4444').getRgbF()
-            
-            new_edge_color = 'yellow'  # Color por defecto
-            if np.allclose(current_face_color, green_rgba, atol=0.1):
-                new_edge_color = "#043B04"  # Verde Oscuro
-            elif np.allclose(current_face_color, red_rgba, atol=0.1):
-                new_edge_color = "#3F0505"  # Rojo Oscuro
-            
-            edgecolors[idx_to_highlight] = QColor(new_edge_color).getRgbF()
-            linewidths[idx_to_highlight] = 3.0
-
-            self.scatter.set_edgecolors(edgecolors)
-            self.scatter.set_linewidths(linewidths)
-
-        self.canvas.draw_idle()
-
-
-    def prepare_data(self, df):
-        """Preparar datos para graficar"""
-        try:
-            data = df.copy()
-
-            # Mapear columnas comunes
-            column_mapping = {
-                'ticker': 'symbol',
-                'simbolo': 'symbol',
-                'precio': 'price',
-                'turnover': 'turnover',
-                'variacion': 'change',
-                'var': 'change',
-                'cambio': 'change',
-                'pct_change': 'change'
-            }
-
-            for old_col, new_col in column_mapping.items():
-                if old_col in data.columns and new_col not in data.columns:
-                    data[new_col] = data[old_col]
-
-            # Verificar que tenemos las columnas necesarias
-            if 'symbol' not in data.columns:
-                if data.index.name:
-                    data['symbol'] = data.index
-                else:
-                    data['symbol'] = [f'INST_{i}' for i in range(len(data))]
+            matches = np.flatnonzero(self.df['symbol'].to_numpy() == symbol_to_highlight)
+            if len(matches):
+                index = int(matches[0])
 
-            if 'turnover' not in data.columns:
-                # Intentar encontrar una columna de turnover
-                vol_cols = [col for col in data.columns if 'vol' in col.lower()]
-                if vol_cols:
-                    data['turnover'] = pd.to_numeric(data[vol_cols[0]], errors='coerce')
-                else:
-                    data['turnover'] = np.random.randint(1000, 100000, len(data))
+        self.highlighted_index = index
+        self.backend.set_highlight(index)
+        self.backend.redraw()
 
-            if 'change' not in data.columns:
-                # Intentar encontrar una columna de variación
-                change_cols = [col for col in data.columns if any(word in col.lower() for word in ['var', 'change', 'pct', 'cambio'])]
-                if change_cols:
-                    data['change'] = pd.to_numeric(data[change_cols[0]], errors='coerce')
-                else:
-                    data['change'] = np.random.uniform(-5, 5, len(data))
+    def set_emphasis(self, symbols):
+        """
+        Destaca las burbujas de los símbolos dados y atenúa el resto.
 
-            # Limpiar datos
-            data = data.dropna(subset=['symbol'])
-            data['turnover'] = pd.to_numeric(data['turnover'], errors='coerce')
-            data['change'] = pd.to_numeric(data['change'], errors='coerce')
-            data = data.dropna(subset=['turnover', 'change'])
+        Con symbols=None se vuelve al aspecto normal del gráfico.
+        """
+        if self.df is None or self.df.empty:
+            return
+        if symbols is None and self.search_mask is None:
+            return
+        self.search_mask = self.symbols_mask(symbols)
+        self.update_emphasis()
 
-            return data[['symbol', 'turnover', 'change']]
+    def symbols_mask(self, symbols):
+        """Máscara de las burbujas de los símbolos dados (None si symbols es None)"""
+        if symbols is None or self.df is None:
+            return None
+        return np.isin(self.df['symbol'].to_numpy(), np.asarray(list(symbols), dtype=object))
 
-        except Exception as e:
-            print(f"Error preparando datos: {e}")
+    def update_emphasis(self, redraw=True):
+        """Aplicar el énfasis combinado de la búsqueda y la selección"""
+        masks = [mask for mask in (self.search_mask, self.selection_mask) if mask is not None]
+        emphasis = np.logical_and.reduce(masks) if masks else None
+        if emphasis is None and self.emphasis_mask is None:
+            return
+        self.emphasis_mask = emphasis
+        self.backend.set_emphasis(emphasis)
+        if redraw:
+            self.backend.redraw()
+
+    def set_select_mode(self, enabled):
+        """Activar o desactivar la selección por rectángulo (al desactivarla se borra)"""
+        self.select_mode = enabled
+        self.select_button.setChecked(enabled)
+        self.backend.set_select_mode(enabled)
+        if not enabled:
+            self.set_selection(None)
+
+    def build_range_index(self):
+        """Ordenar las burbujas por variación para responder consultas por rectángulo"""
+        if self.df is None or self.df.empty:
+            self.range_order = np.empty(0, dtype=np.int64)
+            self.range_x = self.range_y = np.empty(0)
+            return
+        x = self.df['change'].to_numpy(dtype=float)
+        self.range_order = np.argsort(x, kind='stable')
+        self.range_x = x[self.range_order]
+        self.range_y = self.df['turnover'].to_numpy(dtype=float)[self.range_order]
+
+    def select_range(self, x0, x1, y0, y1):
+        """
+        Seleccionar las burbujas cuyo centro cae en el rectángulo.
+
+        La variación se resuelve con búsqueda binaria sobre el índice
+        ordenado y el volumen se filtra solo dentro de esa franja.
+        """
+        if None in (x0, x1, y0, y1):
+            return
+        (x_low, x_high), (y_low, y_high) = sorted((x0, x1)), sorted((y0, y1))
+        start = np.searchsorted(self.range_x, x_low, side='left')
+        stop = np.searchsorted(self.range_x, x_high, side='right')
+        band = self.range_y[start:stop]
+        rows = self.range_order[start:stop][(band >= y_low) & (band <= y_high)]
+        self.set_selection(np.sort(rows))
+
+    def set_selection(self, rows):
+        """Seleccionar las burbujas de las filas dadas de plot_data (None o vacío: borrar)"""
+        if rows is None or not len(rows) or self.df is None:
+            if self.selected_symbols is None:
+                return
+            self.selected_symbols = None
+            self.selection_mask = None
+        else:
+            symbols = self.df['symbol'].to_numpy()[rows]
+            self.selected_symbols = tuple(dict.fromkeys(symbols.tolist()))
+            self.selection_mask = np.zeros(len(self.df), dtype=bool)
+            self.selection_mask[rows] = True
+        self.update_emphasis()
+        self.selection_changed.emit(self.selected_symbols)
+
+    def set_alerts(self, symbols):
+        """Marcar las burbujas de los símbolos con alertas activas (vacío o None para quitar)"""
+        if self.df is None or self.df.empty:
+            return
+        symbols = np.asarray(list(symbols if symbols is not None else ()), dtype=object)
+        if not len(symbols) and self.alert_mask is None:
+            return
+        mask = np.isin(self.df['symbol'].to_numpy(), symbols)
+        self.alert_mask = mask if mask.any() else None
+        self.backend.set_alert_mask(self.alert_mask)
+        self.backend.redraw()
+
+    def render_state(self):
+        """
+        Parte de la clave de la RenderCache común a los backends.
+
+        Identifica los datos (panel, instante y origen del payload), el
+        título y lo destacado. Es None durante una transición y mientras se
+        hace zoom o pan fuera de la vista original: esos cuadros no vuelven a
+        repetirse, y guardarlos solo costaría una copia por cuadro y
+        desalojaría las imágenes de las otras pestañas.
+        """
+        if self.render_cache is None or self.payload is None or self.transition is not None:
             return None
+        if self.view_settle_timer.isActive() and not self.at_original_view():
+            return None
+        payload = self.payload
+        return (payload.data_type, payload.timestamp, payload.stale, len(self.df), self.title,
+                self.highlighted_index, mask_key(self.emphasis_mask), mask_key(self.alert_mask))
+
+    def at_original_view(self):
+        if self.original_xlim is None or self.original_ylim is None:
+            return False
+        xlim, ylim = self.get_view()
+        return (tuple(xlim) == tuple(self.original_xlim)) and (tuple(ylim) == tuple(self.original_ylim))
 
     def update_scrollbars(self):
         """Actualiza el rango y posición de las barras de desplazamiento."""
-        ax = self.figure.gca()
-        if ax is None or self.original_xlim is None or self.original_ylim is None:
+        if self.original_xlim is None or self.original_ylim is None:
             return
 
-        current_xlim = ax.get_xlim()
-        current_ylim = ax.get_ylim()
+        current_xlim, current_ylim = self.get_view()
 
         # Horizontal Scrollbar
         original_width = self.original_xlim[1] - self.original_xlim[0]
@@ -583,11 +3743,12 @@ class PlotWidget(QWidget):
 
         if original_width > 0 and current_width > 0:
             h_range = original_width - current_width
-            if h_range > 0:
+            # Con el mismo ancho que el original (pan sin zoom) la diferencia es solo ruido de redondeo
+            if h_range > original_width * 1e-9:
                 h_value = (current_xlim[0] - self.original_xlim[0]) / h_range * 1000
                 self.h_scrollbar.blockSignals(True)
                 self.h_scrollbar.setRange(0, 1000)
-                self.h_scrollbar.setValue(int(h_value))
+                self.h_scrollbar.setValue(int(min(max(h_value, 0), 1000)))
                 self.h_scrollbar.setPageStep(int(current_width / original_width * 1000))
                 self.h_scrollbar.blockSignals(False)
                 self.h_scrollbar.setEnabled(True)
@@ -602,12 +3763,12 @@ class PlotWidget(QWidget):
 
         if original_height > 0 and current_height > 0:
             v_range = original_height - current_height
-            if v_range > 0:
+            if v_range > original_height * 1e-9:
                 # Invertir para que el valor de la barra de desplazamiento coincida con la visualización
                 v_value = (self.original_ylim[1] - current_ylim[1]) / v_range * 1000
                 self.v_scrollbar.blockSignals(True)
                 self.v_scrollbar.setRange(0, 1000)
-                self.v_scrollbar.setValue(int(v_value))
+                self.v_scrollbar.setValue(int(min(max(v_value, 0), 1000)))
                 self.v_scrollbar.setPageStep(int(current_height / original_height * 1000))
                 self.v_scrollbar.blockSignals(False)
                 self.v_scrollbar.setEnabled(True)
@@ -618,66 +3779,311 @@ class PlotWidget(QWidget):
 
     def h_scroll_plot(self, value):
         """Maneja el desplazamiento horizontal del gráfico."""
-        ax = self.figure.gca()
-        if ax is None or self.original_xlim is None:
+        if self.original_xlim is None:
             return
 
         original_width = self.original_xlim[1] - self.original_xlim[0]
-        current_xlim = ax.get_xlim()
+        current_xlim, current_ylim = self.get_view()
         current_width = current_xlim[1] - current_xlim[0]
 
         if original_width > 0 and original_width > current_width:
             h_range = original_width - current_width
             new_x_start = self.original_xlim[0] + (value / 1000.0) * h_range
-            ax.set_xlim(new_x_start, new_x_start + current_width)
-            self.canvas.draw_idle()
+            self.view_settle_timer.start(self.VIEW_SETTLE_MS)
+            self.backend.set_view((new_x_start, new_x_start + current_width), current_ylim)
+            self.backend.redraw()
 
     def v_scroll_plot(self, value):
         """Maneja el desplazamiento vertical del gráfico."""
-        ax = self.figure.gca()
-        if ax is None or self.original_ylim is None:
+        if self.original_ylim is None:
             return
 
         original_height = self.original_ylim[1] - self.original_ylim[0]
-        current_ylim = ax.get_ylim()
+        current_xlim, current_ylim = self.get_view()
         current_height = current_ylim[1] - current_ylim[0]
 
         if original_height > 0 and original_height > current_height:
             v_range = original_height - current_height
             # Invertir para que el valor de la barra de desplazamiento coincida con la visualización
             new_y_start = self.original_ylim[1] - (value / 1000.0) * v_range - current_height
-            ax.set_ylim(new_y_start, new_y_start + current_height)
-            self.canvas.draw_idle()
+            self.view_settle_timer.start(self.VIEW_SETTLE_MS)
+            self.backend.set_view(current_xlim, (new_y_start, new_y_start + current_height))
+            self.backend.redraw()
 
-class NumericTableWidgetItem(QTableWidgetItem):
+class PanelTableModel(QAbstractTableModel):
     """
-    Un QTableWidgetItem personalizado que permite un ordenamiento numérico correcto.
+    Modelo de tabla respaldado por un PanelPayload.
+
+    Los textos, colores y valores numéricos llegan precalculados desde el
+    worker; el modelo solo los expone a la vista.
     """
-    def __init__(self, text):
-        super().__init__(text)
-        self.value = None
-        try:
-            # Intenta convertir el texto a un número flotante para la comparación
-            self.value = float(text)
-        except (ValueError, TypeError):
-            # Si falla, se tratará como texto
-            pass
 
-    def __lt__(self, other):
-        # Sobrescribe el operador 'less than' para la clasificación
-        if self.value is not None and hasattr(other, 'value') and other.value is not None:
-            # Si ambos ítems tienen valores numéricos, compáralos
-            return self.value < other.value
-        # De lo contrario, utiliza la comparación de texto predeterminada
-        return self.text() < other.text()
+    POSITIVE_BACKGROUND = QColor(68, 255, 68, 50)
+    NEGATIVE_BACKGROUND = QColor(255, 68, 68, 50)
+    ALERT_BACKGROUND = QColor(255, 165, 0, 70)
+    # Destello de las celdas que cambiaron en la última actualización
+    FLASH_MS = 900
+    FLASH_INTERVAL_MS = 60
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.payload = None
+        self.order = np.arange(0)
+        # Orden elegido por el usuario; se conserva entre actualizaciones
+        self.sort_column_name = None
+        self.sort_order = Qt.AscendingOrder
+        # Filtros activos: nombre -> máscara booleana sobre las filas del payload
+        self.filters = {}
+        # Filas con alertas activas (máscara sobre las filas del payload) o None
+        self.alert_mask = None
+        # Celdas que destellan (máscara filas x columnas del payload) y su intensidad
+        self.flash_cells = None
+        self.flash_level = 0.0
+        self.flash_started = 0.0
+        self.flash_timer = QTimer(self)
+        self.flash_timer.timeout.connect(self.advance_flash)
+
+    def set_payload(self, payload, changed_cells=None):
+        """
+        Intercambiar los datos del modelo por un nuevo payload, conservando el orden.
+
+        Con `changed_cells` (ver diff_cells) y las mismas columnas y los mismos
+        símbolos en cada fila, no se resetea el modelo: solo se avisa de las
+        celdas que cambiaron, que además destellan unos instantes.
+        """
+        incremental = (changed_cells is not None and self.payload is not None and not self.filters
+                       and payload.headers == self.payload.headers
+                       and payload.unique_symbols == self.payload.unique_symbols
+                       and np.array_equal(payload.symbol_ranks, self.payload.symbol_ranks))
+        if incremental:
+            order = self.visible_order(payload)
+            reordered = not np.array_equal(order, self.order)
+            if reordered:
+                self.layoutAboutToBeChanged.emit()
+            self.payload = payload
+            self.order = order
+            if reordered:
+                self.layoutChanged.emit()
+        else:
+            self.beginResetModel()
+            self.payload = payload
+            self.filters = {}  # Las máscaras dependen del payload; se vuelven a aplicar
+            self.alert_mask = None
+            self.order = self.visible_order()
+            self.endResetModel()
+        self.start_flash(changed_cells)
+
+    def start_flash(self, changed_cells):
+        """Hacer destellar las celdas cambiadas, apagándose de a poco"""
+        self.flash_cells = changed_cells if changed_cells is not None and changed_cells.any() else None
+        if self.flash_cells is None:
+            self.flash_timer.stop()
+            self.flash_level = 0.0
+            return
+        self.flash_level = 1.0
+        self.flash_started = time.monotonic()
+        self.flash_timer.start(self.FLASH_INTERVAL_MS)
+        self.emit_flash_changed()
+
+    def advance_flash(self):
+        self.flash_level = max(0.0, 1.0 - (time.monotonic() - self.flash_started) * 1000 / self.FLASH_MS)
+        self.emit_flash_changed()
+        if self.flash_level == 0.0:
+            self.flash_timer.stop()
+            self.flash_cells = None
+
+    def emit_flash_changed(self):
+        """dataChanged solo para el tramo de columnas que cambió en cada fila visible"""
+        if self.flash_cells is None or not len(self.order):
+            return
+        visible = self.flash_cells[self.order]
+        for row in np.flatnonzero(visible.any(axis=1)):
+            columns = np.flatnonzero(visible[row])
+            self.dataChanged.emit(self.index(row, columns[0]), self.index(row, columns[-1]),
+                                  [Qt.BackgroundRole])
+
+    def set_filter(self, name, mask):
+        """Aplicar (o quitar, con mask=None) un filtro de filas"""
+        if mask is None and name not in self.filters:
+            return
+        self.beginResetModel()
+        if mask is None:
+            self.filters.pop(name, None)
+        else:
+            self.filters[name] = mask
+        self.order = self.visible_order()
+        self.endResetModel()
+
+    def set_alert_mask(self, mask):
+        """Resaltar las filas con alertas activas (None para quitar el resaltado)"""
+        if self.payload is None:
+            return
+        previous = self.alert_mask if self.alert_mask is not None else np.zeros(len(self.payload.cells), dtype=bool)
+        self.alert_mask = mask if mask is not None and mask.any() else None
+        current = self.alert_mask if self.alert_mask is not None else np.zeros(len(self.payload.cells), dtype=bool)
+        # Repintar solo las filas visibles cuyo resaltado cambió
+        last_column = self.columnCount() - 1
+        for row in np.flatnonzero((previous != current)[self.order]):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last_column),
+                                  [Qt.BackgroundRole, Qt.FontRole])
+
+    def visible_order(self, payload=None):
+        """Filas visibles, en el orden actual"""
+        order = self.sorted_order(payload)
+        for mask in self.filters.values():
+            order = order[mask[order]]
+        return order
+
+    def sorted_order(self, payload=None):
+        """Permutación de filas según el orden actual (del payload actual o del dado)"""
+        payload = payload if payload is not None else self.payload
+        if payload is None:
+            return np.arange(0)
+        if self.sort_column_name not in payload.headers:
+            return np.arange(len(payload.cells))
+
+        column = payload.headers.index(self.sort_column_name)
+        keys = payload.sort_keys[:, column]
+        groups = payload.sort_groups[:, column]
+        # np.lexsort ordena por la última clave; el símbolo desempata de forma estable.
+        # En los dos sentidos los números van antes que los textos (y que los NaN)
+        if self.sort_order == Qt.DescendingOrder:
+            return np.lexsort((payload.symbol_ranks, -keys, groups))
+        return np.lexsort((payload.symbol_ranks, keys, groups))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.payload is None:
+            return 0
+        return len(self.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.payload is None:
+            return 0
+        return len(self.payload.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.payload is None:
+            return None
+        row = self.order[index.row()]
+        if role == Qt.DisplayRole:
+            return self.payload.cells[row, index.column()]
+        alerted = self.alert_mask is not None and self.alert_mask[row]
+        if role == Qt.BackgroundRole:
+            if self.flash_level > 0 and self.flash_cells is not None and self.flash_cells[row, index.column()]:
+                return QColor(255, 215, 0, int(150 * self.flash_level))
+            sign = self.payload.cell_signs[row, index.column()]
+            if sign > 0:
+                return self.POSITIVE_BACKGROUND
+            if sign < 0:
+                return self.NEGATIVE_BACKGROUND
+            if alerted:
+                return self.ALERT_BACKGROUND
+        if role == Qt.FontRole and alerted:
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or self.payload is None:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.payload.headers[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Ordenar con las claves precalculadas (números primero, luego texto)"""
+        if self.payload is None or not 0 <= column < len(self.payload.headers):
+            return
+        self.sort_column_name = self.payload.headers[column]
+        self.sort_order = order
+
+        self.layoutAboutToBeChanged.emit()
+        self.order = self.visible_order()
+        self.layoutChanged.emit()
+
+    def symbol_at(self, row):
+        """Devuelve el símbolo de una fila visible, o None"""
+        if self.payload is None or not 0 <= row < len(self.order):
+            return None
+        headers = [header.lower() for header in self.payload.headers]
+        for name in ['symbol', 'ticker', 'simbolo']:
+            if name in headers:
+                return self.payload.cells[self.order[row], headers.index(name)]
+        return None
+
+class ToastNotifier:
+    """Avisos no modales apilados en la esquina inferior derecha de una ventana"""
+
+    DURATION_MS = 6000
+    MAX_VISIBLE = 4
+
+    def __init__(self, window):
+        self.window = window
+        self.toasts = []
+
+    def show(self, text):
+        toast = QLabel(text, self.window)
+        toast.setWordWrap(True)
+        toast.setFixedWidth(320)
+        toast.setStyleSheet(f"""
+            background-color: rgba(40, 40, 40, 230);
+            color: white;
+            border: 1px solid {ALERT_COLOR};
+            border-radius: 6px;
+            padding: 8px;
+        """)
+        toast.mousePressEvent = lambda event: self.dismiss(toast)  # Click para cerrar
+        toast.adjustSize()
+        toast.show()
+        toast.raise_()
+        self.toasts.append(toast)
+        while len(self.toasts) > self.MAX_VISIBLE:
+            self.dismiss(self.toasts[0])
+        QTimer.singleShot(self.DURATION_MS, lambda: self.dismiss(toast))
+        self.reposition()
+
+    def dismiss(self, toast):
+        if toast not in self.toasts:
+            return
+        self.toasts.remove(toast)
+        toast.hide()
+        toast.deleteLater()
+        self.reposition()
+
+    def reposition(self):
+        status_bar = self.window.statusBar()
+        bottom = self.window.height() - (status_bar.height() if status_bar else 0) - 12
+        for toast in reversed(self.toasts):
+            bottom -= toast.height()
+            toast.move(self.window.width() - toast.width() - 16, bottom)
+            bottom -= 8
 
 class SHDAHomeBrokerApp(QMainWindow):
     """Aplicación principal"""
 
-    def __init__(self):
+    # Tiempo máximo de espera al cancelar el worker (cierre o actualización manual)
+    WORKER_STOP_TIMEOUT_MS = 2000
+    # Ídem para la exportación al cerrar (un guardado de matplotlib no se puede interrumpir)
+    EXPORT_STOP_TIMEOUT_MS = 3000
+    # Presupuesto de llamados al broker: tokens por segundo y ráfaga máxima
+    REQUEST_RATE = 3.0
+    REQUEST_BURST = 12.0
+    # Payloads del historial reconstruidos que se conservan para recorrerlo rápido
+    REPLAY_CACHE_SIZE = 64
+    # Memoria máxima de la caché de imágenes de los gráficos (compartida por todos los paneles)
+    RENDER_CACHE_MB = 64
+
+    def __init__(self, client_factory=None, data_dir=None, collector_address=None, collector_key=None):
         super().__init__()
 
         # Configuración de conexión
+        self.client_factory = client_factory
+        # Con un collector (ver PanelCollector) los datos llegan de él y no se habla con SHDA
+        self.collector_address = collector_address
+        if collector_address is not None and collector_key is None:
+            collector_key = collector_authkey(data_dir)
+        self.collector_key = collector_key
         self.host = 123
         self.dni = "12345678"
         self.user = "nnnnnnnnn"
@@ -694,14 +4100,50 @@ class SHDAHomeBrokerApp(QMainWindow):
             'cedears': None,
             'short_term_bonds': None,
         }
+        self.payloads = {}
+        self.market_breadth = MarketBreadth()
+        # Watchlist persistente armada con los paneles ya descargados
+        self.watchlist_path = os.path.join(data_dir or APP_DATA_DIR, 'watchlist.json')
+        self.watchlist = Watchlist(load_watchlist(self.watchlist_path), [key for key, _, _ in PANEL_FETCHERS])
+        self.watchlist_payload = None
+        # Historial de la sesión para el scrubber; los paneles en `replay_positions`
+        # muestran una actualización pasada (índice en el historial) en vez de la última
+        self.history = SnapshotHistory()
+        self.replay_positions = {}
+        self.replay_cache = OrderedDict()
+        self.pending_scrub = None
+        # Última máscara de filas y símbolos en alerta por panel, para volver a "en vivo"
+        self.alert_state = {}
+        # Imágenes ya dibujadas de los gráficos, para no redibujar lo que no cambió
+        self.render_cache = RenderCache(self.RENDER_CACHE_MB * 1024 * 1024)
 
         # Worker y timer
         self.worker = None
+        # Circuit breakers por (panel, plazo); los crea el worker a demanda
+        self.circuit_breakers = {}
+        # Planificador compartido por todos los workers: presupuesto global de llamados a SHDA
+        self.request_scheduler = RequestScheduler(rate=self.REQUEST_RATE, burst=self.REQUEST_BURST)
+        self.snapshot_cache = SnapshotCache(os.path.join(data_dir, 'cache') if data_dir else None)
+        # Reglas de alerta del usuario, compiladas una sola vez
+        self.alert_engine = AlertEngine(load_alert_rules(os.path.join(data_dir or APP_DATA_DIR, 'alerts.json')))
+        self.export_worker = None
+        # Exportaciones canceladas que siguen en un guardado bloqueante (ver stop_export_worker)
+        self.abandoned_workers = []
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.fetch_data)
 
         self.setup_ui()
         self.setup_styles()
+        self.toasts = ToastNotifier(self)
+        if collector_address is not None:
+            # Los plazos y el ritmo de actualización los define el collector
+            for checkbox in self.settlement_checkboxes.values():
+                checkbox.setEnabled(False)
+            self.setWindowTitle(f"Análisis de Mercado - collector {collector_address[0]}:{collector_address[1]}")
+
+        self.update_watchlist_view()
+        # Mostrar la última instantánea guardada mientras llegan los datos en vivo
+        self.load_cached_snapshots()
 
         # Fetch inicial
         self.fetch_data()
@@ -734,6 +4176,49 @@ class SHDAHomeBrokerApp(QMainWindow):
         self.interval_spinbox.setRange(1, 60)
         self.interval_spinbox.setValue(3)
 
+        # Exportación
+        self.export_btn = QPushButton("💾 Exportar")
+        export_menu = QMenu(self.export_btn)
+        self.export_format_actions = {}
+        for fmt, label in [('csv', 'CSV'), ('parquet', 'Parquet'), ('excel', 'Excel'),
+                           ('png', 'Gráficos PNG'), ('svg', 'Gráficos SVG'),
+                           ('pdf', 'Reporte PDF')]:
+            action = QAction(label, export_menu, checkable=True)
+            action.setChecked(fmt in ('csv', 'png'))
+            export_menu.addAction(action)
+            self.export_format_actions[fmt] = action
+        export_menu.addSeparator()
+        export_menu.addAction("Exportar panel actual...", lambda: self.export_data(all_panels=False))
+        export_menu.addAction("Exportar todos los paneles...", lambda: self.export_data(all_panels=True))
+        export_menu.addAction("Exportar historial del gráfico actual...", self.export_history)
+        self.export_btn.setMenu(export_menu)
+
+        # Plazos de liquidación
+        settlement_label = QLabel("Plazos:")
+        settlement_label.setStyleSheet("color: #cccccc; font-style: regular;")
+        self.settlement_checkboxes = {}
+        for settlement in SETTLEMENTS:
+            checkbox = QCheckBox(settlement)
+            checkbox.setStyleSheet("color: #cccccc; font-style: regular;")
+            checkbox.setChecked(settlement == '24hs')
+            checkbox.toggled.connect(self.on_settlements_changed)
+            self.settlement_checkboxes[settlement] = checkbox
+
+        # Búsqueda de símbolos
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔎 Buscar símbolo...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMaximumWidth(180)
+        self.search_all_checkbox = QCheckBox("Todos los paneles")
+        self.search_all_checkbox.setStyleSheet("color: #cccccc; font-style: regular;")
+
+        # Backend de dibujo de los gráficos
+        render_label = QLabel("Render:")
+        render_label.setStyleSheet("color: #cccccc; font-style: regular;")
+        self.render_backend_combo = QComboBox()
+        for name, backend in CHART_BACKENDS.items():
+            self.render_backend_combo.addItem(backend.label, name)
+
         # Info de zoom
         zoom_info = QLabel("💡 Click en tabla para seleccionar. Rueda del mouse para zoom.")
         zoom_info.setStyleSheet("color: #cccccc; font-style: regular;")
@@ -743,13 +4228,24 @@ class SHDAHomeBrokerApp(QMainWindow):
         control_layout.addWidget(self.auto_update_checkbox)
         control_layout.addWidget(interval_label)
         control_layout.addWidget(self.interval_spinbox)
+        control_layout.addWidget(settlement_label)
+        for checkbox in self.settlement_checkboxes.values():
+            control_layout.addWidget(checkbox)
+        control_layout.addWidget(self.export_btn)
+        control_layout.addWidget(self.search_edit)
+        control_layout.addWidget(self.search_all_checkbox)
+        control_layout.addWidget(render_label)
+        control_layout.addWidget(self.render_backend_combo)
         control_layout.addWidget(zoom_info)
         control_layout.addStretch()
 
         # Conectar eventos
-        self.fetch_btn.clicked.connect(self.fetch_data)
+        self.fetch_btn.clicked.connect(self.manual_refresh)
         self.auto_update_checkbox.toggled.connect(self.toggle_auto_update)
         self.interval_spinbox.valueChanged.connect(self.update_timer_interval)
+        self.search_edit.textChanged.connect(lambda _: self.apply_search())
+        self.search_all_checkbox.toggled.connect(lambda _: self.apply_search())
+        self.render_backend_combo.currentIndexChanged.connect(self.on_render_backend_changed)
 
         layout.addWidget(control_frame)
 
@@ -762,7 +4258,9 @@ class SHDAHomeBrokerApp(QMainWindow):
 
         # Crear tabs
         self.tables = {}
+        self.table_models = {}
         self.plot_widgets = {}
+        self.symbol_indexes = {}
 
         tab_configs = [
             ('bluechips', '🔵 Bluechips'),
@@ -771,30 +4269,130 @@ class SHDAHomeBrokerApp(QMainWindow):
             ('short_term_bonds', '🟣 Letras'),
             ('cedears', '🟠 CEDEARs')
             ]
+        self.tab_keys = [key for key, _ in tab_configs]
 
       
+        self.tab_titles = dict(tab_configs)
         for key, title in tab_configs:
             # Tabla
-            table = QTableWidget()
+            table = QTableView()
+            model = PanelTableModel(table)
+            table.setModel(model)
+            table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
             table.setSortingEnabled(True)
+            table.horizontalHeader().setResizeContentsPrecision(200)
             # --- NUEVA CONEXIÓN: Para la selección de items ---
-            table.cellClicked.connect(self.on_table_cell_clicked)
+            table.clicked.connect(lambda index, key=key: self.on_table_cell_clicked(key, index))
+            table.setContextMenuPolicy(Qt.CustomContextMenu)
+            table.customContextMenuRequested.connect(lambda pos, key=key: self.on_table_context_menu(key, pos))
             self.tables[key] = table
+            self.table_models[key] = model
             self.tab_widget.addTab(table, title)
 
+        # Comparación entre plazos del panel elegido
+        settlement_tab = QWidget()
+        settlement_layout = QVBoxLayout(settlement_tab)
+        self.settlement_panel_combo = QComboBox()
+        for key, title in tab_configs:
+            self.settlement_panel_combo.addItem(title, key)
+        self.settlement_panel_combo.currentIndexChanged.connect(lambda _: self.update_settlement_table())
+        self.settlement_info = QLabel("Seleccione CI y 24hs para comparar los plazos")
+        self.settlement_info.setStyleSheet("color: #cccccc; font-style: regular;")
+        self.settlement_table = QTableView()
+        self.settlement_model = PanelTableModel(self.settlement_table)
+        self.settlement_table.setModel(self.settlement_model)
+        self.settlement_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.settlement_table.setSortingEnabled(True)
+        settlement_layout.addWidget(self.settlement_panel_combo)
+        settlement_layout.addWidget(self.settlement_info)
+        settlement_layout.addWidget(self.settlement_table)
+        self.tab_widget.addTab(settlement_tab, "⚖️ Plazos")
+
+        # Watchlist: símbolos elegidos de cualquier panel
+        watchlist_tab = QWidget()
+        watchlist_layout = QVBoxLayout(watchlist_tab)
+        watchlist_controls = QHBoxLayout()
+        self.watchlist_edit = QLineEdit()
+        self.watchlist_edit.setPlaceholderText("Símbolo a seguir (p. ej. GGAL)")
+        self.watchlist_edit.returnPressed.connect(lambda: self.add_to_watchlist(self.watchlist_edit.text()))
+        add_button = QPushButton("➕ Agregar")
+        add_button.clicked.connect(lambda: self.add_to_watchlist(self.watchlist_edit.text()))
+        remove_button = QPushButton("➖ Quitar")
+        remove_button.setToolTip("Quitar de la watchlist el símbolo de la fila seleccionada")
+        remove_button.clicked.connect(self.remove_selected_from_watchlist)
+        watchlist_controls.addWidget(self.watchlist_edit, 1)
+        watchlist_controls.addWidget(add_button)
+        watchlist_controls.addWidget(remove_button)
+        self.watchlist_info = QLabel()
+        self.watchlist_info.setStyleSheet("color: #cccccc;")
+        self.watchlist_table = QTableView()
+        self.watchlist_model = PanelTableModel(self.watchlist_table)
+        self.watchlist_table.setModel(self.watchlist_model)
+        self.watchlist_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.watchlist_table.setSortingEnabled(True)
+        self.watchlist_table.setSelectionBehavior(QTableView.SelectRows)
+        self.watchlist_table.clicked.connect(
+            lambda index: self.watchlist_plot.highlight_symbol(self.watchlist_model.symbol_at(index.row())))
+        watchlist_layout.addLayout(watchlist_controls)
+        watchlist_layout.addWidget(self.watchlist_info)
+        watchlist_layout.addWidget(self.watchlist_table)
+        self.tab_widget.addTab(watchlist_tab, "⭐ Watchlist")
+
+        self.tab_widget.currentChanged.connect(lambda _: self.apply_search())
+        self.tab_widget.currentChanged.connect(lambda _: self.request_scheduler.set_focus(self.current_table_key()))
         splitter.addWidget(self.tab_widget)
 
         # Tab widget para gráficos
         self.plot_tab_widget = QTabWidget()
 
         for key, title in tab_configs:
-            plot_widget = PlotWidget()
+            plot_widget = PlotWidget(render_cache=self.render_cache)
+            plot_widget.selection_changed.connect(lambda _, key=key: self.on_plot_selection(key))
             self.plot_widgets[key] = plot_widget
             self.plot_tab_widget.addTab(plot_widget, title)
-
-        splitter.addWidget(self.plot_tab_widget)
+        self.watchlist_plot = PlotWidget(render_cache=self.render_cache)
+        self.plot_tab_widget.addTab(self.watchlist_plot, "⭐ Watchlist")
+
+        # Línea de tiempo bajo los gráficos para recorrer el historial de la sesión
+        plot_area = QWidget()
+        plot_area_layout = QVBoxLayout(plot_area)
+        plot_area_layout.setContentsMargins(0, 0, 0, 0)
+        plot_area_layout.addWidget(self.plot_tab_widget)
+
+        timeline_layout = QHBoxLayout()
+        timeline_layout.addWidget(QLabel("⏱ Historial:"))
+        self.timeline_slider = QSlider(Qt.Horizontal)
+        self.timeline_slider.setEnabled(False)
+        self.timeline_slider.setToolTip("Arrastrar para ver una actualización anterior del panel")
+        self.timeline_slider.valueChanged.connect(self.on_timeline_moved)
+        timeline_layout.addWidget(self.timeline_slider, 1)
+        self.timeline_label = QLabel("En vivo")
+        self.timeline_label.setMinimumWidth(170)
+        timeline_layout.addWidget(self.timeline_label)
+        self.live_button = QPushButton("● En vivo")
+        self.live_button.setEnabled(False)
+        self.live_button.clicked.connect(lambda: self.go_live())
+        timeline_layout.addWidget(self.live_button)
+        plot_area_layout.addLayout(timeline_layout)
+        self.plot_tab_widget.currentChanged.connect(lambda _: self.sync_timeline())
+
+        splitter.addWidget(plot_area)
         splitter.setSizes([400, 800])
 
+        # Franja de amplitud de mercado: un recuadro por panel y uno con el total
+        breadth_frame = QFrame()
+        breadth_layout = QHBoxLayout(breadth_frame)
+        breadth_layout.setContentsMargins(0, 0, 0, 0)
+        self.breadth_labels = {}
+        for key, title in tab_configs + [('total', '📊 Total')]:
+            label = QLabel(f"<b>{title}</b><br>Sin datos")
+            label.setStyleSheet("background-color: #2d2d2d; color: white; padding: 4px 8px; border-radius: 4px;")
+            label.setToolTip("▲ suben / ▼ bajan / = sin cambios · variación promedio ponderada por volumen\n"
+                             f"Volumen total · participación de los {MarketBreadth.TOP} mayores volúmenes")
+            breadth_layout.addWidget(label, 1)
+            self.breadth_labels[key] = label
+        layout.addWidget(breadth_frame)
+
         layout.addWidget(splitter)
 
         # Barra de estado
@@ -804,11 +4402,30 @@ class SHDAHomeBrokerApp(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         self.status_bar.addPermanentWidget(self.progress_bar)
+
+        self.export_progress_bar = QProgressBar()
+        self.export_progress_bar.setFormat("Exportando %p%")
+        self.export_progress_bar.setVisible(False)
+        self.status_bar.addPermanentWidget(self.export_progress_bar)
         self.status_bar.setStyleSheet("color: #cccccc; font-style: regular;") 
 
+        self.scheduler_label = QLabel()
+        self.status_bar.addPermanentWidget(self.scheduler_label)
+
+        self.render_cache_label = QLabel()
+        self.status_bar.addPermanentWidget(self.render_cache_label)
+
         self.connection_label = QLabel("Desconectado")
         self.status_bar.addPermanentWidget(self.connection_label)
 
+        # Métricas del planificador de llamados
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.timeout.connect(self.update_scheduler_metrics)
+        self.scheduler_timer.timeout.connect(self.update_render_cache_metrics)
+        self.scheduler_timer.start(1000)
+        self.update_scheduler_metrics()
+        self.update_render_cache_metrics()
+
         # Iniciar auto-actualización
         self.toggle_auto_update(True)
 
@@ -843,12 +4460,12 @@ class SHDAHomeBrokerApp(QMainWindow):
             QPushButton:hover {
                 background-color: #45a049;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d2d;
                 color: white;
                 gridline-color: #3d3d3d;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 4px;
             }
             QStatusBar {
@@ -912,11 +4529,19 @@ class SHDAHomeBrokerApp(QMainWindow):
         if self.worker and self.worker.isRunning():
             return
 
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.fetch_btn.setEnabled(False)
+        if self.collector_address is not None:
+            # Una sola conexión que queda abierta: el collector decide cuándo actualizar
+            self.worker = CollectorClientWorker(self.collector_address, self.collector_key)
+        else:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setValue(0)
+            self.request_scheduler.set_focus(self.current_table_key())
 
-        self.worker = SHDADataWorker(self.host, self.dni, self.user, self.password, self.comitente)
+            self.worker = SHDADataWorker(self.host, self.dni, self.user, self.password, self.comitente,
+                                         breakers=self.circuit_breakers, cache=self.snapshot_cache,
+                                         settlements=self.selected_settlements(),
+                                         client_factory=self.client_factory,
+                                         scheduler=self.request_scheduler)
 
         # Conectar señales
         self.worker.bluechips_updated.connect(lambda data: self.update_data('bluechips', data))
@@ -933,129 +4558,504 @@ class SHDAHomeBrokerApp(QMainWindow):
 
         self.worker.start()
 
-    def update_data(self, data_type, data):
-        """Actualizar datos y visualizaciones"""
+    def update_scheduler_metrics(self):
+        """Mostrar cola y esperas del planificador de llamados a SHDA"""
+        metrics = self.request_scheduler.metrics()
+        self.scheduler_label.setText(
+            f"API: cola {metrics['queue_depth']} | en curso {metrics['in_flight']} | "
+            f"espera {metrics['wait_mean']:.1f}s (p95 {metrics['wait_p95']:.1f}s)")
+        self.scheduler_label.setToolTip(
+            f"Pedidos despachados: {metrics['dispatched']}\n"
+            f"Pedidos duplicados combinados: {metrics['merged']}\n"
+            f"Cola máxima: {metrics['max_queue_depth']}\n"
+            f"Espera máxima: {metrics['wait_max']:.1f}s\n"
+            f"Tokens disponibles: {metrics['tokens']:.1f} / {self.request_scheduler.burst:g}")
+
+    def update_render_cache_metrics(self):
+        """Mostrar aciertos y memoria de la caché de imágenes de los gráficos"""
+        stats = self.render_cache.stats()
+        self.render_cache_label.setText(
+            f"Render: {stats['hit_rate']:.0%} caché | {stats['bytes'] / 1024 / 1024:.1f} MB")
+        self.render_cache_label.setToolTip(
+            f"Aciertos: {stats['hits']}\n"
+            f"Redibujados: {stats['misses']}\n"
+            f"Imágenes guardadas: {stats['entries']}\n"
+            f"Descartadas por memoria: {stats['evictions']}\n"
+            f"Límite: {self.RENDER_CACHE_MB} MB")
+
+    def load_cached_snapshots(self):
+        """Cargar y mostrar la caché en disco, marcada como desactualizada"""
+        for key in self.tab_keys:
+            snapshot = self.snapshot_cache.load(key)
+            if snapshot is None:
+                continue
+            data, timestamp = snapshot
+            self.update_data(key, build_panel_payload(key, data, timestamp=timestamp, stale=True))
+
+    def current_table_key(self):
+        """Clave del panel de la pestaña de tablas actual (None en pestañas derivadas)"""
+        index = self.tab_widget.currentIndex()
+        return self.tab_keys[index] if 0 <= index < len(self.tab_keys) else None
+
+    def selected_settlements(self):
+        """Plazos tildados, en el orden de SETTLEMENTS (el primero se muestra en los paneles)"""
+        return [settlement for settlement, checkbox in self.settlement_checkboxes.items()
+                if checkbox.isChecked()]
+
+    def on_settlements_changed(self, checked):
+        """Al cambiar los plazos, exigir al menos uno y volver a pedir los datos"""
+        if not self.selected_settlements():
+            self.sender().setChecked(True)
+            return
+        self.manual_refresh()
+
+    def update_settlement_table(self):
+        """Mostrar la comparación entre plazos del panel elegido"""
+        key = self.settlement_panel_combo.currentData()
+        payload = self.payloads.get(key)
+        settlement_table = payload.settlement_table if payload is not None else None
+        self.settlement_info.setVisible(settlement_table is None)
+        self.settlement_model.set_payload(settlement_table)
+        if settlement_table is not None:
+            self.settlement_table.resizeColumnsToContents()
+
+    def manual_refresh(self):
+        """Actualización manual: cancela la actualización en curso y vuelve a pedir"""
+        if not self.stop_worker():
+            self.status_bar.showMessage("La actualización anterior todavía no terminó", 5000)
+            return
+        self.fetch_data()
+
+    def stop_worker(self):
+        """Detener el worker en curso esperando un tiempo acotado"""
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+            return self.worker.wait(self.WORKER_STOP_TIMEOUT_MS)
+        return True
+
+    def stop_export_worker(self):
+        """
+        Cancelar la exportación en curso esperando un tiempo acotado.
+
+        La cancelación es cooperativa (entre archivos y entre páginas del
+        PDF) y lo que quedó a medio escribir se borra. Si un guardado no
+        termina a tiempo, el hilo se desconecta de la interfaz y se lo deja
+        terminar por su cuenta; nunca se lo mata.
+        """
+        worker = self.export_worker
+        if not (worker and worker.isRunning()):
+            return True
+        worker.stop()
+        if worker.wait(self.EXPORT_STOP_TIMEOUT_MS):
+            return True
+        print(f"La exportación no terminó en {self.EXPORT_STOP_TIMEOUT_MS} ms; "
+              f"se la deja terminar en segundo plano y se descarta lo que escriba")
+        for signal in (worker.status_updated, worker.error_occurred, worker.progress_updated,
+                       worker.export_finished, worker.finished):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass  # Sin conexiones
+        self.abandoned_workers.append(worker)
+        worker.finished.connect(lambda: self.abandoned_workers.remove(worker))
+        self.export_worker = None
+        return False
+
+    def update_data(self, data_type, payload):
+        """Actualizar datos y visualizaciones con un payload ya procesado"""
         try:
-            # --- NUEVA MODIFICACIÓN: Filtrar por 'operations' ---
-            filtered_data = data.copy()
-            if 'operations' in filtered_data.columns:
-                # Convertir a numérico, los no-números serán NaN
-                filtered_data['operations'] = pd.to_numeric(filtered_data['operations'], errors='coerce')
-                # Mantener filas donde operations es un número y >= 1
-                filtered_data.dropna(subset=['operations'], inplace=True)
-                filtered_data = filtered_data[filtered_data['operations'] >= 1].copy()
-
-            # Almacenar datos filtrados
-            self.data_storage[data_type] = filtered_data
-
-            # Actualizar tabla y gráfico con los datos filtrados
-            self.update_table(data_type, filtered_data)
-            self.update_plot(data_type, filtered_data)
+            # Qué entró, salió o cambió respecto de la actualización anterior
+            previous = self.payloads.get(data_type)
+            diff = diff_panels(previous, payload) if previous is not None else None
+
+            # Almacenar datos filtrados (el filtrado se hizo en el worker)
+            self.data_storage[data_type] = payload.data
+            self.payloads[data_type] = payload
+            # Solo los datos en vivo entran al historial, no la caché
+            if not payload.stale:
+                self.history.append(data_type, payload.data, payload.timestamp)
+            self.update_breadth(data_type, payload)
+            # La watchlist se rearma solo si el panel aporta (o aportaba) símbolos seguidos
+            if self.watchlist.update(data_type, payload.data):
+                self.update_watchlist_view()
+
+            if data_type in self.replay_positions:
+                # Se está viendo el pasado: el panel sigue grabando y alertando sin redibujarse
+                if not payload.stale:
+                    self.apply_alerts(data_type, payload, display=False)
+                self.sync_timeline()
+                return
+
+            # Intercambiar tabla y gráfico
+            self.show_payload(data_type, payload, diff)
+            # Las alertas se evalúan solo con datos en vivo, no con la caché
+            if not payload.stale:
+                self.apply_alerts(data_type, payload)
+            self.sync_timeline()
+            if data_type == self.settlement_panel_combo.currentData():
+                self.update_settlement_table()
 
         except Exception as e:
             print(f"Error actualizando {data_type}: {e}")
             self.show_error(f"Error actualizando {data_type}: {str(e)}")
 
-    def update_table(self, data_type, data):
-        """Actualizar tabla"""
+    def show_payload(self, data_type, payload, diff=None, reuse=False):
+        """Mostrar un payload en la tabla y el gráfico del panel"""
+        self.update_stale_marker(data_type, payload)
+        self.update_table(data_type, payload, diff)
+        self.update_plot(data_type, payload, diff, reuse)
+
+        # Reconstruir el índice de búsqueda solo si cambió el conjunto de símbolos
+        index = self.symbol_indexes.get(data_type)
+        if index is None or index.symbols != payload.unique_symbols:
+            self.symbol_indexes[data_type] = SymbolIndex(payload.unique_symbols)
+        self.apply_search([data_type])
+        self.apply_selection(data_type)
+
+    def update_breadth(self, data_type, payload):
+        """Actualizar la franja de amplitud: el recuadro del panel que llegó y el total"""
+        stats, total = self.market_breadth.update(data_type, payload.plot_data)
+        for key, title, values in [(data_type, self.tab_titles[data_type], stats),
+                                   ('total', "📊 Total", total)]:
+            change = values.weighted_change
+            color = '#4CAF50' if change > 0 else '#f44336' if change < 0 else 'white'
+            change_text = f"{change:+.2f}%" if not np.isnan(change) else "-"
+            share_text = f"{values.top_share:.0%}" if not np.isnan(values.top_share) else "-"
+            self.breadth_labels[key].setText(
+                f"<b>{title}</b><br>"
+                f"<span style='color:#4CAF50'>▲ {values.advancers}</span> "
+                f"<span style='color:#f44336'>▼ {values.decliners}</span> "
+                f"= {values.unchanged} · <span style='color:{color}'>{change_text}</span><br>"
+                f"Vol. {format_turnover(values.turnover)} · Top {MarketBreadth.TOP}: {share_text}")
+
+    def update_stale_marker(self, data_type, payload):
+        """Marcar en las pestañas si el panel muestra datos de la caché o del historial"""
+        title = self.tab_titles[data_type]
+        tooltip = ""
+        if data_type in self.replay_positions:
+            title += " ⏪"
+            tooltip = f"Historial: actualización de las {payload.timestamp:%H:%M:%S}"
+        elif payload.stale:
+            title += " ⏳"
+            tooltip = f"Datos en caché del {payload.timestamp:%d/%m/%Y %H:%M:%S}; esperando datos en vivo"
+        for tab_widget, widget in [(self.tab_widget, self.tables[data_type]),
+                                   (self.plot_tab_widget, self.plot_widgets[data_type])]:
+            index = tab_widget.indexOf(widget)
+            tab_widget.setTabText(index, title)
+            tab_widget.setTabToolTip(index, tooltip)
+
+    def update_table(self, data_type, payload, diff=None):
+        """Actualizar tabla (con `diff`, solo se repintan y destellan las celdas cambiadas)"""
         try:
             table = self.tables[data_type]
-            table.setSortingEnabled(False)
+            previous_headers = self.table_models[data_type].payload.headers if self.table_models[data_type].payload else None
+            # El modelo reaplica el orden elegido por el usuario
+            self.table_models[data_type].set_payload(payload, diff.changed_cells if diff is not None else None)
+            if payload.headers != previous_headers:
+                table.resizeColumnsToContents()
 
-            if data is None or data.empty:
-                table.setRowCount(0)
-                table.setColumnCount(0)
-                table.setSortingEnabled(True)
-                return
-
-            data_to_display = data.drop(columns=['settlement', 'group'], errors='ignore')
+        except Exception as e:
+            print(f"Error actualizando tabla {data_type}: {e}")
 
-            table.setRowCount(len(data_to_display))
-            table.setColumnCount(len(data_to_display.columns))
-            table.setHorizontalHeaderLabels(data_to_display.columns.tolist())
+    def update_plot(self, data_type, payload, diff=None, reuse=False):
+        """Actualizar gráfico (con `diff`, animando la transición; con `reuse`, sin recrearlo)"""
+        try:
+            plot_widget = self.plot_widgets[data_type]
+            title = PLOT_TITLES.get(data_type, data_type)
+            if data_type in self.replay_positions:
+                title += f" [HISTORIAL {payload.timestamp:%d/%m %H:%M:%S}]"
+            elif payload.stale:
+                title += f" [CACHÉ {payload.timestamp:%d/%m %H:%M:%S}]"
+            plot_widget.plot_bubble_chart(payload, title, diff, reuse=reuse)
 
-            for row_idx, (_, row) in enumerate(data_to_display.iterrows()):
-                for col_idx, value in enumerate(row):
-                    item = NumericTableWidgetItem(str(value))
+        except Exception as e:
+            print(f"Error actualizando gráfico {data_type}: {e}")
 
-                    if 'var' in data_to_display.columns[col_idx].lower() or 'change' in data_to_display.columns[col_idx].lower():
-                        try:
-                            val = float(value)
-                            if val > 0:
-                                item.setBackground(QColor(68, 255, 68, 50))
-                            elif val < 0:
-                                item.setBackground(QColor(255, 68, 68, 50))
-                        except (ValueError, TypeError):
-                            pass
+    def apply_alerts(self, data_type, payload, display=True):
+        """Evaluar las reglas de alerta sobre el panel y mostrar los resultados
 
-                    table.setItem(row_idx, col_idx, item)
+        Con `display=False` (panel en el historial) solo se avisa; el resaltado
+        se guarda y se aplica al volver a "en vivo".
+        """
+        try:
+            hits, row_mask = self.alert_engine.evaluate(data_type, payload.data)
+            symbols = ()
+            if row_mask.any():
+                symbols = payload.data['symbol'].astype(str).to_numpy()[row_mask]
+            self.alert_state[data_type] = (row_mask, symbols)
+            if display:
+                self.table_models[data_type].set_alert_mask(row_mask)
+                self.plot_widgets[data_type].set_alerts(symbols)
+
+            for hit in hits:
+                shown = ', '.join(hit.symbols[:8])
+                if len(hit.symbols) > 8:
+                    shown += f" y {len(hit.symbols) - 8} más"
+                self.toasts.show(f"🔔 {hit.rule.name} - {self.tab_titles[data_type]}\n{shown}")
+            if hits:
+                self.update_status(f"🔔 {len(hits)} alerta(s) en {self.tab_titles[data_type]}")
 
-            table.resizeColumnsToContents()
-            table.setSortingEnabled(True)
+        except Exception as e:
+            print(f"Error evaluando alertas de {data_type}: {e}")
+
+    def current_plot_key(self):
+        """Clave del panel del gráfico visible"""
+        widget = self.plot_tab_widget.currentWidget()
+        return next((key for key, plot_widget in self.plot_widgets.items() if plot_widget is widget), None)
+
+    def sync_timeline(self):
+        """Ajustar la línea de tiempo al historial del panel del gráfico visible"""
+        key = self.current_plot_key()
+        count = self.history.count(key) if key is not None else 0
+        position = self.replay_positions.get(key, count - 1)
+        self.timeline_slider.blockSignals(True)
+        self.timeline_slider.setRange(0, max(count - 1, 0))
+        self.timeline_slider.setValue(max(position, 0))
+        self.timeline_slider.blockSignals(False)
+        self.timeline_slider.setEnabled(count > 1)
+        self.live_button.setEnabled(key in self.replay_positions)
+        if key in self.replay_positions:
+            self.timeline_label.setText(f"⏪ {self.history.timestamp(key, position):%d/%m %H:%M:%S} "
+                                        f"({position + 1}/{count})")
+        else:
+            self.timeline_label.setText(f"En vivo ({count} act.)" if count else "En vivo")
+
+    def on_timeline_moved(self, value):
+        """Agrupar los movimientos del slider: solo se dibuja la última posición pedida"""
+        if self.pending_scrub is None:
+            QTimer.singleShot(0, self.apply_scrub)
+        self.pending_scrub = value
+
+    def apply_scrub(self):
+        """Mostrar en el panel visible la actualización elegida en la línea de tiempo"""
+        index, self.pending_scrub = self.pending_scrub, None
+        key = self.current_plot_key()
+        if key is None or index is None:
+            return
+        count = self.history.count(key)
+        if index >= count - 1:
+            # El extremo derecho de la línea de tiempo es "en vivo"
+            self.go_live(key)
+            return
+        try:
+            self.replay_positions[key] = index
+            self.show_payload(key, self.replay_payload(key, index), reuse=True)
+            self.table_models[key].set_alert_mask(None)
+            self.sync_timeline()
 
         except Exception as e:
-            print(f"Error actualizando tabla {data_type}: {e}")
+            print(f"Error mostrando el historial de {key}: {e}")
+            traceback.print_exc()
 
-    def update_plot(self, data_type, data):
-        """Actualizar gráfico"""
+    def replay_payload(self, key, index):
+        """Payload de una actualización pasada, reconstruido desde el historial (con caché LRU)"""
+        payload = self.replay_cache.get((key, index))
+        if payload is not None:
+            self.replay_cache.move_to_end((key, index))
+            return payload
+        payload = build_panel_payload(key, self.history.frame(key, index),
+                                      timestamp=self.history.timestamp(key, index))
+        self.replay_cache[(key, index)] = payload
+        if len(self.replay_cache) > self.REPLAY_CACHE_SIZE:
+            self.replay_cache.popitem(last=False)
+        return payload
+
+    def go_live(self, key=None):
+        """Volver a mostrar los últimos datos del panel"""
+        key = key if key is not None else self.current_plot_key()
+        if self.replay_positions.pop(key, None) is not None and key in self.payloads:
+            self.show_payload(key, self.payloads[key], reuse=True)
+            row_mask, symbols = self.alert_state.get(key, (None, ()))
+            self.table_models[key].set_alert_mask(row_mask)
+            self.plot_widgets[key].set_alerts(symbols)
+        self.sync_timeline()
+
+    def apply_search(self, keys=None):
+        """Filtrar tablas y destacar burbujas según el texto de búsqueda"""
+        query = self.search_edit.text().strip()
+        current_key = self.current_table_key()
+        for key in keys or self.tab_keys:
+            model = self.table_models[key]
+            index = self.symbol_indexes.get(key)
+            active = bool(query) and (self.search_all_checkbox.isChecked() or key == current_key)
+            if not active or index is None or model.payload is None or not index.symbols:
+                model.set_filter('search', None)
+                self.plot_widgets[key].set_emphasis(None)
+                continue
+
+            model.set_filter('search', index.mask(query, model.payload.symbol_ranks))
+            self.plot_widgets[key].set_emphasis(
+                [index.symbols[i] for i in index.match(query)])
+
+    def apply_selection(self, key):
+        """Filtrar la tabla del panel por los símbolos seleccionados en su gráfico"""
+        model = self.table_models[key]
+        symbols = self.plot_widgets[key].selected_symbols
+        if symbols is None or model.payload is None or not model.payload.unique_symbols:
+            model.set_filter('selection', None)
+            return
+        ranks = pd.Index(model.payload.unique_symbols).get_indexer(list(symbols))
+        model.set_filter('selection', np.isin(model.payload.symbol_ranks, ranks[ranks >= 0]))
+
+    def on_plot_selection(self, key):
+        """Al seleccionar con el rectángulo, mostrar la tabla del panel filtrada"""
+        self.apply_selection(key)
+        symbols = self.plot_widgets[key].selected_symbols
+        if symbols is not None:
+            self.tab_widget.setCurrentWidget(self.tables[key])
+            self.update_status(f"{len(symbols)} símbolo(s) seleccionado(s) en {self.tab_titles[key]}")
+
+    def update_watchlist_view(self):
+        """Rearmar la tabla y el gráfico de la watchlist con los últimos paneles"""
         try:
-            plot_widget = self.plot_widgets[data_type]
-
-            titles = {
-                'bluechips': 'Bluechips - Volumen vs Variación',
-                'galpones': 'Panel General - Volumen vs Variación',
-                'bonds': 'Bonos - Volumen vs Variación',
-                'cedears': 'CEDEARs - Volumen vs Variación',
-                'short_term_bonds': 'Letras - Volumen vs Variación',
-            }
+            previous = self.watchlist_payload
+            payload = build_panel_payload('watchlist', self.watchlist.frame(self.tab_titles))
+            self.watchlist_payload = payload
+            self.watchlist_model.set_payload(payload, diff_cells(previous, payload) if previous is not None else None)
+            if previous is None or previous.headers != payload.headers:
+                self.watchlist_table.resizeColumnsToContents()
+            self.watchlist_plot.plot_bubble_chart(payload, "Watchlist - Volumen vs Variación",
+                                                  reuse=previous is not None)
+
+            text = f"{len(self.watchlist.symbols)} símbolo(s) seguidos"
+            missing = self.watchlist.missing()
+            if missing:
+                text += f" · sin datos: {', '.join(missing)}"
+            self.watchlist_info.setText(text)
 
-            plot_widget.plot_bubble_chart(data, titles.get(data_type, data_type), data_type)
+        except Exception as e:
+            print(f"Error actualizando la watchlist: {e}")
+            traceback.print_exc()
 
+    def add_to_watchlist(self, symbol):
+        if self.watchlist.add(symbol):
+            self.watchlist_edit.clear()
+            self.save_watchlist()
+            self.update_watchlist_view()
+
+    def remove_selected_from_watchlist(self):
+        rows = self.watchlist_table.selectionModel().selectedRows()
+        symbols = {self.watchlist_model.symbol_at(index.row()) for index in rows}
+        if not rows and self.watchlist_table.currentIndex().isValid():
+            symbols = {self.watchlist_model.symbol_at(self.watchlist_table.currentIndex().row())}
+        if any([self.watchlist.remove(symbol) for symbol in symbols if symbol is not None]):
+            self.save_watchlist()
+            self.update_watchlist_view()
+
+    def save_watchlist(self):
+        try:
+            save_watchlist(self.watchlist_path, self.watchlist.symbols)
         except Exception as e:
-            print(f"Error actualizando gráfico {data_type}: {e}")
-    
+            print(f"Error guardando la watchlist: {e}")
+
+    def on_table_context_menu(self, data_type, pos):
+        """Menú contextual de las tablas de panel: agregar el símbolo a la watchlist"""
+        table = self.tables[data_type]
+        index = table.indexAt(pos)
+        symbol = self.table_models[data_type].symbol_at(index.row()) if index.isValid() else None
+        if symbol is None:
+            return
+        menu = QMenu(table)
+        action = menu.addAction(f"⭐ Agregar {symbol} a la watchlist")
+        action.setEnabled(symbol not in self.watchlist.symbols)
+        action.triggered.connect(lambda: self.add_to_watchlist(symbol))
+        menu.exec_(table.viewport().mapToGlobal(pos))
+
     # --- NUEVO MÉTODO: Manejador para el click en la tabla ---
-    def on_table_cell_clicked(self, row, column):
+    def on_table_cell_clicked(self, data_type, index):
         """Maneja el evento de click en una celda para sincronizar con el gráfico."""
         try:
-            # 1. Identificar la tabla y el data_type correctos
-            current_table = self.sender()
-            if not isinstance(current_table, QTableWidget):
-                return
-            
-            data_type = None
-            for key, widget in self.tables.items():
-                if widget is current_table:
-                    data_type = key
-                    break
-            if not data_type:
+            # 1. Obtener el símbolo de la fila clickeada
+            symbol = self.table_models[data_type].symbol_at(index.row())
+            if symbol is None:
                 return
 
-            # 2. Obtener el símbolo de la fila clickeada
-            # Busca la columna que contiene el identificador del activo
-            header_labels = [current_table.horizontalHeaderItem(i).text().lower() for i in range(current_table.columnCount())]
-            symbol_col_index = -1
-            possible_symbol_names = ['symbol', 'ticker', 'simbolo']
-            for name in possible_symbol_names:
-                if name in header_labels:
-                    symbol_col_index = header_labels.index(name)
-                    break
-            
-            if symbol_col_index == -1: return
-
-            symbol = current_table.item(row, symbol_col_index).text()
-
-            # 3. Activar el widget de gráfico correspondiente
+            # 2. Activar el widget de gráfico correspondiente
             plot_widget = self.plot_widgets[data_type]
             self.plot_tab_widget.setCurrentWidget(plot_widget)
 
-            # 4. Llamar a la función para resaltar el símbolo
+            # 3. Llamar a la función para resaltar el símbolo
             plot_widget.highlight_symbol(symbol)
 
         except Exception as e:
             print(f"Error al procesar el click en la tabla: {e}")
             traceback.print_exc()
 
+    def on_render_backend_changed(self, _index):
+        """Cambiar el backend de dibujo de todos los gráficos sin perder la vista"""
+        name = self.render_backend_combo.currentData()
+        for plot_widget in list(self.plot_widgets.values()) + [self.watchlist_plot]:
+            plot_widget.set_backend(name)
+        self.update_status(f"Render de gráficos: {CHART_BACKENDS[name].label}")
+
+    def export_data(self, all_panels):
+        """Exportar el panel actual o todos los paneles en segundo plano"""
+        if self.export_worker and self.export_worker.isRunning():
+            self.status_bar.showMessage("Ya hay una exportación en curso", 5000)
+            return
+
+        formats = [fmt for fmt, action in self.export_format_actions.items() if action.isChecked()]
+        if not formats:
+            self.show_error("Seleccione al menos un formato de exportación")
+            return
+
+        if all_panels:
+            panels = {key: df for key, df in self.data_storage.items() if df is not None}
+        else:
+            key = self.current_table_key() or self.settlement_panel_combo.currentData()
+            panels = {key: self.data_storage[key]} if self.data_storage[key] is not None else {}
+        if not panels:
+            self.show_error("No hay datos cargados para exportar")
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Carpeta de exportación")
+        if not directory:
+            return
+
+        self.start_export(ExportWorker(panels, formats, directory))
+
+    def export_history(self):
+        """Exportar un gráfico por cada actualización del historial del panel visible"""
+        if self.export_worker and self.export_worker.isRunning():
+            self.status_bar.showMessage("Ya hay una exportación en curso", 5000)
+            return
+
+        formats = [fmt for fmt, action in self.export_format_actions.items()
+                   if action.isChecked() and ExportWorker.FORMATS[fmt][1]]
+        if not formats:
+            self.show_error("Seleccione al menos un formato de gráfico (PNG, SVG o PDF)")
+            return
+        key = self.current_plot_key()
+        count = self.history.count(key) if key is not None else 0
+        if not count:
+            self.show_error("El panel visible todavía no tiene historial")
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Carpeta de exportación")
+        if not directory:
+            return
+
+        # Se leen ahora del historial: el worker recibe DataFrames propios
+        frames = [(self.history.timestamp(key, index), self.history.frame(key, index)) for index in range(count)]
+        self.start_export(ExportWorker({}, formats, directory, history=(key, frames)))
+
+    def start_export(self, worker):
+        self.export_worker = worker
+        self.export_worker.status_updated.connect(self.update_status)
+        self.export_worker.error_occurred.connect(self.show_error)
+        self.export_worker.progress_updated.connect(self.export_progress_bar.setValue)
+        self.export_worker.export_finished.connect(self.update_status)
+        self.export_worker.finished.connect(self.on_export_finished)
+
+        self.export_progress_bar.setValue(0)
+        self.export_progress_bar.setVisible(True)
+        self.export_btn.setEnabled(False)
+        self.export_worker.start()
+
+    def on_export_finished(self):
+        """Cuando termina la exportación"""
+        self.export_progress_bar.setVisible(False)
+        self.export_btn.setEnabled(True)
 
     def toggle_auto_update(self, enabled):
         """Activar/desactivar auto-actualización"""
@@ -1077,8 +5077,9 @@ class SHDAHomeBrokerApp(QMainWindow):
 
     def on_worker_finished(self):
         """Cuando termina el worker"""
+        if self.worker and self.worker.isRunning():
+            return  # Terminó un worker cancelado; sigue el nuevo
         self.progress_bar.setVisible(False)
-        self.fetch_btn.setEnabled(True)
 
     def update_status(self, message):
         """Actualizar mensaje de estado"""
@@ -1089,23 +5090,336 @@ class SHDAHomeBrokerApp(QMainWindow):
         QMessageBox.critical(self, "Error", error_message)
         self.status_bar.showMessage(f"Error: {error_message}", 10000)
 
+    def resizeEvent(self, event):
+        """Mantener los avisos en la esquina al redimensionar"""
+        super().resizeEvent(event)
+        if hasattr(self, 'toasts'):
+            self.toasts.reposition()
+
     def closeEvent(self, event):
         """Al cerrar la aplicación"""
-        if self.worker and self.worker.isRunning():
-            self.worker.stop()
-            self.worker.wait()
+        self.stop_worker()
+        self.stop_export_worker()
         self.update_timer.stop()
+        self.history.close()
         event.accept()
 
+class FakeSHDAClient:
+    """
+    Fuente de datos falsa con la misma interfaz que SHDA.SHDA.
+
+    Mantiene un universo fijo de símbolos por panel y hace evolucionar
+    precios, volumen y operaciones como en una rueda real, sin red.
+    """
+
+    PANEL_SIZES = {
+        'get_bluechips': ('BC', 20),
+        'get_galpones': ('GP', 60),
+        'get_bonds': ('BN', 80),
+        'get_cedear': ('CD', 300),
+        'get_short_term_bonds': ('LT', 40),
+    }
+    COLUMNS = ['symbol', 'settlement', 'bid_size', 'bid', 'ask', 'ask_size', 'last', 'change',
+               'open', 'high', 'low', 'previous_close', 'turnover', 'volume', 'operations',
+               'datetime', 'group']
+
+    # Estado compartido entre sesiones, para que cada "login" continúe la rueda
+    _state = {}
+    _lock = threading.Lock()
+
+    def __init__(self, host=None, dni=None, user=None, password=None, seed=0, latency=0.0):
+        self.rng = np.random.default_rng(seed)
+        self.latency = latency
+        for method in self.PANEL_SIZES:
+            setattr(self, method, lambda settlement, method=method: self.panel(method, settlement))
+
+    def panel(self, method, settlement):
+        """Generar la siguiente instantánea de un panel"""
+        if self.latency:
+            time.sleep(self.latency)
+        prefix, size = self.PANEL_SIZES[method]
+        with self._lock:
+            state = self._state.get((method, settlement))
+            if state is None:
+                state = {
+                    'previous_close': self.rng.uniform(10, 5000, size),
+                    'last': None,
+                    'volume': np.zeros(size),
+                    'operations': np.zeros(size),
+                }
+                state['last'] = state['previous_close'].copy()
+                self._state[(method, settlement)] = state
+            state['last'] = state['last'] * np.exp(self.rng.normal(0, 0.002, size))
+            state['volume'] = state['volume'] + self.rng.poisson(50, size) * (self.rng.random(size) > 0.2)
+            state['operations'] = state['operations'] + self.rng.poisson(2, size)
+            last = state['last'].copy()
+            volume = state['volume'].copy()
+            operations = state['operations'].copy()
+            previous_close = state['previous_close']
+
+        spread = last * 0.001
+        return pd.DataFrame({
+            'symbol': [f"{prefix}{i:03d}" for i in range(size)],
+            'settlement': settlement,
+            'bid_size': self.rng.integers(1, 1000, size),
+            'bid': last - spread,
+            'ask': last + spread,
+            'ask_size': self.rng.integers(1, 1000, size),
+            'last': last,
+            'change': (last / previous_close - 1) * 100,  # SHDA la da en porcentaje
+            'open': previous_close,
+            'high': np.maximum(last, previous_close),
+            'low': np.minimum(last, previous_close),
+            'previous_close': previous_close,
+            'turnover': volume * last,
+            'volume': volume,
+            'operations': operations,
+            'datetime': pd.Timestamp.now(),
+            'group': 'fake',
+        }, columns=self.COLUMNS)
+
+def read_rss_bytes():
+    """Memoria residente actual del proceso (psutil si está instalado)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # Último recurso: el pico (no la memoria actual)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def collect_soak_sample(window):
+    """Métricas de un ciclo: memoria, objetos Qt, artistas y hilos"""
+    gc.collect()
+    objects = gc.get_objects()
+    return {
+        'rss_mb': read_rss_bytes() / 2**20,
+        'traced_mb': tracemalloc.get_traced_memory()[0] / 2**20 if tracemalloc.is_tracing() else 0.0,
+        'qobjects': sum(1 for obj in objects if isinstance(obj, QObject)),
+        'qthreads': sum(1 for obj in objects if isinstance(obj, QThread)),
+        'artists': sum(plot_widget.backend.artist_count() for plot_widget in window.plot_widgets.values()),
+        'threads': threading.active_count(),
+    }
+
+def run_soak_test(cycles=200, warmup=10, max_rss_growth_mb=50.0, max_traced_growth_mb=20.0,
+                  max_qobject_growth=50, max_qthread_growth=2, max_artist_growth=50,
+                  max_thread_growth=5, top_allocators=5, latency=0.0):
+    """
+    Prueba de resistencia: muchos ciclos de actualización a tiempo comprimido.
+
+    Usa FakeSHDAClient en lugar del broker y un directorio temporal para la
+    caché. Después de `warmup` ciclos toma la línea base y, al terminar,
+    compara contra los límites de crecimiento. Devuelve 0 si se respetaron
+    y 1 si no, para poder usarla en scripts.
+    """
+    if warmup < 1 or cycles <= warmup:
+        raise ValueError(f"La prueba necesita más ciclos ({cycles}) que de calentamiento ({warmup})")
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix='volumen_merval_soak_') as data_dir:
+        window = SHDAHomeBrokerApp(
+            client_factory=lambda *args: FakeSHDAClient(*args, latency=latency), data_dir=data_dir)
+        window.toggle_auto_update(False)
+
+        def run_cycle():
+            if window.worker is None or not window.worker.isRunning():
+                window.fetch_data()
+            # Esperar al worker sin bloquear el bucle de eventos (las señales llegan encoladas)
+            while window.worker.isRunning():
+                app.processEvents(QEventLoop.AllEvents, 50)
+                window.worker.wait(10)
+            app.processEvents()
+
+        baseline = None
+        baseline_snapshot = None
+        for cycle in range(1, cycles + 1):
+            run_cycle()
+            sample = collect_soak_sample(window)
+            if cycle == warmup:
+                baseline = sample
+                baseline_snapshot = tracemalloc.take_snapshot()
+            print(f"Ciclo {cycle:4d}: RSS {sample['rss_mb']:8.1f} MB | tracemalloc {sample['traced_mb']:7.1f} MB | "
+                  f"QObjects {sample['qobjects']:5d} | QThreads {sample['qthreads']:3d} | "
+                  f"artistas {sample['artists']:6d} | hilos {sample['threads']:3d}")
+
+        window.close()
+
+    print("\nMayores asignaciones desde la línea base:")
+    for stat in tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')[:top_allocators]:
+        print(f"  {stat}")
+    tracemalloc.stop()
+
+    limits = [
+        ('rss_mb', max_rss_growth_mb, 'RSS (MB)'),
+        ('traced_mb', max_traced_growth_mb, 'memoria de tracemalloc (MB)'),
+        ('qobjects', max_qobject_growth, 'QObjects'),
+        ('qthreads', max_qthread_growth, 'QThreads'),
+        ('artists', max_artist_growth, 'artistas de matplotlib'),
+        ('threads', max_thread_growth, 'hilos'),
+    ]
+    failures = []
+    for key, limit, description in limits:
+        growth = sample[key] - baseline[key]
+        status = "OK" if growth <= limit else "FALLA"
+        print(f"{status}: crecimiento de {description} {growth:+.1f} (límite {limit})")
+        if growth > limit:
+            failures.append(description)
+
+    return 1 if failures else 0
+
+def benchmark_chart_backends(points=2000, zoom_steps=20):
+    """
+    Comparar los backends de dibujo con un panel falso de `points` burbujas.
+
+    Mide el dibujo completo del gráfico y el tiempo medio por cuadro al
+    hacer zoom (cada paso redibuja de forma sincrónica).
+    """
+    client = FakeSHDAClient(seed=7)
+    client.PANEL_SIZES = {'benchmark': ('BM', points)}
+    client.panel('benchmark', '24hs')
+    payload = build_panel_payload('benchmark', client.panel('benchmark', '24hs'))
+
+    print(f"Benchmark de render con {len(payload.plot_data)} burbujas")
+    for name, backend in CHART_BACKENDS.items():
+        plot_widget = PlotWidget(backend=name)
+        plot_widget.resize(1200, 800)
+        plot_widget.show()
+        QApplication.processEvents()
+
+        started = time.perf_counter()
+        plot_widget.plot_bubble_chart(payload, 'Benchmark')
+        plot_widget.backend.draw_now()
+        full_ms = (time.perf_counter() - started) * 1000
+
+        (x0, x1), (y0, y1) = plot_widget.get_view()
+        started = time.perf_counter()
+        for step in range(zoom_steps):
+            plot_widget.on_scroll((x0 + x1) / 2, (y0 + y1) / 2, step < zoom_steps // 2)
+            plot_widget.backend.draw_now()
+        frame_ms = (time.perf_counter() - started) * 1000 / zoom_steps
+
+        print(f"  {backend.label:<12} dibujo completo: {full_ms:8.1f} ms   cuadro de zoom: {frame_ms:8.1f} ms")
+        plot_widget.close()
+        plot_widget.deleteLater()
+    return 0
+
+def run_collector(address, interval=180.0, settlements=('24hs',), authkey=None):
+    """Ejecutar el collector sin interfaz hasta Ctrl+C"""
+    app = QCoreApplication.instance()
+    collector = PanelCollector(address, authkey=authkey, interval=interval, settlements=settlements)
+    try:
+        collector.start()
+    except OSError as e:
+        print(f"No se pudo abrir {address[0]}:{address[1]}: {e}")
+        return 1
+
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    # Despertar el loop de Qt de vez en cuando para que Python atienda Ctrl+C
+    wake_timer = QTimer()
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start(500)
+    app.exec_()
+    collector.close()
+    return 0
+
+def run_headless_client(address, authkey=None):
+    """Cliente sin interfaz: imprime cada actualización que manda el collector"""
+    try:
+        subscription = CollectorSubscription(address, authkey)
+    except (EOFError, OSError, AuthenticationError) as e:
+        print(f"No se pudo conectar al collector en {address[0]}:{address[1]}: {e}")
+        return 1
+
+    try:
+        while True:
+            update = subscription.receive(1.0)
+            if isinstance(update, PanelUpdate):
+                kind = ("instantánea" if update.changed_rows is None
+                        else f"{len(update.changed_rows)} filas cambiadas")
+                if update.stale:
+                    kind += ", caché"
+                print(f"{update.timestamp:%H:%M:%S} {update.key}: {len(update.data)} símbolos ({kind})")
+            elif update is not None:
+                print(update)
+    except KeyboardInterrupt:
+        return 0
+    except (EOFError, OSError):
+        print("El collector cerró la conexión")
+        return 1
+    finally:
+        subscription.close()
+
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Análisis de Mercado - Volumen vs Variación")
+    parser.add_argument('--soak', type=int, metavar='CICLOS',
+                        help="Ejecutar la prueba de resistencia con datos falsos y salir")
+    parser.add_argument('--soak-max-rss-mb', type=float, default=50.0,
+                        help="Crecimiento máximo de memoria permitido en la prueba de resistencia")
+    parser.add_argument('--soak-warmup', type=int, default=10, metavar='CICLOS',
+                        help="Ciclos de la prueba de resistencia antes de tomar la línea base")
+    parser.add_argument('--bench-backends', type=int, metavar='PUNTOS',
+                        help="Comparar los backends de dibujo del gráfico y salir")
+    parser.add_argument('--collector', nargs='?', const=f"{COLLECTOR_ADDRESS[0]}:{COLLECTOR_ADDRESS[1]}",
+                        metavar='HOST:PUERTO',
+                        help="Ejecutar solo el collector: una sesión con SHDA que publica los paneles")
+    parser.add_argument('--collector-interval', type=float, default=180.0, metavar='SEG',
+                        help="Segundos entre actualizaciones del collector")
+    parser.add_argument('--collector-settlements', default='24hs', metavar='PLAZOS',
+                        help=f"Plazos que pide el collector, separados por coma ({', '.join(SETTLEMENTS)})")
+    parser.add_argument('--connect', nargs='?', const=f"{COLLECTOR_ADDRESS[0]}:{COLLECTOR_ADDRESS[1]}",
+                        metavar='HOST:PUERTO',
+                        help="Tomar los datos de un collector en lugar de conectarse a SHDA")
+    parser.add_argument('--collector-key', metavar='RUTA',
+                        help=f"Archivo con la clave del collector (o la variable {COLLECTOR_KEY_ENV}; "
+                             f"por defecto ~/.volumen_merval/collector.key)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Con --connect, imprimir las actualizaciones sin abrir la interfaz")
+    args, qt_args = parser.parse_known_args()
+    collector_key = collector_authkey(path=args.collector_key) if args.collector_key else None
+
+    if args.collector:
+        settlements = [s.strip() for s in args.collector_settlements.split(',') if s.strip()]
+        unknown = [s for s in settlements if s not in SETTLEMENTS]
+        if unknown or not settlements:
+            parser.error(f"Plazos desconocidos: {', '.join(unknown) or '(ninguno)'}")
+        app = QCoreApplication([sys.argv[0]] + qt_args)
+        sys.exit(run_collector(parse_collector_address(args.collector),
+                               interval=args.collector_interval, settlements=settlements,
+                               authkey=collector_key))
+
+    collector_address = parse_collector_address(args.connect) if args.connect else None
+    if args.headless:
+        if collector_address is None:
+            parser.error("--headless requiere --connect")
+        sys.exit(run_headless_client(collector_address, collector_key))
+
+    if args.soak:
+        if args.soak_warmup < 1 or args.soak <= args.soak_warmup:
+            parser.error(f"--soak necesita más de {max(args.soak_warmup, 0)} ciclos (--soak-warmup)")
+        app = QApplication([sys.argv[0]] + qt_args)
+        sys.exit(run_soak_test(cycles=args.soak, warmup=args.soak_warmup,
+                               max_rss_growth_mb=args.soak_max_rss_mb))
+
+    if args.bench_backends:
+        app = QApplication([sys.argv[0]] + qt_args)
+        sys.exit(benchmark_chart_backends(points=args.bench_backends))
+
+    app = QApplication([sys.argv[0]] + qt_args)
     app.setApplicationName("SHDA HomeBroker")
 
     # Configurar fuente
     font = QFont("Arial", 9)
     app.setFont(font)
 
-    window = SHDAHomeBrokerApp()
+    window = SHDAHomeBrokerApp(collector_address=collector_address, collector_key=collector_key)
     window.show()
 
     sys.exit(app.exec_())
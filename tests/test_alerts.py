@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from Analisis_data import AlertEngine, compile_alert_rules
+
+
+def panel(change=(0.0, 0.0), turnover=(100.0, 100.0), operations=(10, 10)):
+    return pd.DataFrame({'symbol': ['GGAL', 'YPFD'], 'change': change,
+                         'turnover': turnover, 'operations': operations})
+
+
+def fired(engine, data):
+    hits, _ = engine.evaluate('bluechips', data)
+    return {hit.rule.kind: hit.symbols for hit in hits}
+
+
+def test_first_snapshot_never_fires():
+    engine = AlertEngine(compile_alert_rules([
+        {'type': 'change_cross', 'threshold': 4},
+        {'type': 'operations_jump', 'min_jump': 5},
+        {'type': 'turnover_spike', 'factor': 3, 'window': 1},
+    ]))
+    hits, row_mask = engine.evaluate('bluechips', panel(change=(9.0, -9.0), turnover=(1e9, 1e9)))
+
+    assert hits == []
+    assert not row_mask.any()
+
+
+def test_change_cross_fires_once_in_each_direction():
+    engine = AlertEngine(compile_alert_rules([{'type': 'change_cross', 'threshold': 4}]))
+    engine.evaluate('bluechips', panel(change=(3.5, -3.5)))
+
+    assert fired(engine, panel(change=(4.0, -3.9))) == {'change_cross': ('GGAL',)}
+    assert fired(engine, panel(change=(5.0, -4.5))) == {'change_cross': ('YPFD',)}
+    # Sigue afuera: no es un cruce nuevo
+    hits, row_mask = engine.evaluate('bluechips', panel(change=(6.0, -5.0)))
+    assert hits == [] and not row_mask.any()
+
+
+def test_turnover_spike_waits_for_a_full_window():
+    engine = AlertEngine(compile_alert_rules([{'type': 'turnover_spike', 'factor': 3, 'window': 2}]))
+    engine.evaluate('bluechips', panel(turnover=(100.0, 100.0)))
+
+    # Una sola lectura anterior: la ventana de 2 todavía no está completa
+    assert fired(engine, panel(turnover=(200.0, 100.0))) == {}
+    # Promedio de (200, 100) = 150 para GGAL y 100 para YPFD
+    assert fired(engine, panel(turnover=(400.0, 301.0))) == {'turnover_spike': ('YPFD',)}
+
+
+def test_rules_only_apply_to_their_panels():
+    engine = AlertEngine(compile_alert_rules([{'type': 'operations_jump', 'min_jump': 5, 'panels': ['bonds']}]))
+    engine.evaluate('bluechips', panel(operations=(10, 10)))
+
+    assert fired(engine, panel(operations=(50, 50))) == {}
+
+
+@pytest.mark.parametrize('spec', [
+    {'type': 'volume_drop', 'threshold': 1},
+    {'threshold': 4},
+    {'type': 'change_cross'},
+    {'type': 'turnover_spike', 'factor': 3, 'window': 0},
+])
+def test_invalid_rules_are_rejected(spec):
+    with pytest.raises(ValueError):
+        compile_alert_rules([spec])
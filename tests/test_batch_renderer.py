@@ -0,0 +1,75 @@
+import os
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from Analisis_data import BatchChartRenderer, ExportWorker, FakeSHDAClient, WorkerCancelled
+
+
+def chart_jobs(count):
+    client = FakeSHDAClient(seed=2)
+    return [(f"grafico_{index:02d}", f"Gráfico {index}", client.get_bluechips('24hs')) for index in range(count)]
+
+
+def pdf_page_count(path):
+    with open(path, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page\b(?!s)', f.read()))
+
+
+def test_files_are_returned_in_job_order(tmp_path):
+    jobs = chart_jobs(4)
+    with BatchChartRenderer(max_workers=1) as renderer:
+        paths = renderer.render_to_files(jobs, str(tmp_path), fmt='png')
+    assert paths == [str(tmp_path / f"{name}.png") for name, _, _ in jobs]
+    assert all(os.path.getsize(path) > 0 for path in paths)
+
+
+def test_process_pool_keeps_job_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(BatchChartRenderer, 'PARALLEL_MIN_JOBS', 2)
+    jobs = chart_jobs(4)
+    with BatchChartRenderer(max_workers=2) as renderer:
+        paths = renderer.render_to_files(jobs, str(tmp_path), fmt='png')
+        pdf = renderer.render_to_pdf(jobs, str(tmp_path / 'reporte.pdf'))
+    assert paths == [str(tmp_path / f"{name}.png") for name, _, _ in jobs]
+    assert pdf_page_count(pdf) == 4
+
+
+def test_pdf_has_one_vector_page_per_job(tmp_path):
+    progress = []
+    with BatchChartRenderer(max_workers=1) as renderer:
+        path = renderer.render_to_pdf(chart_jobs(3), str(tmp_path / 'reporte.pdf'),
+                                      progress=lambda done, total: progress.append((done, total)))
+    assert pdf_page_count(path) == 3
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    with open(path, 'rb') as f:
+        assert b'/Subtype /Image' not in f.read()
+
+
+def test_cancellation_stops_between_charts(tmp_path):
+    rendered = []
+    with BatchChartRenderer(max_workers=1) as renderer, pytest.raises(WorkerCancelled):
+        renderer.render_to_files(chart_jobs(5), str(tmp_path), progress=lambda done, total: rendered.append(done),
+                                 should_stop=lambda: len(rendered) >= 2)
+    assert rendered == [1, 2]
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_cancelled_history_export_leaves_no_output(tmp_path):
+    start = datetime(2024, 1, 2, 11, 0)
+    frames = [(start + timedelta(minutes=3 * index), data) for index, (_, _, data) in enumerate(chart_jobs(4))]
+    worker = ExportWorker({}, ['png', 'pdf'], str(tmp_path), history=('bluechips', frames))
+    worker.progress_updated.connect(lambda value: worker.stop() if value >= 25 else None)
+    with pytest.raises(WorkerCancelled):
+        worker.export_all()
+    assert os.listdir(tmp_path) == []
+
+
+def test_history_export_writes_folder_and_pdf(tmp_path):
+    start = datetime(2024, 1, 2, 11, 0)
+    frames = [(start + timedelta(minutes=3 * index), data) for index, (_, _, data) in enumerate(chart_jobs(3))]
+    ExportWorker({}, ['png', 'pdf'], str(tmp_path), history=('bluechips', frames)).export_all()
+    folder, = [name for name in os.listdir(tmp_path) if name.endswith('_png')]
+    pdf, = [name for name in os.listdir(tmp_path) if name.endswith('.pdf')]
+    assert sorted(os.listdir(tmp_path / folder)) == [f"bluechips_{index:04d}.png" for index in (1, 2, 3)]
+    assert pdf_page_count(tmp_path / pdf) == 3
@@ -0,0 +1,73 @@
+from Analisis_data import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow_request()  # Todavía cerrado
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold_and_rejects_until_timeout():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+
+    assert not breaker.allow_request()
+    clock.now = 59.0
+    assert not breaker.allow_request()
+    assert breaker.remaining_open_time() == 1.0
+
+
+def test_half_open_allows_a_single_probe():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 60.0
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 60.0
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert breaker.remaining_open_time() == 0.0
+
+
+def test_failed_probe_reopens_for_a_full_timeout():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 60.0
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    clock.now = 100.0
+    assert not breaker.allow_request()
+    clock.now = 120.0
+    assert breaker.allow_request()
+
+
+def test_cancelled_probe_can_be_retried():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 60.0
+    assert breaker.allow_request()
+
+    breaker.release_probe()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
@@ -0,0 +1,90 @@
+import os
+import stat
+import time
+from multiprocessing.connection import AuthenticationError
+
+import pandas as pd
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from Analisis_data import (COLLECTOR_KEY_ENV, PANEL_FETCHERS, CollectorSubscription, FakeSHDAClient,
+                           PanelCollector, PanelUpdate, apply_panel_delta, collector_authkey, panel_delta)
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_delta_round_trip_with_added_removed_and_reordered_rows():
+    previous = pd.DataFrame({'symbol': ['GGAL', 'YPFD', 'PAMP', 'BMA'],
+                             'change': [1.0, -2.0, float('nan'), 0.5],
+                             'operations': [10, 20, 30, 40]})
+    current = pd.DataFrame({'symbol': ['BMA', 'GGAL', 'TXAR', 'PAMP'],
+                            'change': [0.5, 1.25, 3.0, float('nan')],
+                            'operations': [40, 11, 5, 30]})
+    source, rows = panel_delta(previous, current)
+
+    assert source.tolist() == [3, 0, -1, 2]
+    assert rows.tolist() == [1, 2]
+    rebuilt = apply_panel_delta(previous, source, rows, current.iloc[rows])
+    pd.testing.assert_frame_equal(rebuilt, current)
+    assert rebuilt['operations'].dtype == current['operations'].dtype
+
+
+def test_delta_falls_back_to_snapshot_when_columns_change():
+    previous = pd.DataFrame({'symbol': ['GGAL'], 'operations': [10]})
+    assert panel_delta(previous, pd.DataFrame({'symbol': ['GGAL'], 'operations': [10.5]})) is None
+    assert panel_delta(previous, pd.DataFrame({'symbol': ['GGAL'], 'volume': [10]})) is None
+    assert panel_delta(previous, pd.DataFrame({'symbol': ['YPFD'], 'operations': [10]})) is None
+
+
+def test_authkey_path_from_argument_or_environment(tmp_path, monkeypatch):
+    path = tmp_path / 'shared' / 'collector.key'
+    key = collector_authkey(path=str(path))
+
+    assert len(key) == 32
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    monkeypatch.setenv(COLLECTOR_KEY_ENV, str(path))
+    assert collector_authkey(str(tmp_path / 'data')) == key
+
+
+def wait_for(app, subscription, collector, condition, timeout=30):
+    """Atender el loop de Qt (señales del worker) y los mensajes del collector hasta `condition`"""
+    updates = []
+    deadline = time.monotonic() + timeout
+    while not condition(updates):
+        assert time.monotonic() < deadline, "El collector no mandó las actualizaciones esperadas"
+        app.processEvents()
+        update = subscription.receive(0.02)
+        if isinstance(update, PanelUpdate):
+            updates.append(update)
+    while collector.worker.isRunning():
+        app.processEvents()
+        collector.worker.wait(10)
+    return updates
+
+
+def test_loopback_client_rebuilds_every_panel_from_deltas(app, tmp_path):
+    authkey = b'clave de prueba'
+    collector = PanelCollector(('127.0.0.1', 0), authkey=authkey, interval=3600,
+                               client_factory=lambda *args: FakeSHDAClient(*args, seed=5),
+                               data_dir=str(tmp_path))
+    collector.start()
+    subscription = CollectorSubscription(collector.listener.address, authkey=authkey)
+    try:
+        panels = {key for key, _, _ in PANEL_FETCHERS}
+        first = wait_for(app, subscription, collector, lambda updates: {u.key for u in updates} >= panels)
+        assert all(update.changed_rows is None for update in first)
+
+        collector.fetch()
+        second = wait_for(app, subscription, collector, lambda updates: len(updates) >= len(panels))
+        assert any(update.changed_rows is not None for update in second)
+        for key in panels:
+            pd.testing.assert_frame_equal(subscription.frames[key], collector.state[key][0])
+
+        with pytest.raises(AuthenticationError):
+            CollectorSubscription(collector.listener.address, authkey=b'otra clave')
+    finally:
+        subscription.close()
+        collector.close()
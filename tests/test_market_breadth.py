@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Analisis_data import MarketBreadth, breadth_stats
+
+
+def plot_data(change, turnover):
+    """`change` en porcentaje, como llega de SHDA"""
+    return pd.DataFrame({'symbol': [f"S{i}" for i in range(len(change))],
+                         'change': change, 'turnover': turnover})
+
+
+def test_panel_stats_count_and_weight_percent_change():
+    stats = breadth_stats(plot_data([2.0, -1.0, 0.0, np.nan], [100.0, 300.0, 50.0, 25.0]), top=2)
+
+    assert (stats.advancers, stats.decliners, stats.unchanged) == (1, 1, 1)
+    assert stats.turnover == 475.0
+    # (2% x 100 - 1% x 300 + 0% x 50) / 475: en %, sin reescalar
+    assert stats.weighted_change == pytest.approx(-100.0 / 475.0)
+    assert stats.top_share == pytest.approx(400.0 / 475.0)
+
+
+def test_total_combines_panels_and_replaces_the_updated_one():
+    breadth = MarketBreadth()
+    breadth.update('bluechips', plot_data([1.0, 3.0], [100.0, 100.0]))
+    _, total = breadth.update('bonds', plot_data([-0.5], [200.0]))
+
+    assert (total.advancers, total.decliners, total.unchanged) == (2, 1, 0)
+    assert total.turnover == 400.0
+    assert total.weighted_change == pytest.approx((100.0 + 300.0 - 100.0) / 400.0)
+
+    # Al volver a llegar un panel se reemplazan sus agregados, no se suman
+    _, total = breadth.update('bluechips', plot_data([-1.0], [50.0]))
+    assert (total.advancers, total.decliners) == (0, 2)
+    assert total.turnover == 250.0
+    assert total.weighted_change == pytest.approx((-50.0 - 100.0) / 250.0)
+
+
+def test_total_top_turnover_is_the_top_across_panels():
+    breadth = MarketBreadth()
+    breadth.update('bluechips', plot_data([1.0] * 12, np.arange(1.0, 13.0)))
+    _, total = breadth.update('cedears', plot_data([1.0] * 12, np.arange(101.0, 113.0)))
+
+    assert total.top_turnover.tolist() == list(np.arange(112.0, 102.0, -1.0))
+    assert total.top_share == pytest.approx(total.top_turnover.sum() / total.turnover)
+
+
+def test_panel_without_turnover_has_no_weighted_change():
+    stats = breadth_stats(plot_data([1.0], [0.0]))
+    assert np.isnan(stats.weighted_change) and np.isnan(stats.top_share)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from Analisis_data import build_panel_payload, diff_cells, diff_panels, match_rows
+
+
+def payload(rows):
+    """Payload de un panel a partir de (símbolo, variación, volumen)"""
+    symbols, change, turnover = zip(*rows)
+    return build_panel_payload('bluechips', pd.DataFrame({
+        'symbol': symbols, 'change': change, 'turnover': turnover, 'operations': 10}))
+
+
+def test_match_rows_reordered_and_missing_keys():
+    assert match_rows(['A', 'B', 'C'], ['C', 'A', 'D']).tolist() == [2, 0, -1]
+
+
+def test_match_rows_duplicates_use_first_occurrence():
+    assert match_rows(['A', 'B', 'A', 'C'], ['A', 'C', 'B', 'A']).tolist() == [0, 3, 1, 0]
+
+
+def test_diff_panels_added_removed_and_changed():
+    before = payload([('GGAL', 1.0, 100.0), ('YPFD', -2.0, 200.0), ('PAMP', 0.5, 50.0)])
+    after = payload([('YPFD', -2.0, 200.0), ('GGAL', 1.5, 100.0), ('BMA', 3.0, 80.0)])
+    diff = diff_panels(before, after)
+
+    assert diff.entered == ('BMA',)
+    assert diff.left == ('PAMP',)
+    assert diff.changed == ('GGAL',)
+    status = dict(zip(diff.deltas['symbol'], diff.deltas['status']))
+    assert status == {'YPFD': 'unchanged', 'GGAL': 'changed', 'BMA': 'entered', 'PAMP': 'left'}
+    assert diff.deltas.set_index('symbol').loc['GGAL', 'd_change'] == 0.5
+
+    # Posiciones anteriores alineadas a las filas nuevas (NaN para las que entraron)
+    symbols = after.plot_data['symbol'].tolist()
+    previous_change = dict(zip(symbols, diff.previous_points[:, 0]))
+    assert previous_change['GGAL'] == 1.0 and previous_change['YPFD'] == -2.0
+    assert np.isnan(previous_change['BMA'])
+    assert diff.left_points[:, 0].tolist() == [0.5]
+
+
+def test_diff_panels_reorder_only_changes_nothing():
+    rows = [('GGAL', 1.0, 100.0), ('YPFD', -2.0, 200.0), ('PAMP', 0.5, 50.0)]
+    diff = diff_panels(payload(rows), payload(rows[::-1]))
+
+    assert diff.entered == diff.left == diff.changed == ()
+    assert not diff.changed_cells.any()
+
+
+def test_diff_panels_duplicate_symbols_are_not_reported_as_left():
+    before = payload([('GGAL', 1.0, 100.0), ('GGAL', 1.0, 100.0), ('YPFD', -2.0, 200.0)])
+    after = payload([('GGAL', 1.0, 100.0), ('YPFD', -2.0, 200.0)])
+    diff = diff_panels(before, after)
+
+    assert diff.left == ()
+    assert diff.entered == ()
+
+
+def test_diff_cells_marks_changed_and_new_rows():
+    before = payload([('GGAL', 1.0, 100.0), ('YPFD', -2.0, 200.0)])
+    after = payload([('YPFD', -2.0, 250.0), ('GGAL', 1.0, 100.0), ('BMA', 3.0, 80.0)])
+    changed = diff_cells(before, after)
+
+    headers = list(after.headers)
+    rows = {symbol: changed[row] for row, symbol in enumerate(after.cells[:, headers.index('symbol')])}
+    assert not rows['GGAL'].any()
+    assert rows['YPFD'].tolist() == [header == 'turnover' for header in headers]
+    assert rows['BMA'].all()
+
+
+def test_diff_cells_without_matching_columns_is_none():
+    before = payload([('GGAL', 1.0, 100.0)])
+    after = build_panel_payload('bluechips', pd.DataFrame({'symbol': ['GGAL'], 'change': [1.0],
+                                                           'turnover': [100.0], 'operations': 10,
+                                                           'volume': 5}))
+    assert diff_cells(before, after) is None
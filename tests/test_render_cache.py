@@ -0,0 +1,46 @@
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from Analisis_data import FakeSHDAClient, PlotWidget, RenderCache, build_panel_payload
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.mark.parametrize('backend', ['matplotlib', 'qt'])
+def test_pan_does_not_evict_other_panels(app, backend):
+    client = FakeSHDAClient(seed=1)
+    cache = RenderCache(1024 ** 3)
+    widgets = []
+    for key, method in [('bluechips', 'get_bluechips'), ('bonds', 'get_bonds'), ('cedears', 'get_cedear')]:
+        widget = PlotWidget(backend=backend, render_cache=cache)
+        widget.resize(600, 400)
+        widget.show()
+        widget.plot_bubble_chart(build_panel_payload(key, getattr(client, method)('24hs')), key)
+        widget.backend.draw_now()
+        widgets.append(widget)
+    app.processEvents()
+    keys = [widget.backend.render_key() for widget in widgets]
+    assert all(key in cache.entries for key in keys)
+
+    # Lugar para una sola imagen más: cada cuadro guardado desalojaría otra pestaña
+    cache.max_bytes = cache.bytes + max(nbytes for _, nbytes in cache.entries.values())
+    panned = widgets[0]
+    (x0, x1), (y0, y1) = panned.get_view()
+    step = (x1 - x0) / 60
+    for frame in range(1, 31):
+        panned.set_view((x0 + frame * step, x1 + frame * step), (y0, y1))
+        panned.backend.draw_now()
+
+    assert cache.evictions == 0
+    assert all(key in cache.entries for key in keys[1:])
+
+    # Al volver a la vista original se reutiliza la imagen guardada
+    hits = cache.hits
+    panned.reset_zoom()
+    panned.backend.draw_now()
+    assert cache.hits == hits + 1
+    for widget in widgets:
+        widget.close()
@@ -0,0 +1,104 @@
+import threading
+
+from Analisis_data import RequestScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def scheduler_without_tokens(clock):
+    """Planificador con un token cada 1000 s, ya gastado: nada sale sin mover el reloj"""
+    scheduler = RequestScheduler(rate=0.001, burst=1.0, costs={}, clock=clock)
+    assert scheduler.submit('first', 'panel', lambda: 'first').result(timeout=2) == 'first'
+    return scheduler
+
+
+def test_refill_is_proportional_to_elapsed_time_and_capped():
+    clock = FakeClock()
+    scheduler = RequestScheduler(rate=2.0, burst=4.0, clock=clock)
+    scheduler.tokens = 0.0
+
+    clock.now = 1.5
+    scheduler.refill()
+    assert scheduler.tokens == 3.0
+    clock.now = 100.0
+    scheduler.refill()
+    assert scheduler.tokens == 4.0
+
+
+def test_duplicate_key_shares_the_pending_future():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return 'data'
+
+    scheduler = RequestScheduler(clock=FakeClock())
+    first = scheduler.submit(('panel', 'bluechips'), 'get_bluechips', fetch)
+    second = scheduler.submit(('panel', 'bluechips'), 'get_bluechips', fetch)
+    release.set()
+
+    assert second is first
+    assert first.result(timeout=2) == 'data'
+    assert calls == [1]
+    assert scheduler.metrics()['merged'] == 1
+
+
+def test_focused_panel_is_dispatched_first_and_set_focus_wakes_the_dispatcher():
+    clock = FakeClock()
+    scheduler = scheduler_without_tokens(clock)
+    order = []
+    other = scheduler.submit('other', 'panel', lambda: order.append('other'), panel='bonds')
+    focused = scheduler.submit('focused', 'panel', lambda: order.append('focused'), panel='cedears')
+
+    clock.now += 1000
+    scheduler.set_focus('cedears')
+    focused.result(timeout=2)
+    assert not other.done()
+
+    clock.now += 1000
+    scheduler.set_focus('cedears')
+    other.result(timeout=2)
+    assert order == ['focused', 'other']
+
+
+def test_abandoned_queued_request_is_dropped_only_when_nobody_waits():
+    clock = FakeClock()
+    scheduler = scheduler_without_tokens(clock)
+    future = scheduler.submit('queued', 'panel', lambda: 'data')
+    assert scheduler.submit('queued', 'panel', lambda: 'data') is future
+
+    scheduler.abandon('queued')
+    assert not future.cancelled()
+    assert scheduler.metrics()['queue_depth'] == 1
+
+    scheduler.abandon('queued')
+    assert future.cancelled()
+    assert scheduler.metrics()['queue_depth'] == 0
+
+
+def test_forgotten_in_flight_request_is_not_shared_with_the_retry():
+    started = threading.Event()
+    release = threading.Event()
+
+    def hang():
+        started.set()
+        return release.wait(2)
+
+    scheduler = RequestScheduler(clock=FakeClock())
+    hung = scheduler.submit('slow', 'panel', hang)
+    assert started.wait(2)
+
+    scheduler.abandon('slow', forget=True)
+    retry = scheduler.submit('slow', 'panel', lambda: 'retry')
+    assert retry is not hung
+    assert retry.result(timeout=2) == 'retry'
+    release.set()
+    assert hung.result(timeout=2) is True
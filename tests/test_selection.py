@@ -0,0 +1,53 @@
+import pytest
+from PyQt5.QtCore import QEvent, QPoint, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+from Analisis_data import FakeSHDAClient, PlotWidget, build_panel_payload
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def point(widget, fx, fy):
+    return QPoint(int(widget.width() * fx), int(widget.height() * fy))
+
+
+def drag(widget, start, end):
+    # QTest.mouseMove no manda eventos con el botón apretado
+    QTest.mousePress(widget, Qt.LeftButton, Qt.NoModifier, start)
+    for step in range(1, 6):
+        position = start + (end - start) * step / 5
+        QApplication.sendEvent(widget, QMouseEvent(QEvent.MouseMove, position, Qt.NoButton,
+                                                   Qt.LeftButton, Qt.NoModifier))
+    QTest.mouseRelease(widget, Qt.LeftButton, Qt.NoModifier, end)
+
+
+@pytest.mark.parametrize('backend', ['matplotlib', 'qt'])
+def test_click_clears_selection_kept_across_refresh(app, backend):
+    client = FakeSHDAClient(seed=3)
+    widget = PlotWidget(backend=backend)
+    widget.resize(600, 400)
+    widget.show()
+    widget.plot_bubble_chart(build_panel_payload('cedears', client.get_cedear('24hs')), 'cedears')
+    widget.backend.draw_now()
+    widget.set_select_mode(True)
+    app.processEvents()
+    canvas = widget.backend.widget()
+
+    drag(canvas, point(canvas, 0.3, 0.3), point(canvas, 0.8, 0.75))
+    selected = widget.selected_symbols
+    assert selected
+
+    # Actualización: nueva figura, la selección se conserva por símbolo
+    widget.plot_bubble_chart(build_panel_payload('cedears', client.get_cedear('24hs')), 'cedears')
+    widget.backend.draw_now()
+    app.processEvents()
+    assert widget.selected_symbols == selected
+
+    QTest.mouseClick(canvas, Qt.LeftButton, Qt.NoModifier, point(canvas, 0.5, 0.5))
+    assert widget.selected_symbols is None
+    widget.close()
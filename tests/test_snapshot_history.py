@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from Analisis_data import SnapshotHistory
+
+
+def test_float_after_int_snapshot_replays_exactly(tmp_path):
+    history = SnapshotHistory(str(tmp_path))
+    history.append('bluechips', pd.DataFrame({'symbol': ['GGAL', 'YPFD'], 'turnover': [100, 200]}), 1)
+    history.append('bluechips', pd.DataFrame({'symbol': ['GGAL', 'YPFD'], 'turnover': [100.7, 200.25]}), 2)
+
+    assert history.frame('bluechips', 1)['turnover'].tolist() == [100.7, 200.25]
+    assert history.frame('bluechips', 0)['turnover'].tolist() == [100, 200]
+    history.close()
+
+
+def test_numbers_after_missing_only_column_replay_as_numbers(tmp_path):
+    history = SnapshotHistory(str(tmp_path))
+    history.append('bonds', pd.DataFrame({'symbol': ['AL30'], 'change': [None]}), 1)
+    history.append('bonds', pd.DataFrame({'symbol': ['AL30'], 'change': [1.5]}), 2)
+
+    assert np.isnan(history.frame('bonds', 0)['change'].iloc[0])
+    assert history.frame('bonds', 1)['change'].tolist() == [1.5]
+    history.close()
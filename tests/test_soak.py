@@ -0,0 +1,18 @@
+import pytest
+
+from Analisis_data import run_soak_test
+
+
+# La caché de imágenes (RENDER_CACHE_MB) se termina de llenar en los primeros ciclos
+def test_short_soak_run_stays_within_limits(capsys):
+    assert run_soak_test(cycles=8, warmup=5) == 0
+    output = capsys.readouterr().out
+    assert "FALLA" not in output
+    assert "crecimiento de QThreads" in output
+    assert "crecimiento de memoria de tracemalloc" in output
+
+
+@pytest.mark.parametrize('cycles', [0, 2])
+def test_soak_needs_more_cycles_than_warmup(cycles):
+    with pytest.raises(ValueError):
+        run_soak_test(cycles=cycles, warmup=2)
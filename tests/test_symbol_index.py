@@ -0,0 +1,41 @@
+import numpy as np
+
+from Analisis_data import SymbolIndex
+
+SYMBOLS = ('AL30', 'AL30D', 'GD30', 'GGAL', 'YPFD')
+
+
+def matches(index, query, prefix_only=False):
+    return [index.symbols[i] for i in index.match(query, prefix_only)]
+
+
+def test_substring_and_prefix_matching_ignore_case():
+    index = SymbolIndex(SYMBOLS)
+
+    assert matches(index, 'l30') == ['AL30', 'AL30D']
+    assert matches(index, '30') == ['AL30', 'AL30D', 'GD30']
+    assert matches(index, '30', prefix_only=True) == []
+    assert matches(index, ' g ', prefix_only=True) == ['GD30', 'GGAL']
+    assert matches(index, 'D') == ['AL30D', 'GD30', 'YPFD']
+
+
+def test_empty_and_unknown_queries():
+    index = SymbolIndex(SYMBOLS)
+
+    assert matches(index, '') == list(SYMBOLS)
+    assert matches(index, 'XYZ') == []
+
+
+def test_queries_longer_than_the_indexed_length():
+    index = SymbolIndex(('TXAR2026ABC', 'TXAR2026XYZ', 'TXAR'))
+
+    assert matches(index, 'TXAR2026AB') == ['TXAR2026ABC']
+    assert matches(index, 'XAR2026XY') == ['TXAR2026XYZ']
+    assert matches(index, 'XAR2026XY', prefix_only=True) == []
+
+
+def test_mask_maps_symbol_ids_to_table_rows():
+    index = SymbolIndex(SYMBOLS)
+    symbol_ranks = np.array([3, 0, 3, 4])  # GGAL, AL30, GGAL, YPFD
+
+    assert index.mask('GG', symbol_ranks).tolist() == [True, False, True, False]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from Analisis_data import PanelTableModel, build_table_payload
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def model(app):
+    model = PanelTableModel()
+    model.set_payload(build_table_payload('bluechips', pd.DataFrame({
+        'symbol': ['GGAL', 'YPFD', 'PAMP', 'BMA', 'TXAR'],
+        'change': [1.5, np.nan, -2.0, 1.5, 10.0],
+    })))
+    return model
+
+
+def symbols(model):
+    return [model.symbol_at(row) for row in range(model.rowCount())]
+
+
+def test_ascending_sort_puts_nan_last(model):
+    model.sort(1, Qt.AscendingOrder)
+    assert symbols(model) == ['PAMP', 'BMA', 'GGAL', 'TXAR', 'YPFD']
+
+
+def test_descending_sort_keeps_nan_last_and_symbol_tie_break(model):
+    model.sort(1, Qt.DescendingOrder)
+    assert symbols(model) == ['TXAR', 'BMA', 'GGAL', 'PAMP', 'YPFD']
+
+
+def test_sort_survives_a_new_payload(model):
+    model.sort(1, Qt.DescendingOrder)
+    refreshed = build_table_payload('bluechips', pd.DataFrame({
+        'symbol': ['GGAL', 'YPFD', 'PAMP'], 'change': [0.5, 3.0, np.nan]}))
+
+    assert model.sorted_order(refreshed).tolist() == [1, 0, 2]
+    model.set_payload(refreshed)
+    assert symbols(model) == ['YPFD', 'GGAL', 'PAMP']
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from Analisis_data import Watchlist, load_watchlist, save_watchlist
+
+
+def panel(symbols, last):
+    return pd.DataFrame({'symbol': symbols, 'last': last})
+
+
+def test_add_and_remove_normalize_and_skip_duplicates():
+    watchlist = Watchlist(['GGAL'])
+
+    assert watchlist.add(' ypfd ')
+    assert not watchlist.add('GGAL')
+    assert not watchlist.add('  ')
+    assert watchlist.remove('GGAL')
+    assert not watchlist.remove('GGAL')
+    assert watchlist.symbols == ['YPFD']
+
+
+def test_frame_joins_panels_in_watchlist_order():
+    watchlist = Watchlist(['AL30', 'GGAL', 'AAPL'], panel_order=['bluechips', 'bonds', 'cedears'])
+    assert watchlist.update('bluechips', panel(['GGAL', 'YPFD'], [10.0, 20.0]))
+    assert watchlist.update('bonds', panel(['AL30', 'GGAL'], [30.0, 99.0]))
+    assert not watchlist.update('cedears', panel(['MSFT'], [40.0]))
+
+    frame = watchlist.frame({'bluechips': 'Bluechips', 'bonds': 'Bonos'})
+    assert frame['symbol'].tolist() == ['AL30', 'GGAL']
+    assert frame['panel'].tolist() == ['Bonos', 'Bluechips']  # GGAL sale del panel con prioridad
+    assert frame['last'].tolist() == [30.0, 10.0]
+    assert watchlist.missing() == ['AAPL']
+
+
+def test_symbol_leaving_a_panel_updates_the_index():
+    watchlist = Watchlist(['GGAL'])
+    watchlist.update('bluechips', panel(['GGAL'], [10.0]))
+
+    # Afecta a la watchlist porque GGAL se fue
+    assert watchlist.update('bluechips', panel(['YPFD'], [20.0]))
+    assert watchlist.source('GGAL') is None
+    assert watchlist.frame().empty
+
+
+def test_persistence_round_trip(tmp_path):
+    path = tmp_path / 'config' / 'watchlist.json'
+    save_watchlist(str(path), ['GGAL', 'AL30'])
+
+    assert load_watchlist(str(path)) == ['GGAL', 'AL30']
+    assert load_watchlist(str(tmp_path / 'missing.json')) == []
+    path.write_text('{no es json', encoding='utf-8')
+    assert load_watchlist(str(path)) == []